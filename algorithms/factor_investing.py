@@ -1,5 +1,5 @@
-import yfinance as yf
 from core.utils import fetch_stock_data
+from core.info_cache import get_ticker_info
 
 # Define simple thresholds
 # These are illustrative. Real models use industry-relative (z-score) values.
@@ -12,8 +12,7 @@ def run_factor_investing(ticker):
     Scores the stock on 'Value' and 'Quality' factors using yfinance info.
     """
     try:
-        stock = yf.Ticker(ticker)
-        info = stock.info
+        info = get_ticker_info(ticker, fields=('trailingPE', 'returnOnEquity'))
         
         # Fetch data to satisfy Council and simulate workload
         fetch_stock_data(ticker, period="1y")
@@ -0,0 +1,306 @@
+import numpy as np
+import pandas as pd
+from core.utils import fetch_price_matrix
+
+# Native NumPy GARCH(1,1) fitter for many return series at once.
+# Model (per column):  r_t = mu + e_t,  s2_t = omega + alpha * e_{t-1}^2 + beta * s2_{t-1}
+# with Gaussian errors, the same specification run_volatility_forecast fits
+# through `arch`. Parameters are estimated with BHHH (outer product of the
+# per-observation scores as the Hessian), which needs only first
+# derivatives; those are carried through the variance recursion
+# analytically, so every step is a handful of (dates x tickers) array ops.
+
+# Returns are scaled by 100 before fitting, as in run_volatility_forecast
+RETURN_SCALE = 100
+TRADING_DAYS = 252
+
+# Exponentially weighted backcast of the initial variance (as `arch` does)
+_BACKCAST_DECAY = 0.94
+_BACKCAST_OBS = 75
+
+# Starting (alpha, beta) candidates. Weakly heteroskedastic series have
+# a likelihood ridge between "high persistence, tiny omega" and "constant
+# variance", so the best high- and the best low-persistence start are both
+# optimized (side by side, as extra columns) and the better result is kept.
+_HIGH_PERSISTENCE_STARTS = [(0.05, 0.90), (0.10, 0.80), (0.10, 0.85), (0.05, 0.94), (0.15, 0.75)]
+_LOW_PERSISTENCE_STARTS = [(0.05, 0.0), (0.10, 0.10), (0.20, 0.20)]
+
+_MAX_PERSISTENCE = 0.9999
+_MAX_HALVINGS = 10
+
+
+def _backcast(resids, valid):
+    """Initial variance per column from its first valid residuals."""
+    backcast = np.empty(resids.shape[1])
+    for j in range(resids.shape[1]):
+        series = resids[valid[:, j], j][:_BACKCAST_OBS]
+        weights = _BACKCAST_DECAY ** np.arange(len(series))
+        backcast[j] = np.sum(series ** 2 * weights) / np.sum(weights)
+    return backcast
+
+
+def _recursion(returns, valid, backcast, params, with_scores=False):
+    """
+    Runs the variance recursion for every column.
+    'params' is (4, N): mu, omega, alpha, beta. Returns the log-likelihood
+    per column, the conditional variances (T, N) and, if requested, the
+    per-observation scores (T, 4, N). Rows where a column has no return
+    (e.g. before its listing date) reset that column to the backcast and
+    contribute nothing.
+    Only the recursion itself loops over time; everything else is done on
+    the whole (T, N) array afterwards.
+    """
+    mu, omega, alpha, beta = params
+    T, N = returns.shape
+
+    resids = np.where(valid, returns - mu, 0.0)
+    sq_resids = np.where(valid, resids ** 2, backcast)
+    gaps = ~valid.all(axis=1)
+
+    sigma2 = np.empty((T, N))
+    dsigma2 = np.empty((T, 4, N)) if with_scores else None
+
+    prev_sq, prev_sigma2 = backcast, backcast
+    prev_resid = np.zeros(N)
+    prev_d = np.zeros((4, N))  # d s2_{t-1} / d (mu, omega, alpha, beta)
+
+    for t in range(T):
+        s2 = omega + alpha * prev_sq + beta * prev_sigma2
+        if gaps[t]:
+            s2 = np.where(valid[t], s2, backcast)
+        sigma2[t] = s2
+
+        if with_scores:
+            d = beta * prev_d
+            d[0] -= 2.0 * alpha * prev_resid
+            d[1] += 1.0
+            d[2] += prev_sq
+            d[3] += prev_sigma2
+            if gaps[t]:
+                d = np.where(valid[t], d, 0.0)
+            dsigma2[t] = d
+            prev_d = d
+            prev_resid = resids[t]
+
+        prev_sq = sq_resids[t]
+        prev_sigma2 = s2
+
+    ratio = sq_resids / sigma2
+    loglik = -0.5 * np.sum(np.where(valid, np.log(2 * np.pi * sigma2) + ratio, 0.0), axis=0)
+
+    scores = None
+    if with_scores:
+        # d l_t = 0.5 * (e^2 / s2 - 1) / s2 * d s2  -  0.5 * d e^2 / s2,
+        # where e^2 only depends on mu (d e^2 / d mu = -2 e)
+        scores = (0.5 * (ratio - 1.0) / sigma2)[:, None, :] * dsigma2
+        scores[:, 0, :] += resids / sigma2
+        scores *= valid[:, None, :]
+
+    return loglik, sigma2, scores
+
+
+def _project(params, omega_floor):
+    """Clips parameters back into the stationary, positive-variance region."""
+    mu, omega, alpha, beta = params
+    omega = np.maximum(omega, omega_floor)
+    alpha = np.clip(alpha, 0.0, _MAX_PERSISTENCE)
+    beta = np.clip(beta, 0.0, _MAX_PERSISTENCE)
+    # Scale alpha and beta down together if persistence is too high
+    scale = np.minimum(1.0, _MAX_PERSISTENCE / np.maximum(alpha + beta, 1e-12))
+    return np.vstack([mu, omega, alpha * scale, beta * scale])
+
+
+def _best_start(returns, valid, backcast, grid):
+    """The (4, N) starting parameters from 'grid' with the highest likelihood per column."""
+    mu = np.nanmean(np.where(valid, returns, np.nan), axis=0)
+    var = np.nanvar(np.where(valid, returns, np.nan), axis=0)
+
+    best_params, best_loglik = None, None
+    for alpha, beta in grid:
+        params = np.vstack([mu, var * (1 - alpha - beta),
+                            np.full_like(mu, alpha), np.full_like(mu, beta)])
+        loglik, _, _ = _recursion(returns, valid, backcast, params)
+        if best_params is None:
+            best_params, best_loglik = params, loglik
+        else:
+            better = loglik > best_loglik
+            best_params = np.where(better, params, best_params)
+            best_loglik = np.where(better, loglik, best_loglik)
+    return best_params
+
+
+def _optimize(returns, valid, backcast, params, max_iter, tol):
+    """
+    BHHH with a projected line search, run on every column at once.
+    Columns drop out of the computation as soon as they converge, or fail:
+    no step along the search direction raises the likelihood although
+    the direction still promises a gain above 'tol'. Returns (params,
+    loglik, converged, failed); columns that reach 'max_iter' are neither.
+    """
+    params = params.copy()
+    omega_floor = 1e-8 * np.maximum(backcast, 1e-12)
+    loglik, _, _ = _recursion(returns, valid, backcast, params)
+    converged = np.zeros(returns.shape[1], dtype=bool)
+    failed = np.zeros(returns.shape[1], dtype=bool)
+
+    for _ in range(max_iter):
+        cols = np.flatnonzero(~(converged | failed))
+        if not len(cols):
+            break
+        r, v, b, p = returns[:, cols], valid[:, cols], backcast[cols], params[:, cols]
+        _, _, scores = _recursion(r, v, b, p, with_scores=True)
+
+        # BHHH direction: (sum of score outer products)^-1 * total score
+        gradient = scores.sum(axis=0).T                                # (n, 4)
+        hessian = np.einsum('tin,tjn->nij', scores, scores)            # (n, 4, 4)
+        hessian += 1e-10 * np.eye(4)
+
+        # Active set: hold alpha / beta at zero while the likelihood still
+        # wants them negative, and solve for the remaining parameters
+        for i in (2, 3):
+            active = (p[i] <= 0) & (gradient[:, i] < 0)
+            gradient[active, i] = 0.0
+            hessian[active, i, :] = 0.0
+            hessian[active, :, i] = 0.0
+            hessian[active, i, i] = 1.0
+
+        direction = np.linalg.solve(hessian, gradient[..., None])[..., 0].T  # (4, n)
+
+        # Projected step-halving line search, per series: keep the longest
+        # step (clipped back into the feasible region, so parameters can
+        # slide along a boundary such as alpha = 0) that does not lower the
+        # likelihood. Only series still searching are re-evaluated.
+        old_loglik = loglik[cols]
+        step = np.ones(len(cols))
+        searching = np.ones(len(cols), dtype=bool)
+        for _ in range(_MAX_HALVINGS):
+            idx = np.flatnonzero(searching)
+            if not len(idx):
+                break
+            trial = _project(p[:, idx] + step[idx] * direction[:, idx], omega_floor[cols[idx]])
+            trial_loglik, _, _ = _recursion(r[:, idx], v[:, idx], b[idx], trial)
+            ok = trial_loglik >= old_loglik[idx]
+            params[:, cols[idx[ok]]] = trial[:, ok]
+            loglik[cols[idx[ok]]] = trial_loglik[ok]
+            searching[idx[ok]] = False
+            step[idx[~ok]] /= 2
+
+        # A series whose every halving failed has stalled. It is at a
+        # (possibly constrained) optimum if the smallest feasible step only
+        # promised a negligible first-order gain; otherwise the search has
+        # failed there
+        scale = np.maximum(np.abs(old_loglik), 1.0)
+        improvement = np.abs(loglik[cols] - old_loglik) / scale
+        feasible = (_project(p + step * direction, omega_floor[cols]) - p) / step
+        decrement = np.einsum('ni,in->n', gradient, feasible) / scale
+        converged[cols] = np.where(searching, decrement < tol, improvement < tol)
+        failed[cols] = searching & (decrement >= tol)
+
+    return params, loglik, converged, failed
+
+
+def fit_garch_batch(returns, max_iter=100, tol=1e-9):
+    """
+    Fits GARCH(1,1) to every column of 'returns' ((T, N) array or
+    DataFrame, already scaled - e.g. 100 * log returns) at once.
+    Returns a dict of arrays: 'mu', 'omega', 'alpha', 'beta', 'loglik',
+    'converged' and 'failed' (N,; see _optimize), 'conditional_variance' (T, N) and
+    'forecast_variance' (N,), the one-step-ahead variance.
+    """
+    returns = np.asarray(returns, dtype=float)
+    if returns.ndim == 1:
+        returns = returns[:, None]
+    valid = np.isfinite(returns)
+    returns = np.where(valid, returns, 0.0)
+
+    mean = np.array([returns[valid[:, j], j].mean() if valid[:, j].any() else 0.0
+                     for j in range(returns.shape[1])])
+    backcast = _backcast(returns - mean, valid)
+
+    # Optimize the high- and low-persistence starts side by side
+    n = returns.shape[1]
+    starts = np.hstack([_best_start(returns, valid, backcast, _HIGH_PERSISTENCE_STARTS),
+                        _best_start(returns, valid, backcast, _LOW_PERSISTENCE_STARTS)])
+    tiled = lambda a: np.concatenate([a, a], axis=-1)
+    params, loglik, converged, failed = _optimize(tiled(returns), tiled(valid), tiled(backcast),
+                                                  starts, max_iter, tol)
+
+    low_wins = loglik[n:] > loglik[:n]
+    params = np.where(low_wins, params[:, n:], params[:, :n])
+    converged = np.where(low_wins, converged[n:], converged[:n])
+    failed = np.where(low_wins, failed[n:], failed[:n])
+
+    loglik, sigma2, _ = _recursion(returns, valid, backcast, params)
+    mu, omega, alpha, beta = params
+
+    last_resid = returns[-1] - mu
+    last_sq = np.where(valid[-1], last_resid ** 2, backcast)
+    forecast = omega + alpha * last_sq + beta * sigma2[-1]
+
+    return {
+        'mu': mu,
+        'omega': omega,
+        'alpha': alpha,
+        'beta': beta,
+        'loglik': loglik,
+        'converged': converged,
+        'failed': failed,
+        'conditional_variance': sigma2,
+        'forecast_variance': forecast,
+    }
+
+
+def forecast_volatility(prices):
+    """
+    One-step-ahead annualized GARCH(1,1) volatility for every column of a
+    (dates x tickers) close-price DataFrame, e.g. from
+    core.utils.fetch_price_matrix. Returns a DataFrame indexed by ticker
+    with the forecast, the full-sample historical volatility and the
+    fitted parameters.
+    """
+    returns = RETURN_SCALE * np.log(prices / prices.shift(1)).iloc[1:]
+    fit = fit_garch_batch(returns.to_numpy())
+
+    annualize = np.sqrt(TRADING_DAYS) / RETURN_SCALE
+    return pd.DataFrame({
+        'forecast_volatility': np.sqrt(fit['forecast_variance']) * annualize,
+        'historical_volatility': returns.std().to_numpy() * annualize,
+        'omega': fit['omega'],
+        'alpha': fit['alpha'],
+        'beta': fit['beta'],
+        'converged': fit['converged'],
+        'failed': fit['failed'],
+    }, index=prices.columns)
+
+
+def run_volatility_forecast_batch(tickers):
+    """
+    Batch counterpart of run_volatility_forecast: one vectorized GARCH(1,1)
+    fit over two years of closes for every ticker (one bulk price read).
+    Returns {ticker: result}, each result carrying the same 'Hold' vote
+    and summary wording as the single-ticker version, without the chart.
+    """
+    prices = fetch_price_matrix(tickers, period="2y")
+    forecasts = forecast_volatility(prices)
+
+    results = {}
+    for ticker in [t.upper() for t in tickers]:
+        if ticker not in forecasts.index:
+            results[ticker] = {"error": f"No data found for ticker {ticker}"}
+            continue
+        row = forecasts.loc[ticker]
+        summary = (
+            f"The GARCH(1,1) model forecasts an annualized volatility of {row['forecast_volatility']:.2%} "
+            f"for the next trading day. This compares to the 2-year average "
+            f"historical volatility of {row['historical_volatility']:.2%}. "
+            f"This model is for risk assessment, not price direction."
+        )
+        results[ticker] = {
+            'recommendation': 'Hold', # Volatility models are non-directional
+            'summary': summary,
+            'chart_data': None,
+            'forecast_volatility': float(row['forecast_volatility']),
+            'historical_volatility': float(row['historical_volatility']),
+            'converged': bool(row['converged'])
+        }
+    return results
@@ -1,43 +1,400 @@
-import yfinance as yf
+import os
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from core import price_store
 from core.utils import fetch_stock_data
+from core.info_cache import get_ticker_info
 
-def run_market_making(ticker):
+# Avellaneda-Stoikov market making, simulated against a stream of market
+# orders. At time t (as a fraction of the session, T = 1) with inventory q
+# the market maker quotes around the reservation price
+#     r = s - q * gamma * sigma^2 * (T - t)
+# with a total spread of
+#     gamma * sigma^2 * (T - t) + (2 / gamma) * ln(1 + gamma / kappa)
+# A market buy fills the ask if it trades at or through it, a market sell
+# the bid likewise; every fill is one lot.
+#
+# Prices are rescaled so the stream starts at REFERENCE_PRICE (as in the
+# original paper, s = 100), which keeps gamma and kappa comparable across
+# tickers; P&L is in the same units, i.e. per lot of REFERENCE_PRICE.
+#
+# Order flow is replayed from <ORDER_FLOW_DIR>/<TICKER>.parquet or .csv
+# when present (columns 'timestamp', 'price', 'side' as buy/sell or +1/-1,
+# and optionally 'mid'); otherwise SYNTHETIC_PATHS sessions are simulated
+# with the ticker's daily volatility.
+
+ORDER_FLOW_DIR = os.environ.get(
+    'FIAI_ORDER_FLOW',
+    os.path.join(os.path.dirname(price_store.PRICE_STORE_DIR), 'order_flow')
+)
+
+REFERENCE_PRICE = 100.0
+
+DEFAULT_GAMMA = 0.1
+DEFAULT_KAPPA = 1.5
+# Quotes on a side are pulled once inventory reaches this many lots
+MAX_INVENTORY = 50
+
+# Synthetic flow: market orders arrive as a Poisson process and reach a
+# depth beyond the mid that is exponential with rate FLOW_KAPPA, so a
+# quote at distance d is hit with probability exp(-FLOW_KAPPA * d)
+SYNTHETIC_PATHS = 10
+SYNTHETIC_EVENTS = 100_000
+FLOW_KAPPA = 1.5
+# Every ticker shares the same unit-volatility sessions, scaled to its sigma
+SYNTHETIC_SEED = 0
+
+GAMMA_GRID = (0.01, 0.05, 0.1, 0.5, 1.0)
+KAPPA_GRID = (0.5, 1.0, 1.5, 3.0, 6.0)
+SWEEP_WORKERS = max(1, min(os.cpu_count() or 1, 8))
+MAX_SWEEP_POINTS = 100
+
+CHART_POINTS = 500
+SESSION_OPEN = pd.Timedelta(hours=9, minutes=30)
+SESSION_LENGTH = pd.Timedelta(hours=6, minutes=30)
+
+# Order flow already built in this process, keyed by its source and
+# evicted least recently used first. The synthetic entry holds the
+# unit-volatility sessions (about 25 MB for SYNTHETIC_PATHS sessions) that
+# every ticker's simulation scales to its own sigma, so it is one entry
+# however many tickers are run; the others are replayed files.
+FLOW_CACHE_SIZE = 4
+_FLOWS = OrderedDict()
+_FLOWS_LOCK = threading.Lock()
+
+
+# --- Order flow ---
+
+def _unit_order_flow(n_events, paths, flow_kappa, seed):
     """
-    (Conceptual Placeholder)
-    Fetches the current Bid-Ask spread, which is the source of
-    profit for a market maker.
+    Synthetic sessions with a unit-volatility mid: {'t', 'walk', 'side',
+    'depth'} arrays, where the mid is REFERENCE_PRICE + sigma * walk and
+    each order trades 'depth' beyond it.
+    """
+    rng = np.random.default_rng(seed)
+    sessions = []
+    for _ in range(paths):
+        gaps = rng.exponential(size=n_events)
+        t = np.cumsum(gaps) / (gaps.sum() + rng.exponential())
+        dt = np.diff(t, prepend=0.0)
+        walk = np.cumsum(np.sqrt(dt) * rng.standard_normal(n_events))
+        side = np.where(rng.random(n_events) < 0.5, 1, -1).astype(np.int8)
+        depth = rng.exponential(1.0 / flow_kappa, n_events)
+        sessions.append({'t': t, 'walk': walk, 'side': side, 'depth': depth})
+    return sessions
+
+
+def _scaled_flow(session, sigma):
+    mid = REFERENCE_PRICE + sigma * session['walk']
+    return {'t': session['t'], 'mid': mid, 'price': mid + session['side'] * session['depth'],
+            'side': session['side']}
+
+
+def synthetic_order_flow(sigma, n_events=SYNTHETIC_EVENTS, paths=SYNTHETIC_PATHS, flow_kappa=FLOW_KAPPA, seed=0):
+    """
+    'paths' simulated sessions of 'n_events' market orders each, as a list
+    of {'t', 'mid', 'price', 'side'} arrays. The mid is a driftless
+    Brownian motion with volatility 'sigma' per session.
+    """
+    return [_scaled_flow(session, sigma) for session in _unit_order_flow(n_events, paths, flow_kappa, seed)]
+
+
+def _order_flow_file(ticker):
+    for extension in ('.parquet', '.csv'):
+        path = os.path.join(ORDER_FLOW_DIR, ticker.upper().replace('/', '_') + extension)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def load_order_flow(path):
+    """
+    A recorded stream of market orders as a one-session flow (see
+    synthetic_order_flow) plus its timestamps, rescaled to REFERENCE_PRICE.
+    Without a 'mid' column, the previous trade price stands in for it.
+    """
+    frame = pd.read_parquet(path) if path.endswith('.parquet') else pd.read_csv(path)
+    frame['timestamp'] = pd.to_datetime(frame['timestamp'], utc=True)
+    frame = frame.sort_values('timestamp', kind='stable').reset_index(drop=True)
+
+    side = frame['side']
+    if not pd.api.types.is_numeric_dtype(side):
+        side = side.astype(str).str.lower().map({'buy': 1, 'b': 1, 'sell': -1, 's': -1})
+    side = np.sign(side.to_numpy(dtype=float)).astype(np.int8)
+
+    price = frame['price'].to_numpy(dtype=float)
+    if 'mid' in frame:
+        mid = frame['mid'].to_numpy(dtype=float)
+    else:
+        mid = np.r_[price[0], price[:-1]]
+
+    seconds = (frame['timestamp'] - frame['timestamp'].iloc[0]) / pd.Timedelta(seconds=1)
+    t = (seconds / max(seconds.iloc[-1], 1.0)).to_numpy()
+
+    scale = REFERENCE_PRICE / mid[0]
+    flow = {'t': t, 'mid': mid * scale, 'price': price * scale, 'side': side}
+    return flow, pd.DatetimeIndex(frame['timestamp'])
+
+
+def realized_sigma(flow):
+    """Volatility of the mid over the session (T = 1)."""
+    return float(np.sqrt(np.sum(np.diff(flow['mid']) ** 2) / max(flow['t'][-1], 1e-9)))
+
+
+def estimate_flow_kappa(flow):
+    """Rate of the exponential depth of market orders beyond the mid (its MLE)."""
+    depth = np.mean(np.clip(flow['side'] * (flow['price'] - flow['mid']), 0.0, None))
+    return float(1.0 / depth) if depth > 0 else DEFAULT_KAPPA
+
+
+def _cached(source, build):
+    with _FLOWS_LOCK:
+        if source in _FLOWS:
+            _FLOWS.move_to_end(source)
+            return _FLOWS[source]
+    value = build()
+    with _FLOWS_LOCK:
+        _FLOWS[source] = value
+        while len(_FLOWS) > FLOW_CACHE_SIZE:
+            _FLOWS.popitem(last=False)
+    return value
+
+
+def _replay(source):
+    """(flow, timestamps) of a ('replay', path, mtime, size) source."""
+    return _cached(source, lambda: load_order_flow(source[1]))
+
+
+def _flows_for(source, sigma):
+    """
+    The order flow for a source spec, built once per process:
+    ('replay', path, mtime, size), whose recorded mid ignores 'sigma', or
+    ('synthetic', seed), scaled to 'sigma'.
+    """
+    if source[0] == 'replay':
+        return [_replay(source)[0]]
+    sessions = _cached(source, lambda: _unit_order_flow(SYNTHETIC_EVENTS, SYNTHETIC_PATHS, FLOW_KAPPA, source[1]))
+    return [_scaled_flow(session, sigma) for session in sessions]
+
+
+# --- Simulation ---
+
+def quote_schedule(flow, gamma, kappa, sigma):
+    """
+    Per event: the reservation-price shift per lot of inventory and the
+    half spread of the Avellaneda-Stoikov quotes.
+    """
+    remaining = np.clip(1.0 - flow['t'], 0.0, None)
+    risk = gamma * sigma ** 2 * remaining
+    half_spread = (risk + (2.0 / gamma) * np.log1p(gamma / kappa)) / 2.0
+    return risk, half_spread
+
+
+def simulate(flow, gamma, kappa, sigma, max_inventory=MAX_INVENTORY, skew_inventory=True):
+    """
+    Runs one session of quoting against 'flow'. With skew_inventory=False
+    the same spread is quoted around the mid (the symmetric benchmark).
+    Returns the per-event fills (+1 bought, -1 sold), inventory and
+    marked-to-market P&L.
+
+    A buy order at 'price' hits the ask when q * skew >= mid + half - price,
+    a sell order hits the bid when q * skew <= mid - half - price, so the
+    thresholds are computed for all events at once and only events that can
+    fill at some reachable inventory are visited by the sequential loop.
+    """
+    skew, half_spread = quote_schedule(flow, gamma, kappa, sigma)
+    if not skew_inventory:
+        skew = np.zeros_like(skew)
+    side, mid = flow['side'], flow['mid']
+    need = mid + side * half_spread - flow['price']
+
+    reach = max_inventory * skew
+    candidates = np.flatnonzero(np.where(side > 0, reach >= need, -reach <= need))
+
+    q = 0
+    filled, signs = [], []
+    for i, buy, threshold, k in zip(candidates.tolist(), (side[candidates] > 0).tolist(),
+                                    need[candidates].tolist(), skew[candidates].tolist()):
+        if buy:
+            if q > -max_inventory and q * k >= threshold:
+                q -= 1
+                filled.append(i)
+                signs.append(-1)
+        elif q < max_inventory and q * k <= threshold:
+            q += 1
+            filled.append(i)
+            signs.append(1)
+
+    fills = np.zeros(len(side), dtype=np.int8)
+    fills[filled] = signs
+    inventory = np.cumsum(fills, dtype=np.int64)
+
+    # Fill prices: the quote on the side that traded, at the inventory before the fill
+    before = inventory - fills
+    fill_price = mid - before * skew - fills * half_spread
+    cash = -np.cumsum(fills * fill_price)
+    return {
+        'fills': fills,
+        'inventory': inventory,
+        'pnl': cash + inventory * mid,
+    }
+
+
+def summarize(runs):
+    """P&L and inventory statistics over simulated sessions."""
+    final_pnl = np.array([run['pnl'][-1] for run in runs])
+    return {
+        'mean_pnl': float(final_pnl.mean()),
+        'std_pnl': float(final_pnl.std(ddof=1)) if len(runs) > 1 else 0.0,
+        'mean_fills': float(np.mean([np.count_nonzero(run['fills']) for run in runs])),
+        'mean_abs_final_inventory': float(np.mean([abs(run['inventory'][-1]) for run in runs])),
+        'max_abs_inventory': int(max(np.abs(run['inventory']).max() for run in runs)),
+        'mean_abs_inventory': float(np.mean([np.abs(run['inventory']).mean() for run in runs])),
+    }
+
+
+def _sweep_point(source, sigma, gamma, kappa):
+    runs = [simulate(flow, gamma, kappa, sigma) for flow in _flows_for(source, sigma)]
+    return dict(summarize(runs), gamma=gamma, kappa=kappa)
+
+
+def _market(ticker, data):
+    """
+    (source spec, sigma, session timestamps or None) for the ticker's
+    order flow; 'data' is its daily history, used to calibrate sigma.
+    """
+    path = _order_flow_file(ticker)
+    if path:
+        # Keyed on the file's mtime and size, so it is only re-read once it changes
+        stat = os.stat(path)
+        source = ('replay', path, stat.st_mtime_ns, stat.st_size)
+        flow, timestamps = _replay(source)
+        return source, realized_sigma(flow), timestamps
+
+    daily_vol = data['Close'].pct_change().std()
+    if not np.isfinite(daily_vol):
+        raise Exception(f"Not enough price history for {ticker} to calibrate the simulation.")
+    sigma = float(REFERENCE_PRICE * daily_vol)
+    return ('synthetic', SYNTHETIC_SEED), sigma, None
+
+
+def sweep_parameters(ticker, gammas=GAMMA_GRID, kappas=KAPPA_GRID, workers=SWEEP_WORKERS):
+    """
+    Simulates every (gamma, kappa) pair on the ticker's order flow, spread
+    over 'workers' processes (each builds the flow once). Returns
+    {'sigma', 'source', 'results': [statistics per pair]}.
+    """
+    grid = [(float(gamma), float(kappa)) for gamma in gammas for kappa in kappas]
+    if not grid or len(grid) > MAX_SWEEP_POINTS:
+        raise ValueError(f"The sweep needs between 1 and {MAX_SWEEP_POINTS} (gamma, kappa) pairs")
+    if min(min(pair) for pair in grid) <= 0:
+        raise ValueError("gamma and kappa must be positive")
+
+    source, sigma, _ = _market(ticker, fetch_stock_data(ticker, period="1y"))
+    tasks = [(source, sigma, gamma, kappa) for gamma, kappa in grid]
+
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks)),
+                                 mp_context=multiprocessing.get_context('spawn')) as pool:
+            results = list(pool.map(_sweep_point, *zip(*tasks)))
+    else:
+        results = [_sweep_point(*task) for task in tasks]
+
+    return {'sigma': sigma, 'source': source[0], 'results': results}
+
+
+def _spread_note(stats, flows):
+    return f" (std {stats['std_pnl']:.2f})" if len(flows) > 1 else ""
+
+
+def _session_labels(data, timestamps, t, indices):
+    """Chart labels: the recorded timestamps, or the last session's hours."""
+    if timestamps is not None:
+        labels = timestamps[indices]
+    else:
+        day = data.index[-1].tz_localize(None).normalize()
+        labels = day + SESSION_OPEN + pd.to_timedelta(t[indices] * SESSION_LENGTH.total_seconds(), unit='s')
+    return labels.strftime('%Y-%m-%dT%H:%M:%S').tolist()
+
+
+def run_market_making(ticker, gamma=DEFAULT_GAMMA, kappa=None):
+    """
+    (Full Implementation)
+    Simulates Avellaneda-Stoikov quoting on the ticker's order flow and
+    compares it with quoting the same spread symmetrically around the mid.
+    Without a 'kappa', replayed flow uses the one estimated from it.
+    Market making is non-directional, so the vote is always 'Hold'.
     """
     try:
-        # This strategy is non-directional and profits from the spread.
-        stock = yf.Ticker(ticker)
-        info = stock.info
-        
-        bid = info.get('bid')
-        ask = info.get('ask')
+        data = fetch_stock_data(ticker, period="1y")
+        source, sigma, timestamps = _market(ticker, data)
+        flows = _flows_for(source, sigma)
+        if kappa is None:
+            kappa = estimate_flow_kappa(flows[0]) if source[0] == 'replay' else DEFAULT_KAPPA
 
-        # Fetch data just to satisfy the Council
-        fetch_stock_data(ticker, period="1y")
+        skewed = [simulate(flow, gamma, kappa, sigma) for flow in flows]
+        symmetric = [simulate(flow, gamma, kappa, sigma, skew_inventory=False) for flow in flows]
+        stats, benchmark = summarize(skewed), summarize(symmetric)
 
-        rec = 'Hold'
+        events = sum(len(flow['t']) for flow in flows)
+        origin = "replayed order flow" if source[0] == 'replay' else f"{len(flows)} simulated sessions"
         summary = (
             "This strategy is non-directional, so the vote is 'Hold'. "
-            "A market maker profits from the Bid-Ask spread. "
+            f"Avellaneda-Stoikov quoting (gamma={gamma:g}, kappa={kappa:.3g}, sigma={sigma:.2f} per $100) "
+            f"over {events:,} market orders from {origin}: "
+            f"mean P&L {stats['mean_pnl']:.2f}{_spread_note(stats, flows)} per $100 lot with "
+            f"{stats['mean_fills']:.0f} fills and a mean absolute inventory of {stats['mean_abs_inventory']:.1f} lots. "
+            f"Quoting the same spread around the mid instead: mean P&L {benchmark['mean_pnl']:.2f}"
+            f"{_spread_note(benchmark, flows)}, mean absolute inventory {benchmark['mean_abs_inventory']:.1f} lots."
         )
 
+        info = get_ticker_info(ticker, fields=('bid', 'ask'))
+        bid, ask = info.get('bid'), info.get('ask')
         if bid and ask and ask > bid:
-            spread_dollars = ask - bid
-            spread_pct = (spread_dollars / ask) * 100
-            summary += f"The current spread for {ticker} is ${spread_dollars:.2f} "
-            summary += f"({spread_pct:.3f}%) (Bid: ${bid}, Ask: ${ask}). "
-            summary += "A full simulation would require Level 2 order book data, which is not available."
-        else:
-            summary += "Bid/Ask data is not available for this ticker."
+            summary += f" The current quoted spread for {ticker} is ${ask - bid:.2f} (Bid: ${bid}, Ask: ${ask})."
+
+        # First session, evenly thinned for the chart
+        flow, run = flows[0], skewed[0]
+        indices = np.unique(np.linspace(0, len(flow['t']) - 1, CHART_POINTS).astype(int))
+        chart_data = {
+            'labels': _session_labels(data, timestamps, flow['t'], indices),
+            'inventory': run['inventory'][indices].tolist(),
+            'pnl': run['pnl'][indices].tolist(),
+            'symmetric_inventory': symmetric[0]['inventory'][indices].tolist()
+        }
 
         return {
-            'recommendation': rec,
+            'recommendation': 'Hold',
+            'summary': summary,
+            'chart_data': chart_data,
+            'statistics': {'avellaneda_stoikov': stats, 'symmetric': benchmark, 'sigma': sigma}
+        }
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def run_market_making_vote(ticker):
+    """
+    The council's market-making vote. Market making is non-directional,
+    so the vote is always 'Hold' and the simulation (about a million order
+    events per ticker) is left to run_market_making; only the current
+    quoted spread is reported.
+    """
+    try:
+        summary = ("This strategy is non-directional, so the vote is 'Hold'. "
+                   "Run the Market Making Simulation for its Avellaneda-Stoikov P&L and inventory.")
+        info = get_ticker_info(ticker, fields=('bid', 'ask'))
+        bid, ask = info.get('bid'), info.get('ask')
+        if bid and ask and ask > bid:
+            summary += f" The current quoted spread for {ticker} is ${ask - bid:.2f} (Bid: ${bid}, Ask: ${ask})."
+        return {
+            'recommendation': 'Hold',
             'summary': summary,
-            'chart_data': None,
-            'is_placeholder': True
+            'chart_data': None
         }
     except Exception as e:
         return {"error": str(e)}
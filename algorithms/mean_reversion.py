@@ -1,19 +1,26 @@
 import pandas as pd
+import numpy as np
 from core.utils import fetch_stock_data
+from core.indicators import bollinger_bands, last_valid
+from core.streaming import BollingerState, sync_state
 
 def run_mean_reversion(ticker, window=20, num_std_dev=2):
     """
     Runs a mean reversion strategy using Bollinger Bands.
+    A thin single-ticker view over core.indicators.bollinger_bands.
     """
     try:
         data = fetch_stock_data(ticker, period="1y")
         
-        df = pd.DataFrame(data['Close'])
-        df['SMA'] = df['Close'].rolling(window=window).mean()
-        df['StdDev'] = df['Close'].rolling(window=window).std()
+        close = data['Close']
+        bands = bollinger_bands(close.to_numpy(), window, num_std_dev)
         
-        df['Upper_Band'] = df['SMA'] + (df['StdDev'] * num_std_dev)
-        df['Lower_Band'] = df['SMA'] - (df['StdDev'] * num_std_dev)
+        df = pd.DataFrame({
+            'Close': close.to_numpy(),
+            'SMA': bands['sma'],
+            'Upper_Band': bands['upper_band'],
+            'Lower_Band': bands['lower_band']
+        }, index=close.index)
         
         df.dropna(inplace=True)
         
@@ -47,3 +54,62 @@ def run_mean_reversion(ticker, window=20, num_std_dev=2):
         
     except Exception as e:
         return {"error": str(e)}
+
+def run_mean_reversion_live(ticker, window=20, num_std_dev=2):
+    """
+    Same signal as run_mean_reversion, from a per-ticker streaming
+    Bollinger state (core.streaming) that only consumes bars it has not
+    seen yet. Returns no chart; meant for councils and live dashboards.
+    """
+    try:
+        data = fetch_stock_data(ticker, period="1y")
+        
+        key = ('mean_reversion', ticker.upper(), window, num_std_dev)
+        state = sync_state(key, data['Close'], lambda: BollingerState(window, num_std_dev))
+        
+        if not state.ready:
+            return {"error": f"Not enough data for {window}-day Bollinger Bands."}
+        
+        price, upper, lower = state.last_value, state.upper_band, state.lower_band
+        
+        if price < lower:
+            rec = 'Buy'
+            summary = f"Price ({price:.2f}) is below the lower Bollinger Band ({lower:.2f}). Asset is oversold."
+        elif price > upper:
+            rec = 'Sell'
+            summary = f"Price ({price:.2f}) is above the upper Bollinger Band ({upper:.2f}). Asset is overbought."
+        else:
+            rec = 'Hold'
+            summary = f"Price ({price:.2f}) is within the bands. No signal."
+        
+        return {
+            'recommendation': rec,
+            'summary': summary,
+            'chart_data': None,
+            'as_of': str(state.last_timestamp)
+        }
+        
+    except Exception as e:
+        return {"error": str(e)}
+
+def screen_mean_reversion(prices, window=20, num_std_dev=2):
+    """
+    Runs the Bollinger Band check over a whole universe at once.
+    'prices' is a (dates x tickers) DataFrame of closes. Returns one row per
+    ticker with the latest price and bands and the same Buy/Sell/Hold
+    recommendation as run_mean_reversion.
+    """
+    bands = bollinger_bands(prices.to_numpy(), window, num_std_dev)
+    
+    screen = pd.DataFrame({
+        'price': last_valid(prices.to_numpy()),
+        'upper_band': last_valid(bands['upper_band']),
+        'lower_band': last_valid(bands['lower_band'])
+    }, index=prices.columns)
+    
+    screen['recommendation'] = np.select(
+        [screen['price'] < screen['lower_band'], screen['price'] > screen['upper_band']],
+        ['Buy', 'Sell'],
+        default='Hold'
+    )
+    return screen.dropna()
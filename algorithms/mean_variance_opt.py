@@ -1,6 +1,248 @@
+import time
+import threading
+import numpy as np
 import pandas as pd
-from core.utils import fetch_stock_data
-from pypfopt import EfficientFrontier, risk_models, expected_returns
+import cvxpy as cp
+from core.utils import fetch_price_matrix, BASE_PORTFOLIO
+from core.covariance import GramCovariance, COVARIANCE_METHODS, daily_returns, mean_historical_return
+from pypfopt import EfficientFrontier
+
+# Covariance estimator used for the council vote ('sample' or 'ledoit_wolf')
+MVO_COVARIANCE = 'sample'
+
+# Number of portfolios returned by efficient_frontier by default
+FRONTIER_POINTS = 20
+
+# Objectives accepted by optimize_portfolio
+OBJECTIVES = ['max_sharpe', 'min_variance', 'target_vol']
+
+# optimize_portfolio's solver: an interior-point conic solver converges on
+# max_sharpe for hundreds of assets, where OSQP (pypfopt's default for
+# quadratic programs) stops at its iteration limit
+OPTIMIZE_SOLVER = cp.CLARABEL
+
+# Weights below this are reported as zero (as pypfopt's clean_weights)
+WEIGHT_CUTOFF = 1e-4
+
+# A ticker needs prices on at least this share of the dates to be kept in a
+# multi-asset optimization; otherwise one recent listing would cut the
+# history of the whole universe down to its own
+MIN_HISTORY_COVERAGE = 0.9
+
+# The base portfolio's prices, returns and Gram matrices, rebuilt only when
+# a new bar arrives: {'prices', 'returns', 'gram', 'mu'}
+_BASE_CACHE = {}
+_BASE_LOCK = threading.Lock()
+
+
+def _base_statistics():
+    """The cached statistics of BASE_PORTFOLIO, refreshed if its data has moved on."""
+    prices = fetch_price_matrix(BASE_PORTFOLIO, period="3y").dropna()
+    with _BASE_LOCK:
+        cached = _BASE_CACHE.get('stats')
+        if cached is None or not cached['prices'].index.equals(prices.index):
+            returns = daily_returns(prices)
+            cached = _BASE_CACHE['stats'] = {
+                'prices': prices,
+                'returns': returns,
+                'gram': GramCovariance(returns),
+                'mu': mean_historical_return(prices)
+            }
+        return cached
+
+
+def portfolio_inputs(ticker, covariance=MVO_COVARIANCE):
+    """
+    Expected returns and annualized covariance for BASE_PORTFOLIO plus
+    'ticker'. When the ticker has prices on every base date, its row and
+    column are added to the cached base covariance (a border update);
+    otherwise everything is recomputed on the dates all assets share.
+    Returns (mu, cov, mode) with mode 'cached', 'bordered' or 'full'.
+    """
+    base = _base_statistics()
+    if ticker.upper() in BASE_PORTFOLIO:
+        return base['mu'], base['gram'].covariance(covariance), 'cached'
+
+    series = fetch_price_matrix([ticker], period="3y")[ticker.upper()].rename(ticker)
+    aligned = series.reindex(base['prices'].index)
+    if aligned.notna().all():
+        returns = daily_returns(aligned.to_frame())[ticker]
+        gram = base['gram'].bordered(returns)
+        mu = pd.concat([base['mu'], mean_historical_return(aligned.to_frame())])
+        return mu[gram.columns], gram.covariance(covariance), 'bordered'
+
+    df = pd.concat([series, base['prices']], axis=1).dropna()
+    gram = GramCovariance(daily_returns(df))
+    return mean_historical_return(df)[gram.columns], gram.covariance(covariance), 'full'
+
+
+def _price_panel(tickers, period="3y"):
+    """
+    One bulk read of closes for 'tickers', restricted to the tickers with
+    at least MIN_HISTORY_COVERAGE of the dates and then to the dates they
+    all share. Returns (prices, dropped tickers).
+    """
+    tickers = list(dict.fromkeys(t.upper() for t in tickers))
+    prices = fetch_price_matrix(tickers, period=period)
+
+    coverage = prices.notna().mean()
+    kept = coverage[coverage >= MIN_HISTORY_COVERAGE].index
+    dropped = [t for t in tickers if t not in kept]
+    prices = prices[kept].dropna()
+
+    if len(prices) < 2 or prices.shape[1] < 2:
+        raise ValueError("At least two tickers with overlapping history are required.")
+    return prices, dropped
+
+
+def efficient_frontier(tickers, points=FRONTIER_POINTS, covariance='ledoit_wolf', risk_free_rate=0.0):
+    """
+    Traces the long-only efficient frontier for 'tickers' from the minimum
+    variance portfolio up to the highest-return one.
+    A single EfficientFrontier is re-solved for each target return: the
+    target is a cvxpy Parameter, so the problem is compiled once and each
+    solve is warm-started from the previous one.
+    Returns the frontier points (return, volatility, Sharpe, weights) plus
+    the max-Sharpe portfolio.
+    """
+    started = time.perf_counter()
+    prices, _ = _price_panel(tickers)
+    gram = GramCovariance(daily_returns(prices))
+    mu = mean_historical_return(prices)[gram.columns]
+    cov = gram.covariance(covariance)
+
+    low = EfficientFrontier(mu, cov)
+    low.min_volatility()
+    min_return = low.portfolio_performance()[0]
+    max_return = mu.max()
+
+    frontier = []
+    ef = EfficientFrontier(mu, cov, solver_options={'warm_start': True})
+    for target in np.linspace(min_return, max_return, points):
+        # The very top of the frontier is only reachable up to solver tolerance
+        weights = ef.efficient_return(float(min(target, max_return - 1e-6)))
+        ret, vol, sharpe = ef.portfolio_performance(risk_free_rate=risk_free_rate)
+        frontier.append({
+            'return': ret,
+            'volatility': vol,
+            'sharpe': sharpe,
+            'weights': {k: v for k, v in weights.items() if v > 0.001}
+        })
+
+    best = EfficientFrontier(mu, cov)
+    weights = best.max_sharpe(risk_free_rate=risk_free_rate)
+    ret, vol, sharpe = best.portfolio_performance(risk_free_rate=risk_free_rate)
+
+    return {
+        'frontier': frontier,
+        'max_sharpe': {
+            'return': ret,
+            'volatility': vol,
+            'sharpe': sharpe,
+            'weights': {k: v for k, v in weights.items() if v > 0.001}
+        },
+        'tickers': list(gram.columns),
+        'covariance': covariance,
+        'solve_seconds': time.perf_counter() - started
+    }
+
+
+def _solve_weights(mu, exposures, idiosyncratic, objective, weight_bounds,
+                   target_volatility=None, risk_free_rate=0.0):
+    """
+    Optimal weights for 'objective' with the covariance given in factor
+    form (B, d): the variance of w is |B'w|^2 + sum(d w^2), which keeps
+    the problem small for hundreds of assets.
+    max_sharpe uses the usual change of variables: with y = k w and
+    (mu - rf)'y = 1, the variance of y is minimized and w = y / k.
+    """
+    lower, upper = weight_bounds
+    n = len(mu)
+    w = cp.Variable(n)
+
+    def variance(x):
+        expr = cp.sum_squares(exposures.T @ x)
+        if idiosyncratic.any():
+            expr = expr + cp.sum(cp.multiply(idiosyncratic, cp.square(x)))
+        return expr
+
+    if objective == 'max_sharpe':
+        excess = mu - risk_free_rate
+        if not (excess > 0).any():
+            raise ValueError("at least one of the assets must have an expected return exceeding the risk-free rate")
+        k = cp.Variable(nonneg=True)
+        problem = cp.Problem(cp.Minimize(variance(w)),
+                             [excess @ w == 1, cp.sum(w) == k, w >= lower * k, w <= upper * k])
+    elif objective == 'min_variance':
+        problem = cp.Problem(cp.Minimize(variance(w)),
+                             [cp.sum(w) == 1, w >= lower, w <= upper])
+    else:
+        problem = cp.Problem(cp.Maximize(mu @ w),
+                             [variance(w) <= target_volatility ** 2, cp.sum(w) == 1, w >= lower, w <= upper])
+
+    problem.solve(solver=OPTIMIZE_SOLVER)
+    if problem.status not in (cp.OPTIMAL, cp.OPTIMAL_INACCURATE):
+        raise Exception(f"Portfolio optimization failed (solver status: {problem.status})")
+
+    weights = w.value / k.value if objective == 'max_sharpe' else w.value
+    weights = np.where(np.abs(weights) < WEIGHT_CUTOFF, 0.0, weights)
+    return np.round(weights, 5)
+
+
+def optimize_portfolio(tickers, objective='max_sharpe', covariance='ledoit_wolf',
+                       target_volatility=None, weight_bounds=(0, 1), risk_free_rate=0.0):
+    """
+    Long-only (by default) portfolio over an arbitrary list of tickers.
+    'objective' is 'max_sharpe', 'min_variance' or 'target_vol' (which
+    maximizes return at 'target_volatility'). 'covariance' is 'sample',
+    'ledoit_wolf' or 'factor'. Each is passed to the solver in factor
+    form (see GramCovariance.factor_form) rather than as a k x k matrix.
+    'weight_bounds' is (min, max) weight per asset.
+    Returns the weights, expected performance and how long each stage took.
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective: {objective}")
+    if objective == 'target_vol' and not target_volatility:
+        raise ValueError("target_vol requires a target_volatility")
+
+    started = time.perf_counter()
+    prices, dropped = _price_panel(tickers)
+    loaded = time.perf_counter()
+
+    if covariance not in COVARIANCE_METHODS:
+        raise ValueError(f"Unknown covariance method: {covariance}")
+    gram = GramCovariance(daily_returns(prices))
+    mu = mean_historical_return(prices)[gram.columns].to_numpy()
+    exposures, idiosyncratic = gram.factor_form(covariance)
+    estimated = time.perf_counter()
+
+    w = _solve_weights(mu, exposures, idiosyncratic, objective, tuple(weight_bounds),
+                       target_volatility=target_volatility and float(target_volatility),
+                       risk_free_rate=risk_free_rate)
+    weights = dict(zip(gram.columns, w))
+    ret = float(mu @ w)
+    vol = float(np.sqrt(np.sum((exposures.T @ w) ** 2) + idiosyncratic @ w ** 2))
+    sharpe = (ret - risk_free_rate) / vol
+    solved = time.perf_counter()
+
+    return {
+        'weights': {k: float(v) for k, v in weights.items() if v != 0},
+        'expected_return': ret,
+        'volatility': vol,
+        'sharpe': sharpe,
+        'objective': objective,
+        'covariance': covariance,
+        'tickers': list(gram.columns),
+        'dropped_tickers': dropped,
+        'observations': gram.n,
+        'timings': {
+            'load': loaded - started,
+            'covariance': estimated - loaded,
+            'solve': solved - estimated,
+            'total': solved - started
+        }
+    }
+
 
 def run_mean_variance_opt(ticker):
     """
@@ -8,29 +250,13 @@ def run_mean_variance_opt(ticker):
     Runs Markowitz Mean-Variance Optimization.
     Since this is a portfolio tool, we run the user's ticker
     against a standard "60/40-like" market portfolio.
+    The base portfolio's covariance is cached between calls and only the
+    user's ticker is added to it (see portfolio_inputs).
     """
     try:
-        # 1. Define the portfolio universe
-        # We test the ticker against a diversified set of assets.
-        base_portfolio = ['SPY', 'QQQ', 'TLT', 'GLD']
-        
-        # Add the user's ticker, ensuring no duplicates
-        if ticker.upper() in base_portfolio:
-            portfolio_tickers = base_portfolio
-        else:
-            portfolio_tickers = [ticker] + base_portfolio
-
-        # 2. Fetch data for all assets
-        all_data = {}
-        for t in portfolio_tickers:
-            all_data[t] = fetch_stock_data(t, period="3y")['Close']
-        
-        df = pd.DataFrame(all_data).dropna()
-
-        # 3. Run the Optimization
-        # Calculate expected returns and sample covariance
-        mu = expected_returns.mean_historical_return(df)
-        S = risk_models.sample_cov(df)
+        # 1-3. Expected returns and covariance for the ticker plus the
+        # diversified base portfolio
+        mu, S, _ = portfolio_inputs(ticker)
 
         # Optimize for max Sharpe Ratio
         ef = EfficientFrontier(mu, S)
@@ -1,50 +1,92 @@
+import time
+import hashlib
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
+from sklearn.ensemble import RandomForestClassifier, HistGradientBoostingClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score
-from core.utils import fetch_stock_data
+from core.utils import fetch_stock_data, fetch_price_matrix, DEFAULT_STOCKS
+from core.indicators import rolling_mean
+from core import model_registry
 
-def run_ml_predictive(ticker):
+MODEL_NAME = 'ml_predictive_rf'
+FEATURES = ['Lag_1', 'Lag_5', 'Rolling_Mean_10']
+
+# A stored model is retrained once it is older than this (seconds).
+# Retraining can also be forced per request (retrain=True).
+ML_RETRAIN_INTERVAL = 7 * 24 * 3600
+
+def build_features(close):
+    """
+    Builds the feature matrix and next-day direction target from a Series
+    of closing prices. Returns (df, latest_features): every row with a full
+    feature set, and the last of those rows (the one to predict from).
+    """
+    df = pd.DataFrame(close)
+    
+    # --- Feature Engineering ---
+    df['Return'] = df['Close'].pct_change()
+    df['Lag_1'] = df['Return'].shift(1)
+    df['Lag_5'] = df['Return'].shift(5)
+    df['Rolling_Mean_10'] = df['Close'].rolling(window=10).mean().shift(1)
+    
+    # Target variable: 1 if next day's price is up, 0 if down
+    df['Target'] = (df['Close'].shift(-1) > df['Close']).astype(int)
+    
+    df.dropna(inplace=True)
+    return df, df[FEATURES].iloc[[-1]]
+
+def train_ml_model(ticker, data=None):
+    """
+    Trains the Random Forest for a ticker on three years of data and stores
+    it in the model registry, keyed by its training-window end date.
+    Returns (model, metadata).
+    """
+    if data is None:
+        data = fetch_stock_data(ticker, period="3y")
+    df, _ = build_features(data['Close'])
+    
+    if df.empty:
+        raise Exception("Not enough data for ML model.")
+
+    # --- Model Training ---
+    X = df[FEATURES]
+    y = df['Target']
+    
+    # Split data (80% train, 20% test)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, shuffle=False)
+    
+    if X_train.empty or y_train.empty:
+        raise Exception("Not enough data for ML model training split.")
+
+    model = RandomForestClassifier(n_estimators=100, random_state=42)
+    model.fit(X_train, y_train)
+    
+    # Accuracy on the held-out test set, recorded for context
+    acc = accuracy_score(y_test, model.predict(X_test))
+    
+    meta = model_registry.save_model(MODEL_NAME, ticker, FEATURES, X_train.index[-1], model,
+                                     {'test_accuracy': acc})
+    return model, meta
+
+def run_ml_predictive(ticker, retrain=False):
     """
     (Placeholder Implementation)
     Uses a Random Forest to predict next-day price direction.
+    The model comes from the model registry; it is only (re)trained when
+    none is stored, when the stored one is older than ML_RETRAIN_INTERVAL,
+    or when 'retrain' is set.
     """
     try:
         data = fetch_stock_data(ticker, period="3y")
         
-        df = pd.DataFrame(data['Close'])
-        
-        # --- Feature Engineering ---
-        df['Return'] = df['Close'].pct_change()
-        df['Lag_1'] = df['Return'].shift(1)
-        df['Lag_5'] = df['Return'].shift(5)
-        df['Rolling_Mean_10'] = df['Close'].rolling(window=10).mean().shift(1)
-        
-        # Target variable: 1 if next day's price is up, 0 if down
-        df['Target'] = (df['Close'].shift(-1) > df['Close']).astype(int)
-        
-        df.dropna(inplace=True)
-        
-        if df.empty:
-            return {"error": "Not enough data for ML model."}
-
-        # --- Model Training ---
-        X = df[['Lag_1', 'Lag_5', 'Rolling_Mean_10']]
-        y = df['Target']
-        
-        # Split data (80% train, 20% test)
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, shuffle=False)
-        
-        if X_train.empty or y_train.empty:
-             return {"error": "Not enough data for ML model training split."}
-
-        model = RandomForestClassifier(n_estimators=100, random_state=42)
-        model.fit(X_train, y_train)
+        model, meta = model_registry.load_latest_model(MODEL_NAME, ticker, FEATURES)
+        if retrain or model is None or time.time() - meta['trained_at'] > ML_RETRAIN_INTERVAL:
+            model, meta = train_ml_model(ticker, data)
         
         # --- Prediction ---
         # Predict on the last available data point
-        latest_features = df[['Lag_1', 'Lag_5', 'Rolling_Mean_10']].iloc[[-1]]
+        _, latest_features = build_features(data['Close'])
         prediction = model.predict(latest_features)[0]
         
         if prediction == 1:
@@ -54,14 +96,11 @@ def run_ml_predictive(ticker):
             rec = 'Sell'
             summary = "Random Forest model predicts a DOWNWARD movement for the next trading day."
             
-        # Calculate accuracy for context (on test set)
-        y_pred_test = model.predict(X_test)
-        acc = accuracy_score(y_test, y_pred_test)
-        summary += f" Model accuracy on test data: {acc:.2%}. (Note: This is a simplified placeholder)."
+        summary += f" Model accuracy on test data: {meta['test_accuracy']:.2%}. (Note: This is a simplified placeholder)."
         
         # --- Format Chart Data (Feature Importance) ---
         chart_data = {
-            'labels': X.columns.tolist(),
+            'labels': FEATURES,
             'importance': model.feature_importances_.tolist()
         }
         
@@ -69,8 +108,142 @@ def run_ml_predictive(ticker):
             'recommendation': rec,
             'summary': summary,
             'chart_data': chart_data,
-            'chart_type': 'bar' # Tell the frontend to use a bar chart
+            'chart_type': 'bar', # Tell the frontend to use a bar chart
+            'model_train_end': meta['train_end']
         }
         
     except Exception as e:
         return {"error": str(e)}
+
+# --- Pooled (cross-ticker) mode ---
+# One model is trained on the stacked feature rows of a whole universe and
+# scores every ticker in a single predict call. Features must be comparable
+# across tickers, so the 10-day rolling mean is expressed relative to the
+# previous close instead of as a price level. That lets one shared model,
+# trained on the fixed POOLED_UNIVERSE, score any ticker; the registry key
+# is derived from the training universe (pooled_model_key), so changing
+# the universe trains a new model rather than reusing the old one.
+POOLED_MODEL_NAME = 'ml_predictive_pooled'
+POOLED_FEATURES = ['Lag_1', 'Lag_5', 'Rolling_Mean_10_Ratio']
+POOLED_UNIVERSE = DEFAULT_STOCKS
+
+def pooled_model_key(tickers=POOLED_UNIVERSE):
+    """Registry key of the pooled model for a universe: a hash of its sorted tickers."""
+    universe = ','.join(sorted({t.upper() for t in tickers}))
+    return 'POOLED_' + hashlib.sha1(universe.encode()).hexdigest()[:16]
+
+def _shift(array, periods):
+    shifted = np.full(array.shape, np.nan)
+    shifted[periods:] = array[:-periods]
+    return shifted
+
+def panel_features(close):
+    """
+    Vectorized feature pipeline over a (T, N) array of closes.
+    Returns (features, target): the POOLED_FEATURES as a (T, N, 3) array and
+    the next-day direction (T, N), NaN where it is not known yet.
+    """
+    returns = np.full(close.shape, np.nan)
+    returns[1:] = close[1:] / close[:-1] - 1
+    
+    features = np.stack([
+        _shift(returns, 1),
+        _shift(returns, 5),
+        _shift(rolling_mean(close, 10), 1) / _shift(close, 1) - 1
+    ], axis=-1)
+    
+    target = np.full(close.shape, np.nan)
+    target[:-1] = (close[1:] > close[:-1]).astype(float)
+    target[:-1][~np.isfinite(close[1:])] = np.nan
+    return features, target
+
+def build_feature_panel(prices):
+    """
+    Builds the pooled training set from a (dates x tickers) close-price
+    DataFrame. Returns (X, y, dates, latest): the stacked training rows
+    (with a known next-day target), their dates, and a DataFrame of the
+    most recent feature row per ticker.
+    """
+    close = prices.to_numpy(dtype=float)
+    features, target = panel_features(close)
+    
+    complete = np.isfinite(features).all(axis=-1)
+    trainable = complete & np.isfinite(target)
+    
+    rows, cols = np.nonzero(trainable)
+    X = features[rows, cols]
+    y = target[rows, cols].astype(int)
+    dates = prices.index[rows]
+    
+    # Latest complete feature row per ticker
+    latest_rows = np.where(complete.any(axis=0), len(close) - 1 - np.argmax(complete[::-1], axis=0), -1)
+    has_latest = latest_rows >= 0
+    latest = pd.DataFrame(features[latest_rows[has_latest], np.flatnonzero(has_latest)],
+                          index=prices.columns[has_latest], columns=POOLED_FEATURES)
+    return X, y, dates, latest
+
+def train_pooled_model(tickers=POOLED_UNIVERSE, prices=None):
+    """
+    Trains one multi-core HistGradientBoosting model on the pooled feature
+    rows of every ticker (default POOLED_UNIVERSE) and stores it in the
+    model registry.
+    The last 20% of dates are held out to measure test accuracy.
+    Returns (model, metadata).
+    """
+    if prices is None:
+        prices = fetch_price_matrix(tickers, period="3y")
+    X, y, dates, _ = build_feature_panel(prices)
+    
+    if len(X) == 0:
+        raise Exception("Not enough data for the pooled ML model.")
+    
+    cutoff = np.sort(dates.unique())[int(len(dates.unique()) * 0.8)]
+    train = dates < cutoff
+    
+    model = HistGradientBoostingClassifier(max_iter=200, random_state=42)
+    model.fit(X[train], y[train])
+    acc = accuracy_score(y[~train], model.predict(X[~train])) if (~train).any() else float('nan')
+    
+    meta = model_registry.save_model(POOLED_MODEL_NAME, pooled_model_key(tickers), POOLED_FEATURES,
+                                     dates[train].max(), model,
+                                     {'test_accuracy': acc, 'tickers': list(prices.columns),
+                                      'rows': int(len(X))})
+    return model, meta
+
+def run_ml_predictive_pooled(tickers, retrain=False):
+    """
+    Next-day direction for every ticker from the pooled model, scored in
+    one predict call. Every call shares the model trained on
+    POOLED_UNIVERSE; it is retrained once older than ML_RETRAIN_INTERVAL
+    or when 'retrain' is set.
+    Returns {ticker: result} with the same vote format as run_ml_predictive.
+    """
+    model, meta = model_registry.load_latest_model(POOLED_MODEL_NAME, pooled_model_key(), POOLED_FEATURES)
+    if retrain or model is None or time.time() - meta['trained_at'] > ML_RETRAIN_INTERVAL:
+        model, meta = train_pooled_model()
+    
+    prices = fetch_price_matrix(tickers, period="3y")
+    _, _, _, latest = build_feature_panel(prices)
+    results = {}
+    if not latest.empty:
+        up_probability = model.predict_proba(latest.to_numpy())[:, list(model.classes_).index(1)]
+        for ticker, probability in zip(latest.index, up_probability):
+            if probability >= 0.5:
+                rec = 'Buy'
+                summary = "Pooled gradient-boosting model predicts an UPWARD movement for the next trading day"
+            else:
+                rec = 'Sell'
+                summary = "Pooled gradient-boosting model predicts a DOWNWARD movement for the next trading day"
+            summary += f" (P(up) = {probability:.2%}). Model accuracy on test data: {meta['test_accuracy']:.2%}."
+            
+            results[ticker] = {
+                'recommendation': rec,
+                'summary': summary,
+                'chart_data': None,
+                'up_probability': float(probability),
+                'model_train_end': meta['train_end']
+            }
+    
+    for ticker in tickers:
+        results.setdefault(ticker.upper(), {"error": "Not enough data for the pooled ML model."})
+    return results
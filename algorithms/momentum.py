@@ -1,25 +1,33 @@
 import pandas as pd
 import numpy as np
 from core.utils import fetch_stock_data
+from core.indicators import sma_crossover, last_valid
+from core.streaming import CrossoverState, sync_state
 
 def run_momentum(ticker, short_window=50, long_window=200):
     """
     Runs a simple moving average (SMA) crossover strategy.
+    A thin single-ticker view over core.indicators.sma_crossover.
     """
     try:
         data = fetch_stock_data(ticker, period="3y")
         
-        df = pd.DataFrame(data['Close'])
-        df['SMA_Short'] = df['Close'].rolling(window=short_window).mean()
-        df['SMA_Long'] = df['Close'].rolling(window=long_window).mean()
+        close = data['Close']
+        crossover = sma_crossover(close.to_numpy(), short_window, long_window)
         
-        df.dropna(inplace=True)
+        # Keep only the rows where both SMAs exist
+        valid = np.isfinite(crossover['sma_long'])
+        if not valid.any():
+            return {"error": f"Not enough data for a {long_window}-day SMA."}
         
-        # --- Generate Signal ---
-        df['Signal'] = 0
-        df['Signal'][short_window:] = np.where(df['SMA_Short'][short_window:] > df['SMA_Long'][short_window:], 1, 0)
-        df['Position'] = df['Signal'].diff()
+        df = pd.DataFrame({
+            'Close': close.to_numpy()[valid],
+            'SMA_Short': crossover['sma_short'][valid],
+            'SMA_Long': crossover['sma_long'][valid],
+            'Position': crossover['position'][valid]
+        }, index=close.index[valid])
         
+        # --- Generate Signal ---
         latest = df.iloc[-1]
         
         if latest['SMA_Short'] > latest['SMA_Long']:
@@ -47,3 +55,55 @@ def run_momentum(ticker, short_window=50, long_window=200):
         
     except Exception as e:
         return {"error": str(e)}
+
+def run_momentum_live(ticker, short_window=50, long_window=200):
+    """
+    Same signal as run_momentum, from a per-ticker streaming crossover
+    state (core.streaming) that only consumes bars it has not seen yet.
+    Returns no chart; meant for councils and live dashboards.
+    """
+    try:
+        data = fetch_stock_data(ticker, period="3y")
+        
+        key = ('momentum', ticker.upper(), short_window, long_window)
+        state = sync_state(key, data['Close'], lambda: CrossoverState(short_window, long_window))
+        
+        if not state.ready:
+            return {"error": f"Not enough data for a {long_window}-day SMA."}
+        
+        sma_short, sma_long = state.short.mean, state.long.mean
+        
+        if sma_short > sma_long:
+            rec = 'Buy'
+            summary = f"50-day SMA ({sma_short:.2f}) is above 200-day SMA ({sma_long:.2f}). Bullish trend."
+        else:
+            rec = 'Sell'
+            summary = f"50-day SMA ({sma_short:.2f}) is below 200-day SMA ({sma_long:.2f}). Bearish trend."
+        
+        return {
+            'recommendation': rec,
+            'summary': summary,
+            'chart_data': None,
+            'as_of': str(state.last_timestamp),
+            'crossover': state.position
+        }
+        
+    except Exception as e:
+        return {"error": str(e)}
+
+def screen_momentum(prices, short_window=50, long_window=200):
+    """
+    Runs the SMA crossover over a whole universe at once.
+    'prices' is a (dates x tickers) DataFrame of closes, e.g. from
+    core.utils.fetch_price_matrix. Returns one row per ticker with the
+    latest SMAs and the same Buy/Sell recommendation as run_momentum.
+    """
+    crossover = sma_crossover(prices.to_numpy(), short_window, long_window)
+    
+    screen = pd.DataFrame({
+        'sma_short': last_valid(crossover['sma_short']),
+        'sma_long': last_valid(crossover['sma_long'])
+    }, index=prices.columns)
+    
+    screen['recommendation'] = np.where(screen['sma_short'] > screen['sma_long'], 'Buy', 'Sell')
+    return screen.dropna()
@@ -1,74 +1,347 @@
-from core.utils import fetch_stock_data
-import yfinance as yf
-import pandas as pd
+import argparse
+import threading
 import numpy as np
-# import numpy as np
-# from tensorflow.keras.models import load_model # Would be used in a real app
-def preprocess_for_rl(data, window_size=30):
-    if len(data['Close']) < window_size:
-        raise Exception(f"Not enough data for RL state. Need {window_size}, got {len(data['Close'])}.")
-    
-    # Just return the last N days of closing prices as a sample state
-    # A real state would be more complex (e.g., % changes, indicators)
-    # and normalized.
-    state = data['Close'].iloc[-window_size:].values
-    
-    # Reshape to match a potential model's expected input shape
-    # (batch_size, timesteps, features)
-    return state.reshape(1, window_size, 1)
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from core.utils import fetch_stock_data, fetch_price_matrix, DEFAULT_STOCKS
+from core import model_registry
+
+# Linear Q-learning trading agent.
+# State: the last WINDOW daily returns, each divided by the ticker's
+# trailing VOL_WINDOW-day volatility (clipped to +/-STATE_CLIP), plus the
+# position currently held and a constant.
+# Actions: Buy (hold +1 for the next day), Hold (stay flat) or Sell (-1).
+# Reward: position * next day's normalized return, minus TRADE_COST per
+# unit of position changed.
+# Q(s, a) = W[a] . s, learned offline by epsilon-greedy Q-learning over a
+# vectorized environment that steps every ticker of the universe at once;
+# the weights are stored in the model registry and loaded once per process.
+
+MODEL_NAME = 'rl_linear_q'
+MODEL_KEY = 'POOLED'
+
+WINDOW = 30
+VOL_WINDOW = 60
+STATE_CLIP = 5.0
+STATE_FEATURES = [f'Return_Lag_{lag}' for lag in range(WINDOW - 1, -1, -1)] + ['Position', 'Bias']
+
+ACTIONS = ['Buy', 'Hold', 'Sell']
+POSITIONS = np.array([1.0, 0.0, -1.0])
+
+# Training defaults (see train_policy)
+TRAIN_PERIOD = '10y'
+TRAIN_EPISODES = 30
+DISCOUNT = 0.9
+LEARNING_RATE = 0.01
+EPSILON_START = 1.0
+EPSILON_END = 0.05
+TRADE_COST = 0.1
+TEST_FRACTION = 0.2
+RANDOM_SEED = 42
+
+TRADING_DAYS = 252
+
+# (weights, metadata) of the policy this process serves
+_POLICY = None
+_POLICY_LOCK = threading.Lock()
+
+
+# --- State ---
+
+def normalized_returns(close):
+    """
+    Daily returns of a (T, N) close array divided by the trailing
+    VOL_WINDOW-day standard deviation known at the time, clipped to
+    +/-STATE_CLIP. Also returns the raw returns. NaN until both exist.
+    """
+    returns = np.full(close.shape, np.nan)
+    returns[1:] = close[1:] / close[:-1] - 1
+    vol = pd.DataFrame(returns).rolling(VOL_WINDOW).std().to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = np.clip(returns / vol, -STATE_CLIP, STATE_CLIP)
+    z[~(vol > 0)] = np.nan
+    return z, returns
+
+
+def state_windows(z):
+    """
+    (T, N, WINDOW) view of the return part of every state: row t holds
+    the WINDOW normalized returns up to and including day t (NaN rows
+    before WINDOW days exist).
+    """
+    windows = np.full(z.shape + (WINDOW,), np.nan)
+    windows[WINDOW - 1:] = sliding_window_view(z, WINDOW, axis=0)
+    return windows
+
+
+def build_states(windows, positions):
+    """Stacks return windows (N, WINDOW) and positions (N,) into states (N, F)."""
+    return np.concatenate([windows, positions[:, None], np.ones((len(positions), 1))], axis=1)
+
+
+class VectorTradingEnv:
+    """
+    Every ticker of a (T, N) normalized-return panel as one environment,
+    stepped in lockstep over days [start, end). A ticker without a full
+    state on a day sits that day out (and is flat afterwards).
+    """
+
+    def __init__(self, z, start=0, end=None):
+        self.windows = state_windows(z)
+        self.next_z = np.vstack([z[1:], np.full((1, z.shape[1]), np.nan)])
+        self.valid = np.isfinite(self.windows).all(axis=-1) & np.isfinite(self.next_z)
+        self.start = max(start, WINDOW - 1)
+        self.end = min(end or len(z), len(z) - 1)
+
+    @property
+    def size(self):
+        return self.windows.shape[1]
+
+    def reset(self):
+        self.t = self.start
+        self.positions = np.zeros(self.size)
+        return build_states(np.nan_to_num(self.windows[self.t]), self.positions), self.valid[self.t]
+
+    def step(self, actions):
+        """
+        Applies one action per ticker. Returns (rewards, next states,
+        next valid mask, done); rewards are 0 where the ticker sat out.
+        """
+        valid = self.valid[self.t]
+        new_positions = np.where(valid, POSITIONS[actions], 0.0)
+        rewards = np.where(valid, new_positions * np.nan_to_num(self.next_z[self.t])
+                           - TRADE_COST * np.abs(new_positions - self.positions), 0.0)
+
+        self.positions = new_positions
+        self.t += 1
+        done = self.t >= self.end
+        next_valid = self.valid[self.t] if not done else np.zeros(self.size, dtype=bool)
+        states = build_states(np.nan_to_num(self.windows[min(self.t, len(self.windows) - 1)]), self.positions)
+        return rewards, states, next_valid, done
+
+
+# --- Training ---
+
+def q_values(weights, states):
+    """Q-values (N, len(ACTIONS)) for a batch of states (N, F): one matrix product."""
+    return states @ weights.T
+
+
+def evaluate_policy(weights, z, returns, start, end):
+    """
+    Greedy rollout over days [start, end): the mean normalized reward per
+    active ticker-day and the annualized Sharpe ratio of the equal-weight
+    book in raw returns.
+    """
+    env = VectorTradingEnv(z, start, end)
+    states, valid = env.reset()
+    rewards_total, active_days, book = 0.0, 0, []
+    done = env.start >= env.end
+    while not done:
+        t = env.t
+        actions = q_values(weights, states).argmax(axis=1)
+        rewards, states, next_valid, done = env.step(actions)
+        rewards_total += rewards[valid].sum()
+        active_days += int(valid.sum())
+        if valid.any():
+            book.append(np.mean(env.positions[valid] * returns[t + 1][valid]))
+        valid = next_valid
+
+    book = np.array(book)
+    sharpe = float(book.mean() / book.std() * np.sqrt(TRADING_DAYS)) if len(book) > 1 and book.std() > 0 else 0.0
+    return {
+        'mean_reward': float(rewards_total / active_days) if active_days else 0.0,
+        'sharpe': sharpe,
+    }
+
+
+def train_policy(prices, episodes=TRAIN_EPISODES, learning_rate=LEARNING_RATE, seed=RANDOM_SEED):
+    """
+    Learns the Q-function weights from a (dates x tickers) close-price
+    DataFrame. The first 1 - TEST_FRACTION of dates are used for training
+    (epsilon decaying linearly to EPSILON_END over 70% of the episodes),
+    the rest for a greedy out-of-sample evaluation.
+    Returns (weights, metadata).
+    """
+    close = prices.to_numpy(dtype=float)
+    z, returns = normalized_returns(close)
+    split = int(len(close) * (1 - TEST_FRACTION))
+    if split <= WINDOW + VOL_WINDOW:
+        raise ValueError("Not enough price history to train the RL policy.")
+
+    rng = np.random.default_rng(seed)
+    weights = np.zeros((len(ACTIONS), len(STATE_FEATURES)))
+    env = VectorTradingEnv(z, 0, split)
+    rows = np.arange(env.size)
+
+    for episode in range(episodes):
+        epsilon = max(EPSILON_END, EPSILON_START - (EPSILON_START - EPSILON_END) * episode / max(0.7 * episodes, 1))
+        states, valid = env.reset()
+        done = False
+        while not done:
+            q = q_values(weights, states)
+            explore = rng.random(env.size) < epsilon
+            actions = np.where(explore, rng.integers(len(ACTIONS), size=env.size), q.argmax(axis=1))
+
+            rewards, next_states, next_valid, done = env.step(actions)
+            targets = rewards + DISCOUNT * np.where(next_valid, q_values(weights, next_states).max(axis=1), 0.0)
+            errors = np.where(valid, targets - q[rows, actions], 0.0)
+
+            # Mean TD(0) gradient over the active tickers, per action
+            taken = actions[:, None] == np.arange(len(ACTIONS))
+            gradient = (taken * errors[:, None]).T @ states
+            weights += learning_rate * gradient / max(int(valid.sum()), 1)
+
+            states, valid = next_states, next_valid
+
+    metadata = {
+        'tickers': list(prices.columns),
+        'episodes': episodes,
+        'train_rows': int(env.valid[env.start:env.end].sum()),
+        'train': evaluate_policy(weights, z, returns, 0, split),
+        'test': evaluate_policy(weights, z, returns, split, len(close)),
+    }
+    return weights, metadata
+
+
+def train_and_save(tickers, period=TRAIN_PERIOD, episodes=TRAIN_EPISODES):
+    """Trains on the tickers' price history and stores the policy. Returns its metadata."""
+    prices = fetch_price_matrix(tickers, period=period)
+    weights, metadata = train_policy(prices, episodes=episodes)
+    train_end = prices.index[int(len(prices) * (1 - TEST_FRACTION)) - 1]
+    meta = model_registry.save_model(MODEL_NAME, MODEL_KEY, STATE_FEATURES, train_end,
+                                     {'weights': weights}, metadata)
+    load_policy()
+    return meta
+
+
+# --- Inference ---
+
+def load_policy():
+    """
+    (Re)loads the latest stored policy into this process. Returns
+    (weights, metadata), or (None, None) if none has been trained.
+    """
+    global _POLICY
+    model, meta = model_registry.load_latest_model(MODEL_NAME, MODEL_KEY, STATE_FEATURES)
+    with _POLICY_LOCK:
+        _POLICY = (model['weights'], meta) if model is not None else None
+        return _POLICY or (None, None)
+
+
+def policy():
+    """The policy this process serves, loaded on first use."""
+    with _POLICY_LOCK:
+        loaded = _POLICY
+    return loaded if loaded is not None else load_policy()
+
+
+def latest_states(prices):
+    """
+    The current state (flat position) of every ticker with enough
+    history, from a (dates x tickers) close-price DataFrame: its last
+    WINDOW normalized returns, which must all exist, as in training.
+    A ticker's trailing rows without a price (its own last bar is older
+    than the frame's) are skipped first. Returns (tickers, states).
+    """
+    close = prices.to_numpy(dtype=float)
+    z, _ = normalized_returns(close)
+    tickers, windows = [], []
+    for i, ticker in enumerate(prices.columns):
+        priced = np.flatnonzero(np.isfinite(close[:, i]))
+        if not len(priced):
+            continue
+        end = priced[-1] + 1
+        window = z[max(end - WINDOW, 0):end, i]
+        if len(window) == WINDOW and np.isfinite(window).all():
+            tickers.append(ticker)
+            windows.append(window)
+    if not tickers:
+        return [], np.empty((0, len(STATE_FEATURES)))
+    return tickers, build_states(np.array(windows), np.zeros(len(tickers)))
+
+
+def _decide(ticker, q, meta):
+    action = int(np.argmax(q))
+    rec = ACTIONS[action]
+    summary = (
+        f"The linear Q-learning agent's best action from a flat position is '{rec}' "
+        f"(Q-values: Buy {q[0]:.3f}, Hold {q[1]:.3f}, Sell {q[2]:.3f}), based on the last {WINDOW} "
+        f"volatility-normalized daily returns. The policy was trained on {len(meta['tickers'])} tickers "
+        f"up to {meta['train_end'][:10]}; out-of-sample Sharpe ratio {meta['test']['sharpe']:.2f}."
+    )
+    return {
+        'recommendation': rec,
+        'summary': summary,
+        'chart_data': None,
+        'q_values': dict(zip(ACTIONS, map(float, q))),
+        'model_train_end': meta['train_end']
+    }
+
+
+def _untrained_result():
+    return {
+        'recommendation': 'Hold',
+        'summary': ("No trained RL policy is stored yet, so the agent abstains with 'Hold'. "
+                    "Train one offline with: python -m algorithms.reinforcement train"),
+        'chart_data': None,
+        'is_placeholder': True
+    }
+
+
+def run_reinforcement_batch(tickers):
+    """
+    The agent's action for every ticker, from one batched forward pass.
+    Returns {ticker: result} with the same format as run_reinforcement.
+    """
+    tickers = [t.upper() for t in tickers]
+    weights, meta = policy()
+    prices = fetch_price_matrix(tickers, period="1y")
+
+    results = {}
+    if weights is None:
+        results = {ticker: _untrained_result() for ticker in prices.columns}
+    else:
+        ready, states = latest_states(prices)
+        for ticker, q in zip(ready, q_values(weights, states)):
+            results[ticker] = _decide(ticker, q, meta)
+
+    for ticker in tickers:
+        results.setdefault(ticker, {"error": f"Not enough data for RL state. Need {WINDOW + VOL_WINDOW} days."})
+    return results
+
 
 def run_reinforcement(ticker):
     """
-    (Conceptual Placeholder)
-    Simulates the *inference* process for a trained RL model.
-    
-    This function demonstrates the structure:
-    1. Fetch data
-    2. Preprocess data into a 'state'
-    3. (Mock) Load a model
-    4. (Mock) Predict an 'action' (Buy/Sell/Hold)
+    (Full Implementation)
+    Feeds the ticker's current state to the stored linear Q-learning policy
+    and votes for the action with the highest Q-value.
     """
     try:
-        # 1. Fetch and preprocess current market data into a 'state'
-        data = fetch_stock_data(ticker, period="60d")
-        current_state = preprocess_for_rl(data, window_size=30)
-        
-        # --- Mocked Model Inference ---
-        # 2. Load a pre-trained model (This file does not exist)
-        # model = load_model("rl_model.h5")
-        
-        # 3. Get the model's action (0=Buy, 1=Hold, 2=Sell)
-        # In a real model:
-        # q_values = model.predict(current_state)
-        # action = np.argmax(q_values[0])
-        
-        # Since we have no model, we will mock the result for this placeholder.
-        # We'll randomly pick an action to show it's dynamic.
-        action = np.random.choice([0, 1, 2]) # 0=Buy, 1=Hold, 2=Sell
-        
-        # --- End Mocked Inference ---
-        
-        if action == 0:
-            rec = 'Buy'
-        elif action == 2:
-            rec = 'Sell'
-        else:
-            rec = 'Hold'
-
-        summary = (
-            "This is a placeholder for a Reinforcement Learning (RL) model. "
-            "A real implementation would load a pre-trained model, feed it the current "
-            f"market state (based on the last {len(current_state[0])} days), and execute the action (Buy/Sell/Hold) "
-            "with the highest predicted Q-value. "
-            f"This placeholder is mocking a final action of '{rec}'."
-        )
-        
-        return {
-            'recommendation': rec,
-            'summary': summary,
-            'chart_data': None, # RL models don't typically produce chart overlays
-            'is_placeholder': True
-        }
+        data = fetch_stock_data(ticker, period="1y")
+        weights, meta = policy()
+        if weights is None:
+            return _untrained_result()
+
+        tickers, states = latest_states(data[['Close']])
+        if not tickers:
+            raise Exception(f"Not enough data for RL state. Need {WINDOW + VOL_WINDOW} days, got {len(data)}.")
+        return _decide(ticker, q_values(weights, states)[0], meta)
 
     except Exception as e:
         return {"error": str(e)}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Offline training of the RL trading policy.")
+    subcommands = parser.add_subparsers(dest='command', required=True)
+    train = subcommands.add_parser('train', help="train on the price store and save the policy")
+    train.add_argument('--tickers', nargs='+', default=DEFAULT_STOCKS)
+    train.add_argument('--period', default=TRAIN_PERIOD)
+    train.add_argument('--episodes', type=int, default=TRAIN_EPISODES)
+    args = parser.parse_args()
+
+    meta = train_and_save(args.tickers, period=args.period, episodes=args.episodes)
+    print(f"Saved {MODEL_NAME} trained on {len(meta['tickers'])} tickers up to {meta['train_end']}")
+    print(f"  train: {meta['train']}")
+    print(f"  test:  {meta['test']}")
@@ -1,20 +1,82 @@
-import yfinance as yf
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+import pandas as pd
 from core.utils import fetch_stock_data
+from core.info_cache import get_ticker_info
+from core.sentiment_engine import score_text, sentiment_series, SENTIMENT_WINDOW
+
+# Trading on the headline corpus: compare the rolling sentiment now with
+# SENTIMENT_CHANGE_DAYS ago and follow the direction of the change
+SENTIMENT_CHANGE_DAYS = 5
+SENTIMENT_CHANGE_THRESHOLD = 0.1
+
+# Days of the sentiment series sent to the chart
+SENTIMENT_CHART_DAYS = 180
+
+
+def headline_signal(series, now=None):
+    """
+    Trades the change in the ticker's rolling headline sentiment.
+    Days without headlines carry the last rolling value forward. If the
+    newest headline is more than SENTIMENT_WINDOW days old (as of 'now',
+    default today), the change is stale and the vote is Hold.
+    """
+    rolling = series['rolling'].ffill().dropna()
+    level = rolling.iloc[-1]
+    change = level - rolling.iloc[-1 - SENTIMENT_CHANGE_DAYS]
+    last_day = rolling.index[-1].strftime('%Y-%m-%d')
+    headlines = int(series['headlines'].iloc[-SENTIMENT_WINDOW:].sum())
+
+    # The series runs in UTC calendar days up to the last headline
+    today = (now or pd.Timestamp.now(tz='UTC')).tz_convert(None).normalize()
+    age = (today - rolling.index[-1]).days
+
+    if age > SENTIMENT_WINDOW:
+        rec = 'Hold'
+        summary = f"No recent headlines: the newest is {age} days old, so the last {SENTIMENT_WINDOW}-day score change ({change:+.3f} to {level:.3f}) is too stale to trade."
+    elif change > SENTIMENT_CHANGE_THRESHOLD:
+        rec = 'Buy'
+        summary = f"Headline sentiment is improving: the {SENTIMENT_WINDOW}-day score rose by {change:.3f} to {level:.3f} over the last {SENTIMENT_CHANGE_DAYS} days."
+    elif change < -SENTIMENT_CHANGE_THRESHOLD:
+        rec = 'Sell'
+        summary = f"Headline sentiment is deteriorating: the {SENTIMENT_WINDOW}-day score fell by {-change:.3f} to {level:.3f} over the last {SENTIMENT_CHANGE_DAYS} days."
+    else:
+        rec = 'Hold'
+        summary = f"Headline sentiment is stable: the {SENTIMENT_WINDOW}-day score moved by {change:+.3f} to {level:.3f} over the last {SENTIMENT_CHANGE_DAYS} days."
+    summary += f" Based on {headlines} headlines in the {SENTIMENT_WINDOW} days to {last_day}."
+
+    recent = series.loc[rolling.index].iloc[-SENTIMENT_CHART_DAYS:]
+    chart_data = {
+        'labels': recent.index.strftime('%Y-%m-%d').tolist(),
+        'sentiment': rolling.loc[recent.index].tolist(),
+        # Days without headlines are gaps
+        'daily_sentiment': [None if pd.isna(value) else value for value in recent['daily']]
+    }
+
+    return {
+        'recommendation': rec,
+        'summary': summary,
+        'chart_data': chart_data
+    }
+
 
 def run_sentiment(ticker):
     """
     (Full Implementation)
-    Runs VADER sentiment analysis on the company's 'longBusinessSummary'.
+    Trades changes in VADER sentiment of the ticker's headlines (see
+    core.sentiment_engine). Without enough headlines it falls back to the
+    sentiment of the company's 'longBusinessSummary'.
     """
     try:
-        # We need the full Ticker object to get .info
-        stock = yf.Ticker(ticker)
-        info = stock.info
-        
+        series = sentiment_series(ticker)
+        if series['rolling'].ffill().dropna().size > SENTIMENT_CHANGE_DAYS:
+            fetch_stock_data(ticker, period="1y") # Still fetch data for Council
+            return headline_signal(series)
+
+        # The business summary comes from the shared Ticker.info cache
+        info = get_ticker_info(ticker, fields=('longBusinessSummary',))
+
         # Use the long business summary as the text to analyze
         text_to_analyze = info.get('longBusinessSummary')
-        
+
         if not text_to_analyze:
             # Fallback if no summary exists
             fetch_stock_data(ticker, period="1y") # Still fetch data for Council
@@ -26,12 +88,13 @@ def run_sentiment(ticker):
             }
 
         # --- VADER Sentiment Analysis ---
-        sia = SentimentIntensityAnalyzer()
-        sentiment_scores = sia.polarity_scores(text_to_analyze)
-        
+        # Shared analyzer; the summary rarely changes, so its score is
+        # usually served from the engine's cache
+        sentiment_scores = score_text(text_to_analyze)
+
         # The 'compound' score is a normalized, aggregated score from -1 (v. neg) to +1 (v. pos)
         compound_score = sentiment_scores['compound']
-        
+
         # --- Generate Signal ---
         if compound_score > 0.1:
             rec = 'Buy'
@@ -42,19 +105,19 @@ def run_sentiment(ticker):
         else:
             rec = 'Hold'
             summary = f"Neutral sentiment detected (Score: {compound_score:.3f}). The company's business summary is objective or balanced."
-            
+
         # --- Format Chart Data (Bar chart of scores) ---
         chart_data = {
             'labels': ['Positive', 'Neutral', 'Negative'],
             'importance': [sentiment_scores['pos'], sentiment_scores['neu'], sentiment_scores['neg']]
         }
-        
+
         return {
             'recommendation': rec,
             'summary': summary,
             'chart_data': chart_data,
             'chart_type': 'bar' # Tell the frontend to use a bar chart
         }
-        
+
     except Exception as e:
         return {"error": str(e)}
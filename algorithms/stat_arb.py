@@ -1,10 +1,16 @@
 import pandas as pd
 import numpy as np
 from core.utils import fetch_stock_data
+from core.indicators import rolling_zscore, last_valid
+from core.streaming import ZScoreState, sync_state
+
+# Z-Score beyond which the spread is traded
+ENTRY_Z = 2.0
 
 def run_stat_arb(ticker1, ticker2, window=20):
     """
     Performs a pairs trading analysis using the Z-Score of the spread.
+    A thin single-pair view over core.indicators.rolling_zscore.
     """
     try:
         data1 = fetch_stock_data(ticker1, period="1y")['Close']
@@ -20,19 +26,17 @@ def run_stat_arb(ticker1, ticker2, window=20):
         df['Spread'] = np.log(df['T1'] / df['T2'])
         
         # Calculate Z-Score
-        df['Mean'] = df['Spread'].rolling(window=window).mean()
-        df['StdDev'] = df['Spread'].rolling(window=window).std()
-        df['Z_Score'] = (df['Spread'] - df['Mean']) / df['StdDev']
+        df['Z_Score'] = rolling_zscore(df['Spread'].to_numpy(), window)
         
         df.dropna(inplace=True)
         
         # --- Generate Signal ---
         latest_z = df['Z_Score'].iloc[-1]
         
-        if latest_z > 2.0:
+        if latest_z > ENTRY_Z:
             rec = 'Sell'
             summary = f"Spread Z-Score ({latest_z:.2f}) is > 2.0. Signal: Short the spread (Sell {ticker1}, Buy {ticker2})."
-        elif latest_z < -2.0:
+        elif latest_z < -ENTRY_Z:
             rec = 'Buy'
             summary = f"Spread Z-Score ({latest_z:.2f}) is < -2.0. Signal: Long the spread (Buy {ticker1}, Sell {ticker2})."
         else:
@@ -43,8 +47,8 @@ def run_stat_arb(ticker1, ticker2, window=20):
         chart_data = {
             'labels': df.index.strftime('%Y-%m-%d').tolist(),
             'z_score': df['Z_Score'].tolist(),
-            'upper_band': [2.0] * len(df),
-            'lower_band': [-2.0] * len(df)
+            'upper_band': [ENTRY_Z] * len(df),
+            'lower_band': [-ENTRY_Z] * len(df)
         }
         
         return {
@@ -55,3 +59,69 @@ def run_stat_arb(ticker1, ticker2, window=20):
         
     except Exception as e:
         return {"error": str(e)}
+
+def run_stat_arb_live(ticker1, ticker2, window=20):
+    """
+    Same signal as run_stat_arb, from a per-pair streaming Z-Score state
+    (core.streaming) that only consumes bars it has not seen yet.
+    Returns no chart; meant for councils and live dashboards.
+    """
+    try:
+        data1 = fetch_stock_data(ticker1, period="1y")['Close']
+        data2 = fetch_stock_data(ticker2, period="1y")['Close']
+        
+        df = pd.DataFrame({'T1': data1, 'T2': data2}).dropna()
+        
+        if df.empty:
+            return {"error": "No overlapping data for tickers."}
+        
+        spread = np.log(df['T1'] / df['T2'])
+        
+        key = ('stat_arb', ticker1.upper(), ticker2.upper(), window)
+        state = sync_state(key, spread, lambda: ZScoreState(window))
+        latest_z = state.z_score
+        
+        if not np.isfinite(latest_z):
+            return {"error": f"Not enough data for a {window}-day spread Z-Score."}
+        
+        if latest_z > ENTRY_Z:
+            rec = 'Sell'
+            summary = f"Spread Z-Score ({latest_z:.2f}) is > 2.0. Signal: Short the spread (Sell {ticker1}, Buy {ticker2})."
+        elif latest_z < -ENTRY_Z:
+            rec = 'Buy'
+            summary = f"Spread Z-Score ({latest_z:.2f}) is < -2.0. Signal: Long the spread (Buy {ticker1}, Sell {ticker2})."
+        else:
+            rec = 'Hold'
+            summary = f"Spread Z-Score ({latest_z:.2f}) is between -2.0 and 2.0. No signal."
+        
+        return {
+            'recommendation': rec,
+            'summary': summary,
+            'chart_data': None,
+            'as_of': str(state.last_timestamp)
+        }
+        
+    except Exception as e:
+        return {"error": str(e)}
+
+def screen_stat_arb(prices, partner, window=20):
+    """
+    Runs the spread Z-Score check for every ticker against one partner.
+    'prices' is a (dates x tickers) DataFrame of closes and 'partner' a
+    Series of the partner's closes (e.g. SPY, as the council uses). Returns
+    one row per ticker with the latest Z-Score and the same Buy/Sell/Hold
+    recommendation as run_stat_arb.
+    """
+    aligned = prices.join(partner.rename('__partner__'), how='inner')
+    spreads = np.log(aligned[prices.columns].to_numpy() / aligned[['__partner__']].to_numpy())
+    
+    screen = pd.DataFrame({
+        'z_score': last_valid(rolling_zscore(spreads, window))
+    }, index=prices.columns)
+    
+    screen['recommendation'] = np.select(
+        [screen['z_score'] > ENTRY_Z, screen['z_score'] < -ENTRY_Z],
+        ['Sell', 'Buy'],
+        default='Hold'
+    )
+    return screen.dropna()
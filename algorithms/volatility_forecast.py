@@ -1,12 +1,72 @@
+import time
+import threading
+from collections import OrderedDict
 import pandas as pd
 import numpy as np
 from core.utils import fetch_stock_data
 from arch import arch_model
 
+# --- GARCH fit cache ---
+# ticker -> {'params', 'end', 'tail', 'fitted_at', 'bars_since_fit'}
+# Only the fitted parameters are kept; the result is rebuilt with
+# model.fix on the request's returns, which is a single variance pass.
+# A request whose data still ends on the cached end date, with the same
+# last returns ('tail'), is served from the cached parameters as is. New
+# bars, or a revised last bar / re-adjusted history, are forward-filtered
+# through them, and a full (warm-started) re-optimization only runs on
+# the schedule below. The cache is an LRU of GARCH_CACHE_SIZE tickers.
+GARCH_CACHE_SIZE = 512
+_FIT_CACHE = OrderedDict()
+_FIT_CACHE_LOCK = threading.Lock()
+
+# Returns compared to tell a revised or re-adjusted history from the cached one
+GARCH_TAIL_BARS = 5
+
+# Re-optimize once this many new bars have been forward-filtered...
+GARCH_REFIT_AFTER_BARS = 5
+# ...or once the last full fit is this old (seconds)
+GARCH_REFIT_INTERVAL = 7 * 24 * 3600
+
+def _tail(returns, end):
+    """The last GARCH_TAIL_BARS returns up to 'end'."""
+    return returns.loc[:end].iloc[-GARCH_TAIL_BARS:].to_numpy()
+
+def _fit_garch(returns, cached):
+    """
+    Returns (fitted result, fit_mode, changed bars) for 'returns', reusing
+    'cached' (the previous fit for this ticker) whenever the schedule
+    allows. 'changed bars' counts the bars not seen by the cached fit.
+    """
+    model = arch_model(returns, vol='Garch', p=1, q=1)
+
+    if cached is not None:
+        new_bars = len(returns.loc[returns.index > cached['end']])
+        if not np.array_equal(_tail(returns, cached['end']), cached['tail']):
+            # The bars the fit last saw were revised (a partial bar) or
+            # re-based (split or dividend adjustment)
+            new_bars += 1
+        elif new_bars == 0:
+            return model.fix(cached['params']), 'cached', 0
+
+        refit_due = (cached['bars_since_fit'] + new_bars >= GARCH_REFIT_AFTER_BARS
+                     or time.time() - cached['fitted_at'] > GARCH_REFIT_INTERVAL)
+
+        if not refit_due:
+            # Run the variance recursion forward with the cached parameters
+            return model.fix(cached['params']), 'forward_filtered', new_bars
+
+        # Warm-start the optimizer from the previous parameters
+        return model.fit(disp='off', starting_values=cached['params']), 'refit', new_bars
+
+    # Fit the model. disp='off' disables the convergence output
+    return model.fit(disp='off'), 'refit', len(returns)
+
 def run_volatility_forecast(ticker):
     """
     (Full Implementation)
     Fits a GARCH(1,1) model to forecast volatility.
+    Fits are cached per ticker; see _fit_garch for when a request gets the
+    cached fit, a forward-filtered update or a full refit ('fit_mode').
     """
     try:
         data = fetch_stock_data(ticker, period="2y")
@@ -20,10 +80,23 @@ def run_volatility_forecast(ticker):
         # --- GARCH Model ---
         # We use a GARCH(1,1) model, which is the most common specification.
         # 'vol='Garch'' specifies the GARCH model. p=1, q=1.
-        model = arch_model(returns, vol='Garch', p=1, q=1)
+        key = ticker.upper()
+        with _FIT_CACHE_LOCK:
+            cached = _FIT_CACHE.get(key)
         
-        # Fit the model. disp='off' disables the convergence output
-        model_fit = model.fit(disp='off')
+        model_fit, fit_mode, new_bars = _fit_garch(returns, cached)
+        
+        end = returns.index[-1]
+        entry = {'end': end, 'tail': _tail(returns, end)}
+        if fit_mode == 'refit':
+            entry.update(params=model_fit.params.to_numpy(), fitted_at=time.time(), bars_since_fit=0)
+        else:
+            entry = dict(cached, **entry, bars_since_fit=cached['bars_since_fit'] + new_bars)
+        with _FIT_CACHE_LOCK:
+            _FIT_CACHE[key] = entry
+            _FIT_CACHE.move_to_end(key)
+            while len(_FIT_CACHE) > GARCH_CACHE_SIZE:
+                _FIT_CACHE.popitem(last=False)
         
         # --- Forecast ---
         # Forecast the next 1 day
@@ -41,25 +114,33 @@ def run_volatility_forecast(ticker):
         # --- Context ---
         current_vol_annualized = (returns.std() / 100) * np.sqrt(252)
 
+        fit_notes = {
+            'cached': "Served from the cached fit for this data.",
+            'forward_filtered': "Cached parameters were rolled forward over the newest bars.",
+            'refit': "Parameters were re-estimated on the full history."
+        }
+
         rec = 'Hold' # Volatility models are non-directional
         summary = (
             f"The GARCH(1,1) model forecasts an annualized volatility of {vol_forecast_annualized:.2%} "
             f"for the next trading day. This compares to the 2-year average "
             f"historical volatility of {current_vol_annualized:.2%}. "
-            f"This model is for risk assessment, not price direction."
+            f"This model is for risk assessment, not price direction. "
+            f"{fit_notes[fit_mode]}"
         )
             
         # --- Format Chart Data (Volatility Forecast vs. Historical) ---
         chart_data = {
             'labels': returns.index.strftime('%Y-%m-%d').tolist(),
             # Plotting conditional volatility from the model
-            'volatility': (model_fit.conditional_volatility / 100) * np.sqrt(252)
+            'volatility': ((model_fit.conditional_volatility / 100) * np.sqrt(252)).tolist()
         }
         
         return {
             'recommendation': rec,
             'summary': summary,
-            'chart_data': chart_data
+            'chart_data': chart_data,
+            'fit_mode': fit_mode
         }
         
     except Exception as e:
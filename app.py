@@ -1,19 +1,34 @@
 import random
 import json
 import pandas as pd
-from flask import Flask, render_template, jsonify, request, abort
+from flask import Flask, render_template, jsonify, request, abort, Response, stream_with_context
 
 # Import core utilities
-from core.utils import fetch_stock_data, simple_find_peaks, DEFAULT_STOCKS
-from core.council import run_council_decision
+from core.utils import fetch_stock_data, find_peaks, DEFAULT_STOCKS
+from core.council import run_council_decision, run_council_batch, stream_council_decision, council_tickers
+from core import jobs, result_cache, pairs, strategy_registry
+from core.chart_payload import compact_chart_data, downsample_chart_data
+from core.strategy_registry import lazy_function, lazy_module
 
-# Import all algorithm functions
-from algorithms import stat_arb, momentum, mean_reversion, ml_predictive, \
-    reinforcement, factor_investing, market_making, sentiment, \
-    volatility_forecast, mean_variance_opt
+# Algorithm modules are imported on first use (see core.strategy_registry)
+backtest = lazy_module('core.backtest')
+ml_predictive = lazy_module('algorithms.ml_predictive')
+reinforcement = lazy_module('algorithms.reinforcement')
+market_making = lazy_module('algorithms.market_making')
+mean_variance_opt = lazy_module('algorithms.mean_variance_opt')
+garch_batch = lazy_module('algorithms.garch_batch')
 
 app = Flask(__name__)
 
+# Upper bound on tickers accepted by a single /api/run_council_batch call
+MAX_BATCH_TICKERS = 1000
+
+# chart_data encodings /api/run_algorithm can return
+CHART_FORMATS = ['json', 'compact']
+
+# Points drawn on the homepage chart; longer histories are downsampled
+HOME_CHART_MAX_POINTS = 500
+
 # --- Metadata for Strategies ---
 # This dictionary drives the algorithm pages dynamically.
 STRATEGY_METADATA = {
@@ -22,70 +37,73 @@ STRATEGY_METADATA = {
         'description': 'Identifies two highly correlated stocks and trades on the temporary divergence of their price spread. It assumes the spread will revert to its historical mean.',
         'math': 'Calculates the Z-Score of the price ratio spread (StockA / StockB). A Z-Score > 2.0 suggests shorting the spread (Sell A, Buy B), while a Z-Score < -2.0 suggests longing the spread (Buy A, Sell B).',
         'tickers_required': 2,
-        'function': stat_arb.run_stat_arb
+        'function': lazy_function('algorithms.stat_arb:run_stat_arb'),
+        'live_function': lazy_function('algorithms.stat_arb:run_stat_arb_live')
     },
     'momentum': {
         'title': 'Momentum / Trend Following',
         'description': 'A classic strategy that assumes assets that have performed well recently will continue to perform well (and vice-versa). This implementation uses a Simple Moving Average (SMA) crossover.',
         'math': 'Generates a "Buy" signal when the short-term 50-day SMA crosses above the long-term 200-day SMA. A "Sell" signal is generated when the 50-day SMA crosses below the 200-day SMA.',
         'tickers_required': 1,
-        'function': momentum.run_momentum
+        'function': lazy_function('algorithms.momentum:run_momentum'),
+        'live_function': lazy_function('algorithms.momentum:run_momentum_live')
     },
     'mean_reversion': {
         'title': 'Mean Reversion (Bollinger Bands)',
         'description': 'This strategy operates on the assumption that stock prices will revert to their historical average or mean. It identifies overbought or oversold conditions.',
         'math': 'Uses Bollinger Bands (20-day SMA ± 2 standard deviations). A "Buy" signal occurs when the price drops below the lower band. A "Sell" signal occurs when the price rises above the upper band.',
         'tickers_required': 1,
-        'function': mean_reversion.run_mean_reversion
+        'function': lazy_function('algorithms.mean_reversion:run_mean_reversion'),
+        'live_function': lazy_function('algorithms.mean_reversion:run_mean_reversion_live')
     },
     'ml_predictive': {
         'title': 'Machine Learning (Random Forest)',
         'description': '(Placeholder Implementation) Uses a Random Forest classifier to predict the next day\'s price direction (Up or Down) based on lagged returns and moving average features.',
         'math': 'Features: Lag-1, Lag-5 returns, 10-day rolling mean. Target: 1 if next-day close > today\'s close, 0 otherwise. A simple model is trained on 80% of the data to predict the most recent signal.',
         'tickers_required': 1,
-        'function': ml_predictive.run_ml_predictive
+        'function': lazy_function('algorithms.ml_predictive:run_ml_predictive')
     },
     'reinforcement': {
-        'title': 'Reinforcement Learning (Deep Q-Learning)',
-        'description': '(Conceptual Placeholder) An advanced AI strategy where an "agent" learns the optimal trading policy (Buy, Sell, Hold) by interacting with the market environment to maximize a cumulative reward.',
-        'math': 'This page is a placeholder. A full implementation would involve defining a state space (e.g., price, volume, indicators), an action space (Buy/Sell/Hold), and a reward function, then training a deep neural network (e.g., Deep Q-Network) over millions of simulated steps.',
+        'title': 'Reinforcement Learning (Linear Q-Learning)',
+        'description': 'An AI strategy where an "agent" learns a trading policy (Buy, Sell, Hold) by interacting with the market environment to maximize a cumulative reward. The policy is trained offline on the local price history of a whole universe.',
+        'math': 'State: the last 30 daily returns divided by 60-day volatility, plus the current position. Reward: position times the next normalized return, minus a cost per trade. Q(s, a) = W_a . s is learned by epsilon-greedy Q-learning over every ticker at once; the vote is the action with the highest Q-value from a flat position.',
         'tickers_required': 1,
-        'function': reinforcement.run_reinforcement
+        'function': lazy_function('algorithms.reinforcement:run_reinforcement')
     },
     'factor_investing': {
         'title': 'Multi-Factor Investing',
         'description': '(Conceptual Placeholder) A portfolio strategy that selects assets based on their exposure to specific "factors" (e.g., Value, Momentum, Quality, Low-Volatility) that have historically provided excess returns.',
         'math': 'This is a placeholder. A real implementation would involve screening a universe of stocks, calculating factor scores for each (e.g., P/E ratio for Value, 12-month return for Momentum), and building a portfolio that optimizes for exposure to desired factors.',
         'tickers_required': 1,
-        'function': factor_investing.run_factor_investing
+        'function': lazy_function('algorithms.factor_investing:run_factor_investing')
     },
     'market_making': {
         'title': 'Market Making Simulation',
-        'description': '(Conceptual Placeholder) A high-frequency strategy that involves providing liquidity to the market by placing simultaneous buy (bid) and sell (ask) orders, capturing the "bid-ask spread".',
-        'math': 'This is a placeholder. A simulation would model inventory risk and order book dynamics, using models like Avellaneda-Stoikov to determine the optimal bid and ask prices relative to a "fair" value.',
+        'description': 'A high-frequency strategy that provides liquidity by placing simultaneous buy (bid) and sell (ask) orders, capturing the "bid-ask spread". Simulated against replayed or synthetic order flow; the vote is always Hold.',
+        'math': 'Avellaneda-Stoikov quoting: with inventory q, quotes are centred on the reservation price r = s - q * gamma * sigma^2 * (T - t) and set a total spread of gamma * sigma^2 * (T - t) + (2 / gamma) * ln(1 + gamma / kappa) apart. The simulation tracks inventory and P&L, compared with quoting the same spread around the mid.',
         'tickers_required': 1,
-        'function': market_making.run_market_making
+        'function': lazy_function('algorithms.market_making:run_market_making')
     },
     'sentiment': {
         'title': 'NLP Sentiment Analysis',
-        'description': '(Conceptual Placeholder) Trades based on the collective sentiment (positive, negative, neutral) extracted from news headlines, social media (like X/Twitter), or financial reports.',
-        'math': 'This is a placeholder. A real implementation would use a Natural Language Processing (NLP) model (e.g., BERT, VADER) to score text data, aggregate sentiment over time, and generate trades when sentiment crosses a threshold (e.g., Buy on high positive sentiment).',
+        'description': 'Trades changes in the collective sentiment (positive, negative, neutral) of news headlines loaded from a local feed, falling back to the tone of the company\'s business summary.',
+        'math': 'Each headline is scored with VADER (compound score from -1 to +1). Scores are averaged per ticker over a rolling 5-day window; a rise of more than 0.1 over the last 5 days is a Buy signal, a fall of more than 0.1 a Sell signal.',
         'tickers_required': 1,
-        'function': sentiment.run_sentiment
+        'function': lazy_function('algorithms.sentiment:run_sentiment')
     },
     'volatility_forecast': {
         'title': 'Volatility Forecasting (GARCH)',
         'description': '(Placeholder Implementation) A model used to predict future volatility, which is crucial for risk management, options pricing, and volatility-targeting strategies.',
         'math': 'This is a simple proxy using 20-day rolling historical volatility. A full GARCH(1,1) model would be a more robust autoregressive model that forecasts variance based on past squared returns and past variances.',
         'tickers_required': 1,
-        'function': volatility_forecast.run_volatility_forecast
+        'function': lazy_function('algorithms.volatility_forecast:run_volatility_forecast')
     },
     'mean_variance_opt': {
         'title': 'Mean-Variance Optimization (Markowitz)',
         'description': '(Conceptual Placeholder) A portfolio allocation strategy that finds the optimal portfolio weights to maximize expected return for a given level of risk (variance).',
         'math': 'This is a placeholder. This strategy applies to a *portfolio* of assets, not a single ticker. A full implementation would require multiple tickers, calculate their expected returns and covariance matrix, and solve for the "Efficient Frontier".',
         'tickers_required': 1,
-        'function': mean_variance_opt.run_mean_variance_opt
+        'function': lazy_function('algorithms.mean_variance_opt:run_mean_variance_opt')
     }
 }
 
@@ -116,14 +134,20 @@ def home():
         
         # 3. Find peaks and assign random strategies
         prices = data['Close'].tolist()
-        peak_indices = simple_find_peaks(prices, prominence=5) # Find modest peaks
+        peak_indices, _ = find_peaks(prices, prominence=5) # Find modest peaks
+        peak_indices = peak_indices.tolist()
+
+        # Downsample long histories, keeping every peak; 'index' must then
+        # point into the reduced series the chart draws
+        chart_data, kept = downsample_chart_data(chart_data, HOME_CHART_MAX_POINTS, keep=peak_indices)
+        chart_positions = {int(idx): position for position, idx in enumerate(kept)}
         
         peaks_with_strategies = []
         strategy_keys = list(STRATEGY_METADATA.keys())
         
         for idx in peak_indices:
             peaks_with_strategies.append({
-                'index': idx,
+                'index': chart_positions[idx],
                 'date': data.index[idx].strftime('%Y-%m-%d'),
                 'price': prices[idx],
                 'strategy': random.choice(strategy_keys) # Assign random strategy
@@ -166,6 +190,48 @@ def council_page():
     return render_template('council.html')
 
 
+def run_strategy(strategy_name, ticker1, ticker2=None):
+    """Runs one strategy from STRATEGY_METADATA with one or two tickers."""
+    strategy_info = STRATEGY_METADATA[strategy_name]
+    # Call the correct function based on the strategy
+    if strategy_info['tickers_required'] == 2:
+        return strategy_info['function'](ticker1, ticker2)
+    return strategy_info['function'](ticker1)
+
+
+def cached_json_response(strategy_name, tickers, compute, params=None):
+    """
+    JSON response for a strategy/council result, served from the result
+    cache while no ticker has a new bar. Carries an ETag, so a client
+    sending it back in If-None-Match gets an empty 304. This applies to
+    POST as well: the POSTed runs only compute, they change nothing.
+    """
+    body, etag, hit = result_cache.get_or_compute(
+        lambda: result_cache.result_key(strategy_name, tickers, params),
+        compute, lambda result: app.json.dumps(result).encode())
+
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['X-Cache'] = 'HIT' if hit else 'MISS'
+    # Werkzeug's make_conditional only answers If-None-Match on GET/HEAD
+    if request.if_none_match.contains(etag):
+        response.status_code = 304
+        response.set_data(b'')
+    return response
+
+
+# Preload mode imports every strategy before gunicorn forks its workers;
+# otherwise each is imported on first use. The RL policy is small and is
+# always read at startup (once in the master under --preload).
+if strategy_registry.PRELOAD_STRATEGIES:
+    strategy_registry.preload()
+reinforcement.load_policy()
+
+# Long-running requests can also be submitted as background jobs
+jobs.register_job_type('algorithm', run_strategy)
+jobs.register_job_type('council', run_council_decision)
+
+
 # ==========================================
 # ==            API Endpoints           ==
 # ==========================================
@@ -175,6 +241,10 @@ def api_run_algorithm(strategy_name):
     """
     API endpoint to run a specific algorithm.
     Takes ticker(s) as JSON and returns algorithm results.
+    "chart_format": "compact" returns chart_data in the compact columnar
+    encoding (see core.chart_payload) instead of plain lists, and
+    "max_points" downsamples long chart series (LTTB) to about that many
+    points, keeping buy/sell signal points exact.
     """
     if strategy_name not in STRATEGY_METADATA:
         return jsonify({"error": "Strategy not found"}), 404
@@ -185,22 +255,99 @@ def api_run_algorithm(strategy_name):
     
     if not ticker1:
         return jsonify({"error": "Ticker 1 is required"}), 400
+
+    chart_format = data.get('chart_format', 'json')
+    if chart_format not in CHART_FORMATS:
+        return jsonify({"error": f"chart_format must be one of {', '.join(CHART_FORMATS)}"}), 400
+
+    max_points = data.get('max_points')
+    if max_points is not None and (not isinstance(max_points, int) or max_points < 3):
+        return jsonify({"error": "max_points must be an integer of at least 3"}), 400
         
     strategy_info = STRATEGY_METADATA[strategy_name]
+    if strategy_info['tickers_required'] == 2 and not ticker2:
+        return jsonify({"error": "Ticker 2 is required for this strategy"}), 400
     
     try:
-        # Call the correct function based on the strategy
+        def compute():
+            result = run_strategy(strategy_name, ticker1, ticker2)
+            if isinstance(result, dict) and result.get('chart_data'):
+                if max_points:
+                    result['chart_data'], _ = downsample_chart_data(result['chart_data'], max_points)
+                if chart_format == 'compact':
+                    result['chart_data'] = compact_chart_data(result['chart_data'])
+            return result
+
+        tickers = [ticker1, ticker2] if strategy_info['tickers_required'] == 2 else [ticker1]
+        return cached_json_response(strategy_name, tickers, compute,
+                                    params={'chart_format': chart_format, 'max_points': max_points})
+        
+    except Exception as e:
+        app.logger.error(f"Error running algorithm {strategy_name}: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/api/live_signal/<strategy_name>/<ticker>', methods=['GET'])
+def api_live_signal(strategy_name, ticker):
+    """
+    API endpoint for a strategy's latest signal from its streaming
+    indicator state, which only consumes bars it has not seen yet.
+    Cheap enough for dashboards to poll. Pair strategies take ?pair=.
+    """
+    strategy_info = STRATEGY_METADATA.get(strategy_name)
+    if not strategy_info or 'live_function' not in strategy_info:
+        return jsonify({"error": "No live signal for this strategy"}), 404
+
+    try:
         if strategy_info['tickers_required'] == 2:
-            if not ticker2:
-                return jsonify({"error": "Ticker 2 is required for this strategy"}), 400
-            result = strategy_info['function'](ticker1, ticker2)
+            pair = request.args.get('pair')
+            if not pair:
+                return jsonify({"error": "A 'pair' ticker is required for this strategy"}), 400
+            result = strategy_info['live_function'](ticker, pair)
         else:
-            result = strategy_info['function'](ticker1)
-            
+            result = strategy_info['live_function'](ticker)
+
         return jsonify(result)
-        
+
     except Exception as e:
-        app.logger.error(f"Error running algorithm {strategy_name}: {e}")
+        app.logger.error(f"Error running live signal {strategy_name}: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/api/models/ml_predictive/<ticker>/retrain', methods=['POST'])
+def api_retrain_ml_model(ticker):
+    """
+    API endpoint to retrain (on demand) and store the ml_predictive model
+    for a ticker. Later requests are served from the stored model.
+    """
+    try:
+        _, meta = ml_predictive.train_ml_model(ticker)
+        return jsonify(meta)
+
+    except Exception as e:
+        app.logger.error(f"Error retraining model for {ticker}: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/api/ml_predictive/pooled', methods=['POST'])
+def api_ml_predictive_pooled():
+    """
+    API endpoint for next-day direction over many tickers from the pooled
+    cross-ticker model. Takes {"tickers": [...], "retrain": false} as JSON.
+    """
+    data = request.get_json() or {}
+    tickers = data.get('tickers')
+
+    if not tickers or not isinstance(tickers, list):
+        return jsonify({"error": "A non-empty list of tickers is required"}), 400
+    if len(tickers) > MAX_BATCH_TICKERS:
+        return jsonify({"error": f"At most {MAX_BATCH_TICKERS} tickers per batch"}), 400
+
+    try:
+        return jsonify(ml_predictive.run_ml_predictive_pooled(tickers, retrain=bool(data.get('retrain'))))
+
+    except Exception as e:
+        app.logger.error(f"Error running pooled ML model: {e}")
         return jsonify({"error": str(e)}), 500
 
 
@@ -213,14 +360,298 @@ def api_run_council(ticker):
         return jsonify({"error": "A ticker is required"}), 400
         
     try:
-        council_result = run_council_decision(ticker)
-        return jsonify(council_result)
+        # Keyed on every series the council reads, so a refreshed stat_arb
+        # partner or benchmark moves the result to a new key
+        return cached_json_response('council', council_tickers(ticker), lambda: run_council_decision(ticker))
         
     except Exception as e:
         app.logger.error(f"Error running council: {e}")
         return jsonify({"error": str(e)}), 500
 
 
+@app.route('/api/run_council/<ticker>/stream', methods=['GET'])
+def api_stream_council(ticker):
+    """
+    API endpoint streaming the Quant Council as Server-Sent Events: one
+    'vote' event per strategy as soon as it finishes (with the running
+    tally), then a 'decision' event with the final vote and AI prompt.
+    """
+    def generate():
+        try:
+            for event, payload in stream_council_decision(ticker.upper()):
+                yield f"event: {event}\ndata: {json.dumps(payload, default=str)}\n\n"
+        except Exception as e:
+            app.logger.error(f"Error streaming council: {e}")
+            yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@app.route('/api/run_council_batch', methods=['POST'])
+def api_run_council_batch():
+    """
+    API endpoint to run the Quant Council over many tickers.
+    Takes {"tickers": [...]} as JSON and streams back one JSON object per
+    line (NDJSON), one per ticker, in the order they complete.
+    """
+    data = request.get_json() or {}
+    tickers = data.get('tickers')
+
+    if not tickers or not isinstance(tickers, list):
+        return jsonify({"error": "A non-empty list of tickers is required"}), 400
+    if len(tickers) > MAX_BATCH_TICKERS:
+        return jsonify({"error": f"At most {MAX_BATCH_TICKERS} tickers per batch"}), 400
+
+    def generate():
+        try:
+            for council_result in run_council_batch(tickers):
+                yield json.dumps(council_result) + '\n'
+        except Exception as e:
+            app.logger.error(f"Error running council batch: {e}")
+            yield json.dumps({"error": str(e)}) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+@app.route('/api/volatility_forecast_batch', methods=['POST'])
+def api_volatility_forecast_batch():
+    """
+    API endpoint for GARCH(1,1) volatility forecasts over many tickers,
+    fitted together by the vectorized batch fitter.
+    Takes {"tickers": [...]} as JSON.
+    """
+    data = request.get_json() or {}
+    tickers = data.get('tickers')
+
+    if not tickers or not isinstance(tickers, list):
+        return jsonify({"error": "A non-empty list of tickers is required"}), 400
+    if len(tickers) > MAX_BATCH_TICKERS:
+        return jsonify({"error": f"At most {MAX_BATCH_TICKERS} tickers per batch"}), 400
+
+    try:
+        return jsonify(garch_batch.run_volatility_forecast_batch(tickers))
+
+    except Exception as e:
+        app.logger.error(f"Error running batch volatility forecast: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/api/efficient_frontier', methods=['POST'])
+def api_efficient_frontier():
+    """
+    API endpoint for the long-only efficient frontier of a set of tickers.
+    Takes {"tickers": [...], "points": 20, "covariance": "ledoit_wolf"} as
+    JSON; "covariance" may also be "sample".
+    """
+    data = request.get_json() or {}
+    tickers = data.get('tickers')
+
+    if not tickers or not isinstance(tickers, list):
+        return jsonify({"error": "A non-empty list of tickers is required"}), 400
+    if len(tickers) > MAX_BATCH_TICKERS:
+        return jsonify({"error": f"At most {MAX_BATCH_TICKERS} tickers per batch"}), 400
+
+    try:
+        return jsonify(mean_variance_opt.efficient_frontier(
+            tickers,
+            points=int(data.get('points', mean_variance_opt.FRONTIER_POINTS)),
+            covariance=data.get('covariance', 'ledoit_wolf')))
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        app.logger.error(f"Error computing efficient frontier: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/api/optimize_portfolio', methods=['POST'])
+def api_optimize_portfolio():
+    """
+    API endpoint for portfolio optimization over many tickers.
+    Takes {"tickers": [...], "objective": "max_sharpe" | "min_variance" |
+    "target_vol", "target_volatility": 0.15, "covariance": "ledoit_wolf" |
+    "sample" | "factor", "weight_bounds": [0, 1], "risk_free_rate": 0}
+    as JSON; only "tickers" is required.
+    """
+    data = request.get_json() or {}
+    tickers = data.get('tickers')
+
+    if not tickers or not isinstance(tickers, list):
+        return jsonify({"error": "A non-empty list of tickers is required"}), 400
+    if len(tickers) > MAX_BATCH_TICKERS:
+        return jsonify({"error": f"At most {MAX_BATCH_TICKERS} tickers per batch"}), 400
+
+    try:
+        return jsonify(mean_variance_opt.optimize_portfolio(
+            tickers,
+            objective=data.get('objective', 'max_sharpe'),
+            covariance=data.get('covariance', 'ledoit_wolf'),
+            target_volatility=data.get('target_volatility'),
+            weight_bounds=data.get('weight_bounds', (0, 1)),
+            risk_free_rate=float(data.get('risk_free_rate', 0))))
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        app.logger.error(f"Error optimizing portfolio: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/api/backtest', methods=['POST'])
+def api_backtest():
+    """
+    API endpoint for the walk-forward backtest.
+    Takes {"tickers": [...], "period": "10y", "strategies": [...],
+    "cost_bps": 0} as JSON; only "tickers" is required.
+    """
+    data = request.get_json() or {}
+    tickers = data.get('tickers')
+
+    if not tickers or not isinstance(tickers, list):
+        return jsonify({"error": "A non-empty list of tickers is required"}), 400
+    if len(tickers) > MAX_BATCH_TICKERS:
+        return jsonify({"error": f"At most {MAX_BATCH_TICKERS} tickers per batch"}), 400
+
+    try:
+        return jsonify(backtest.run_backtest(tickers,
+                                             period=data.get('period', '10y'),
+                                             strategies=data.get('strategies'),
+                                             cost_bps=float(data.get('cost_bps', 0))))
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        app.logger.error(f"Error running backtest: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/api/market_making/sweep', methods=['POST'])
+def api_market_making_sweep():
+    """
+    API endpoint for an Avellaneda-Stoikov parameter sweep, simulated
+    across worker processes.
+    Takes {"ticker": ..., "gammas": [...], "kappas": [...]} as JSON; the
+    grids default to market_making.GAMMA_GRID and KAPPA_GRID.
+    """
+    data = request.get_json() or {}
+    ticker = data.get('ticker')
+
+    if not ticker:
+        return jsonify({"error": "A ticker is required"}), 400
+
+    try:
+        return jsonify(market_making.sweep_parameters(
+            ticker.upper(),
+            gammas=data.get('gammas', market_making.GAMMA_GRID),
+            kappas=data.get('kappas', market_making.KAPPA_GRID)))
+
+    except (ValueError, TypeError) as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        app.logger.error(f"Error running market making sweep: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/api/stat_arb/pairs', methods=['GET'])
+def api_stat_arb_pairs():
+    """
+    API endpoint for the pair index: cointegrated pair candidates across
+    the stored tickers, best first. ?ticker= keeps that ticker's pairs and
+    adds its best partner; ?limit= caps the pairs returned (default 50);
+    ?refresh=1 rebuilds the index first.
+    """
+    try:
+        limit = int(request.args.get('limit', 50))
+    except ValueError:
+        return jsonify({"error": "'limit' must be an integer"}), 400
+
+    try:
+        index = pairs.pair_index(refresh=request.args.get('refresh') == '1')
+        found = index['pairs']
+        response = {key: index[key] for key in ('built_at', 'as_of', 'period', 'universe', 'build_seconds')}
+
+        ticker = request.args.get('ticker')
+        if ticker:
+            ticker = ticker.upper()
+            found = [pair for pair in found if ticker in (pair['ticker1'], pair['ticker2'])]
+            response['ticker'] = ticker
+            response['best_partner'] = index['best_partner'].get(ticker)
+
+        response['pairs'] = found[:max(limit, 0)]
+        return jsonify(response)
+
+    except Exception as e:
+        app.logger.error(f"Error reading the pair index: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/api/jobs', methods=['POST'])
+def api_submit_job():
+    """
+    API endpoint to run an algorithm or the council in the background.
+    Takes {"type": "algorithm", "strategy": ..., "ticker1": ..., "ticker2": ...}
+    or {"type": "council", "ticker": ...} as JSON and returns the job
+    (202), which is shared with any identical request already in flight.
+    """
+    data = request.get_json() or {}
+    kind = data.get('type')
+
+    if kind == 'algorithm':
+        strategy_name = data.get('strategy')
+        if strategy_name not in STRATEGY_METADATA:
+            return jsonify({"error": "Strategy not found"}), 404
+        if not data.get('ticker1'):
+            return jsonify({"error": "Ticker 1 is required"}), 400
+        params = {'strategy_name': strategy_name, 'ticker1': data['ticker1'].upper()}
+        if STRATEGY_METADATA[strategy_name]['tickers_required'] == 2:
+            if not data.get('ticker2'):
+                return jsonify({"error": "Ticker 2 is required for this strategy"}), 400
+            params['ticker2'] = data['ticker2'].upper()
+    elif kind == 'council':
+        if not data.get('ticker'):
+            return jsonify({"error": "A ticker is required"}), 400
+        params = {'ticker': data['ticker'].upper()}
+    else:
+        return jsonify({"error": "'type' must be 'algorithm' or 'council'"}), 400
+
+    job = jobs.submit_job(kind, params)
+    response = jsonify(job)
+    response.status_code = 202
+    response.headers['Location'] = f"/api/jobs/{job['id']}"
+    return response
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def api_get_job(job_id):
+    """
+    API endpoint to poll a background job. 'status' is queued, running,
+    done or error; 'result' is set once it is done.
+    """
+    job = jobs.get_job(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
+
+
+@app.route('/api/jobs/<job_id>/stream', methods=['GET'])
+def api_stream_job(job_id):
+    """
+    API endpoint streaming a background job's status changes as
+    Server-Sent Events ('status' events, then one 'result' event).
+    """
+    if jobs.get_job(job_id) is None:
+        return jsonify({"error": "Job not found"}), 404
+
+    def generate():
+        for job in jobs.iter_job_updates(job_id, timeout=600):
+            event = 'result' if job['status'] in (jobs.DONE, jobs.ERROR) else 'status'
+            yield f"event: {event}\ndata: {json.dumps(job, default=str)}\n\n"
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache'})
+
+
 # ==========================================
 # ==         Error Handlers             ==
 # ==========================================
@@ -237,4 +668,4 @@ def internal_server_error(e):
 
 
 if __name__ == '__main__':
-    app.run(debug=True, port=5000
+    app.run(debug=True, port=5000)
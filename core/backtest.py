@@ -0,0 +1,224 @@
+import time
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import HistGradientBoostingClassifier
+from core.utils import fetch_price_matrix
+from core.indicators import sma_crossover, bollinger_bands, rolling_zscore
+from core.council import default_pair_ticker
+from algorithms import ml_predictive, stat_arb
+
+# Walk-forward backtester.
+# Every strategy is replayed over the whole (dates x tickers) price matrix
+# at once: its vote on each bar becomes a position (+1 Buy, -1 Sell,
+# 0 Hold) taken at that bar's close and held until the next close. Prices
+# come from the local price cache through fetch_price_matrix, so a rerun
+# over the same universe does not touch the network.
+
+# 'ml_pooled' replays the pooled cross-ticker model (the council's batch
+# ml_predictive vote), not the per-ticker Random Forest behind the
+# single-ticker ml_predictive strategy
+BACKTEST_STRATEGIES = ['momentum', 'mean_reversion', 'stat_arb', 'ml_pooled', 'council']
+
+TRADING_DAYS = 252
+
+# ml_pooled is refitted every ML_RETRAIN_BARS bars on the trailing
+# ML_TRAIN_BARS bars (the same 3y the live model uses), and only once
+# ML_MIN_TRAIN_BARS bars of history exist
+ML_RETRAIN_BARS = 63
+ML_TRAIN_BARS = 756
+ML_MIN_TRAIN_BARS = 252
+
+# Council members that always vote Hold (non-directional). The council
+# replay counts them so its tally uses the same thresholds as the live
+# council. The fundamentals/sentiment/MVO/RL members have no point-in-time
+# history to replay and are left out.
+COUNCIL_HOLD_VOTERS = ['volatility_forecast', 'market_making']
+
+
+# --- Positions per strategy ---
+
+def momentum_positions(close, short_window=50, long_window=200):
+    """+1 while the short SMA is above the long one, -1 below."""
+    signal = sma_crossover(close, short_window, long_window)['signal']
+    return np.nan_to_num(2 * signal - 1)
+
+
+def mean_reversion_positions(close, window=20, num_std_dev=2):
+    """+1 below the lower Bollinger Band, -1 above the upper one, 0 inside."""
+    bands = bollinger_bands(close, window, num_std_dev)
+    with np.errstate(invalid='ignore'):
+        return (close < bands['lower_band']).astype(float) - (close > bands['upper_band'])
+
+
+def stat_arb_positions(close, partner_close, window=20):
+    """
+    +1 (long the spread) when the log-spread Z-Score against each ticker's
+    partner is below -ENTRY_Z, -1 above ENTRY_Z, 0 otherwise.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z_score = rolling_zscore(np.log(close / partner_close), window)
+        return (z_score < -stat_arb.ENTRY_Z).astype(float) - (z_score > stat_arb.ENTRY_Z)
+
+
+def ml_positions(close, retrain_bars=ML_RETRAIN_BARS, train_bars=ML_TRAIN_BARS,
+                 min_train_bars=ML_MIN_TRAIN_BARS):
+    """
+    Walk-forward pooled ML model (the features of
+    ml_predictive.train_pooled_model): the model used on a bar was trained
+    only on rows whose next-day direction was already known at the
+    previous close. Returns (positions, number of fits).
+    """
+    features, target = ml_predictive.panel_features(close)
+    complete = np.isfinite(features).all(axis=-1)
+
+    positions = np.zeros(close.shape)
+    fits = 0
+    for start in range(min_train_bars, len(close), retrain_bars):
+        # The target on row t needs close t+1, so rows up to start-2 are
+        # known when trading at the close of start-1
+        window = slice(max(0, start - 1 - train_bars), start - 1)
+        trainable = complete[window] & np.isfinite(target[window])
+        y = target[window][trainable]
+        if len(np.unique(y)) < 2:
+            continue
+
+        model = HistGradientBoostingClassifier(max_iter=100, random_state=42)
+        model.fit(features[window][trainable], y.astype(int))
+        fits += 1
+
+        block = slice(start, min(start + retrain_bars, len(close)))
+        rows, cols = np.nonzero(complete[block])
+        if len(rows):
+            up = model.predict(features[block][rows, cols]) == 1
+            positions[block][rows, cols] = np.where(up, 1.0, -1.0)
+    return positions, fits
+
+
+def council_positions(positions):
+    """Majority vote over the replayed strategies, tallied like the live council."""
+    stacked = np.stack(list(positions.values()))
+    buy = (stacked > 0).sum(axis=0)
+    sell = (stacked < 0).sum(axis=0)
+    hold = (stacked == 0).sum(axis=0) + len(COUNCIL_HOLD_VOTERS)
+    return (buy > np.maximum(sell, hold)).astype(float) - (sell > np.maximum(buy, hold))
+
+
+# --- Performance ---
+
+def evaluate(positions, returns, cost_bps=0.0):
+    """
+    Scores a (dates x tickers) position matrix against the next-bar
+    returns. The strategy's daily return is the equal-weighted mean over
+    the tickers with a price that day. Returns (summary dict, daily
+    returns, per-ticker total P&L).
+    """
+    tradable = np.isfinite(returns)
+    held = np.where(tradable, positions, 0.0)
+
+    # Turnover: absolute change in position per ticker per bar
+    changes = np.abs(np.diff(held, axis=0, prepend=0.0))
+    pnl = held * np.nan_to_num(returns) - changes * cost_bps / 10000
+
+    counts = tradable.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        daily = np.where(counts > 0, pnl.sum(axis=1) / counts, 0.0)
+
+    active = (held != 0) & tradable
+    wins = (held * np.nan_to_num(returns) > 0) & active
+
+    std = daily.std(ddof=1) if len(daily) > 1 else 0.0
+    years = len(daily) / TRADING_DAYS
+    total = float(np.prod(1 + daily) - 1)
+    equity = np.cumprod(1 + daily)
+
+    summary = {
+        'total_return': total,
+        'annualized_return': float((1 + total) ** (1 / years) - 1) if years > 0 and total > -1 else float('nan'),
+        'sharpe': float(daily.mean() / std * np.sqrt(TRADING_DAYS)) if std > 0 else 0.0,
+        'hit_rate': float(wins.sum() / active.sum()) if active.any() else float('nan'),
+        'turnover': float(changes.sum() / max(tradable.sum(), 1)),
+        'max_drawdown': float((equity / np.maximum.accumulate(equity) - 1).min()) if len(equity) else 0.0,
+        'exposure': float(active.sum() / max(tradable.sum(), 1)),
+    }
+    return summary, daily, pnl.sum(axis=0)
+
+
+# --- Driver ---
+
+def run_backtest(tickers, period="10y", strategies=None, cost_bps=0.0, prices=None):
+    """
+    Walk-forward backtest of each of 'strategies' (default: all of
+    BACKTEST_STRATEGIES) over 'tickers'.
+    Positions are formed at each close from data up to that close and earn
+    the following bar's return. stat_arb trades each ticker's spread
+    against the benchmark partner (SPY, or QQQ for SPY). 'cost_bps' is
+    charged per unit of position change.
+    Returns {'strategies': {name: metrics}, 'per_ticker': {name: {ticker:
+    total P&L}}, 'equity_curves', 'dates', 'timings'}.
+    """
+    started = time.perf_counter()
+    tickers = list(dict.fromkeys(t.upper() for t in tickers))
+    strategies = strategies or BACKTEST_STRATEGIES
+    unknown = set(strategies) - set(BACKTEST_STRATEGIES)
+    if unknown:
+        raise ValueError(f"Cannot backtest: {', '.join(sorted(unknown))}")
+
+    # The fixed benchmark partner: today's best pair would look ahead
+    partners = {t: default_pair_ticker(t) for t in tickers}
+    if prices is None:
+        prices = fetch_price_matrix(sorted(set(tickers) | set(partners.values())), period=period)
+    timings = {'load': time.perf_counter() - started}
+
+    tickers = [t for t in tickers if t in prices.columns]
+    if not tickers or len(prices) < 2:
+        raise Exception("Not enough price data to backtest.")
+
+    close = prices[tickers].to_numpy(dtype=float)
+    returns = np.full(close.shape, np.nan)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        returns[:-1] = close[1:] / close[:-1] - 1
+
+    # The council vote needs every strategy it tallies
+    needed = BACKTEST_STRATEGIES[:-1] if 'council' in strategies else strategies
+    positions = {}
+    spread_returns = None
+    for name in needed:
+        step = time.perf_counter()
+        if name == 'momentum':
+            positions[name] = momentum_positions(close)
+        elif name == 'mean_reversion':
+            positions[name] = mean_reversion_positions(close)
+        elif name == 'stat_arb':
+            missing = [partners[t] for t in tickers if partners[t] not in prices.columns]
+            if missing:
+                raise Exception(f"No price data for stat_arb partner(s): {', '.join(sorted(set(missing)))}")
+            partner_close = prices[[partners[t] for t in tickers]].to_numpy(dtype=float)
+            positions[name] = stat_arb_positions(close, partner_close)
+            # The spread trade earns the ticker's return less its partner's
+            spread_returns = np.full(close.shape, np.nan)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                spread_returns[:-1] = returns[:-1] - (partner_close[1:] / partner_close[:-1] - 1)
+        elif name == 'ml_pooled':
+            positions[name], timings['ml_fits'] = ml_positions(close)
+        timings[name] = time.perf_counter() - step
+
+    if 'council' in strategies:
+        positions['council'] = council_positions(positions)
+
+    results, per_ticker, equity_curves = {}, {}, {}
+    for name in strategies:
+        strategy_returns = spread_returns if name == 'stat_arb' else returns
+        summary, daily, ticker_pnl = evaluate(positions[name], strategy_returns, cost_bps)
+        results[name] = summary
+        per_ticker[name] = dict(zip(tickers, ticker_pnl.tolist()))
+        equity_curves[name] = np.cumprod(1 + daily).tolist()
+
+    timings['total'] = time.perf_counter() - started
+    return {
+        'strategies': results,
+        'per_ticker': per_ticker,
+        'equity_curves': equity_curves,
+        'dates': [d.strftime('%Y-%m-%d') for d in pd.DatetimeIndex(prices.index)],
+        'tickers': tickers,
+        'timings': timings,
+    }
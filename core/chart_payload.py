@@ -0,0 +1,194 @@
+import base64
+import numpy as np
+import pandas as pd
+
+# Compact, columnar encoding of a strategy's chart_data.
+# The plain format sends every series as a JSON list of floats and the date
+# axis as 'YYYY-MM-DD' strings. The compact format sends:
+#   - the date axis once, as int32 offsets from an epoch start,
+#   - each series as base64 of its little-endian float32 bytes,
+#   - series holding one value throughout (e.g. stat_arb's +/-2 thresholds)
+#     as that single number,
+#   - signal markers (lists of dates) as int32 indices into the axis.
+# static/js/chart.js (decodeChartData) turns it back into the plain format.
+
+COMPACT_FORMAT = 'columnar-b64-v1'
+
+SECONDS_PER_DAY = 86400
+
+# chart_data keys listing dates on the axis, rather than one value per date
+MARKER_KEYS = ('buy_signals', 'sell_signals')
+
+
+def _b64(array, dtype):
+    return base64.b64encode(np.ascontiguousarray(array, dtype=dtype).tobytes()).decode('ascii')
+
+
+def _date_axis(labels):
+    """The axis as {'start', 'unit', 'offsets'}, or None if the labels are not dates."""
+    if not labels or not all(isinstance(label, str) for label in labels):
+        return None
+    try:
+        dates = pd.DatetimeIndex(labels)
+    except (ValueError, TypeError):
+        return None
+
+    # Seconds since the epoch, whatever resolution pandas parsed the dates at
+    seconds = ((dates - pd.Timestamp(0, tz=dates.tz)) // pd.Timedelta(seconds=1)).to_numpy()
+    start = int(seconds[0])
+    offsets = seconds - start
+    unit = SECONDS_PER_DAY if start % SECONDS_PER_DAY == 0 and not (offsets % SECONDS_PER_DAY).any() else 1
+    offsets = offsets // unit
+    if np.abs(offsets).max() >= 2 ** 31:
+        return None
+    return {'start': start, 'unit': unit, 'offsets': _b64(offsets, '<i4')}
+
+
+def _numeric(values, length):
+    """'values' as a float array if it is one value per axis point, else None."""
+    if isinstance(values, (str, dict)) or not hasattr(values, '__len__') or len(values) != length:
+        return None
+    try:
+        array = np.asarray(values, dtype=float)
+    except (ValueError, TypeError):
+        return None
+    return array if array.ndim == 1 else None
+
+
+def compact_chart_data(chart_data):
+    """
+    Encodes a time-series chart_data dict (with a 'labels' date axis) in
+    COMPACT_FORMAT. Values that do not fit the format are passed through
+    under 'other'. Charts without a date axis (e.g. feature importances)
+    are small already and are returned unchanged.
+    """
+    if not chart_data or 'labels' not in chart_data:
+        return chart_data
+
+    labels = list(chart_data['labels'])
+    axis = _date_axis(labels)
+    if axis is None:
+        return chart_data
+
+    length = len(labels)
+    compact = {
+        'format': COMPACT_FORMAT,
+        'length': length,
+        'axis': axis,
+        'series': {},
+        'constants': {},
+        'markers': {},
+        'other': {}
+    }
+
+    positions = {label: i for i, label in enumerate(labels)}
+    for key, values in chart_data.items():
+        if key == 'labels':
+            continue
+
+        if key in MARKER_KEYS:
+            indices = [positions[v] for v in values if v in positions]
+            compact['markers'][key] = _b64(indices, '<i4')
+            continue
+
+        array = _numeric(values, length)
+        if array is None:
+            compact['other'][key] = values
+        elif length and np.isfinite(array[0]) and (array == array[0]).all():
+            compact['constants'][key] = float(array[0])
+        else:
+            compact['series'][key] = _b64(array, '<f4')
+
+    return compact
+
+
+# --- Downsampling ---
+
+# Series LTTB picks points from, in order of preference; every other
+# series is sampled at the same points
+PRIMARY_SERIES = ('price', 'prices', 'z_score', 'volatility', 'sentiment')
+
+
+def lttb_indices(y, max_points, x=None):
+    """
+    Indices of the points Largest-Triangle-Three-Buckets keeps from 'y'
+    (always including the first and last point).
+    The series is split into max_points - 2 buckets; each bucket keeps the
+    point forming the largest triangle with the point kept from the bucket
+    before and the average of the bucket after. Buckets are laid out as one
+    padded 2-D array, so each step is a single vectorized argmax.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+
+    x = np.arange(n, dtype=float) if x is None else np.asarray(x, dtype=float)
+    # Gaps (e.g. an indicator's warm-up) must not win or poison a bucket
+    y = np.where(np.isfinite(y), y, np.nanmean(y) if np.isfinite(y).any() else 0.0)
+
+    edges = np.linspace(1, n - 1, max_points - 1).astype(int)
+    starts, ends = edges[:-1], edges[1:]
+
+    # Average point of every bucket, then shifted so bucket i sees bucket
+    # i + 1's average (the last bucket sees the final point)
+    csum_x = np.concatenate([[0.0], np.cumsum(x)])
+    csum_y = np.concatenate([[0.0], np.cumsum(y)])
+    sizes = ends - starts
+    avg_x = (csum_x[ends] - csum_x[starts]) / sizes
+    avg_y = (csum_y[ends] - csum_y[starts]) / sizes
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.append(avg_y[1:], y[-1])
+
+    offsets = np.arange(sizes.max())
+    columns = np.minimum(starts[:, None] + offsets, n - 1)
+    padding = offsets >= sizes[:, None]
+    bucket_x, bucket_y = x[columns], y[columns]
+
+    selected = np.empty(max_points, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(len(starts)):
+        area = np.abs((x[a] - next_x[i]) * (bucket_y[i] - y[a])
+                      - (x[a] - bucket_x[i]) * (next_y[i] - y[a]))
+        area[padding[i]] = -1.0
+        a = columns[i, area.argmax()]
+        selected[i + 1] = a
+    return selected
+
+
+def downsample_chart_data(chart_data, max_points, keep=()):
+    """
+    Reduces a time-series chart_data dict to about 'max_points' points with
+    LTTB on its primary series. Points marked by buy/sell signals, and the
+    positions in 'keep' (e.g. peaks), are always kept, so those markers
+    stay exact. Returns (chart_data, kept indices into the original axis).
+    """
+    labels = chart_data.get('labels') if chart_data else None
+    if labels is None or len(labels) <= max_points:
+        return chart_data, np.arange(len(labels) if labels is not None else 0)
+
+    n = len(labels)
+    positions = {label: i for i, label in enumerate(labels)}
+    forced = set(int(i) for i in keep)
+    for key in MARKER_KEYS:
+        forced.update(positions[v] for v in chart_data.get(key, ()) if v in positions)
+
+    primary = next((key for key in PRIMARY_SERIES if key in chart_data), None)
+    if primary is None:
+        primary = next((key for key, values in chart_data.items()
+                        if key != 'labels' and _numeric(values, n) is not None), None)
+    if primary is None:
+        return chart_data, np.arange(n)
+
+    sampled = lttb_indices(_numeric(chart_data[primary], n), max(max_points - len(forced), 3))
+    indices = np.union1d(sampled, np.fromiter(forced, dtype=int, count=len(forced)))
+
+    reduced = {}
+    for key, values in chart_data.items():
+        if key in MARKER_KEYS or isinstance(values, (str, dict)) \
+                or not hasattr(values, '__len__') or len(values) != n:
+            reduced[key] = values
+        else:
+            reduced[key] = [values[i] for i in indices]
+    return reduced, indices
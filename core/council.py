@@ -1,63 +1,256 @@
+import time
 import traceback
-from algorithms import stat_arb, momentum, mean_reversion, ml_predictive, \
-    reinforcement, factor_investing, market_making, sentiment, \
-    volatility_forecast, mean_variance_opt
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from core.utils import fetch_stock_data_many, BASE_PORTFOLIO
+from core.info_cache import get_ticker_info
+from core import pairs
+from core.strategy_registry import lazy_function
 
 # Define the functions to run.
 # Note: stat_arb and mean_variance are portfolio/pair-based.
-# We will run them with a common pair (e.g., SPY) for a baseline.
+# stat_arb runs against each ticker's best partner from the pair index
+# (core.pairs), or a common benchmark (SPY) without one.
 # This is a simplification to make them fit the single-ticker model.
+# The indicator strategies use their streaming (live) variants: the
+# council only needs the vote, not the full-history chart. For the same
+# reason market making (always a Hold) skips its simulation.
+# Strategies are given by import path and imported on first call.
 STRATEGIES_TO_RUN = {
-    'momentum': momentum.run_momentum,
-    'mean_reversion': mean_reversion.run_mean_reversion,
-    'ml_predictive': ml_predictive.run_ml_predictive,
-    'volatility_forecast': volatility_forecast.run_volatility_forecast,
-    'stat_arb': stat_arb.run_stat_arb,
-    'reinforcement': reinforcement.run_reinforcement,
-    'factor_investing': factor_investing.run_factor_investing,
-    'market_making': market_making.run_market_making,
-    'sentiment': sentiment.run_sentiment,
-    'mean_variance_opt': mean_variance_opt.run_mean_variance_opt
+    'momentum': lazy_function('algorithms.momentum:run_momentum_live'),
+    'mean_reversion': lazy_function('algorithms.mean_reversion:run_mean_reversion_live'),
+    'ml_predictive': lazy_function('algorithms.ml_predictive:run_ml_predictive'),
+    'volatility_forecast': lazy_function('algorithms.volatility_forecast:run_volatility_forecast'),
+    'stat_arb': lazy_function('algorithms.stat_arb:run_stat_arb_live'),
+    'reinforcement': lazy_function('algorithms.reinforcement:run_reinforcement'),
+    'factor_investing': lazy_function('algorithms.factor_investing:run_factor_investing'),
+    'market_making': lazy_function('algorithms.market_making:run_market_making_vote'),
+    'sentiment': lazy_function('algorithms.sentiment:run_sentiment'),
+    'mean_variance_opt': lazy_function('algorithms.mean_variance_opt:run_mean_variance_opt')
 }
 
-def run_council_decision(ticker):
+# The longest history any single-ticker strategy reads. Prefetching this
+# once lets the shorter periods ('1y', '2y', '60d') be served as slices.
+COUNCIL_DATA_PERIOD = '3y'
+
+# Seconds each strategy may run before its vote is dropped from the tally.
+# Strategies not listed here use DEFAULT_STRATEGY_TIMEOUT.
+DEFAULT_STRATEGY_TIMEOUT = 30
+STRATEGY_TIMEOUTS = {
+    'volatility_forecast': 45,
+    'ml_predictive': 45,
+    'mean_variance_opt': 45,
+}
+
+# Whole-universe versions of strategies, used by run_council_batch when it
+# runs more than one ticker. Each returns {ticker: result}.
+BATCH_STRATEGIES = {
+    'volatility_forecast': lazy_function('algorithms.garch_batch:run_volatility_forecast_batch'),
+    'ml_predictive': lazy_function('algorithms.ml_predictive:run_ml_predictive_pooled'),
+    'reinforcement': lazy_function('algorithms.reinforcement:run_reinforcement_batch'),
+}
+
+# Seconds the council waits for its prefetch before letting the strategies
+# load whatever is still missing themselves (each under its own timeout)
+PREFETCH_TIMEOUT = 30
+
+# Size of the shared thread pool used by run_council_batch
+COUNCIL_BATCH_WORKERS = 32
+
+
+def default_pair_ticker(ticker):
+    """The benchmark partner for stat_arb: SPY, or QQQ for SPY itself."""
+    return 'SPY' if ticker.upper() != 'SPY' else 'QQQ'
+
+
+def pair_ticker_for(ticker):
     """
-    Runs all 10 algorithms for a given ticker and aggregates their votes.
-    Generates a final decision and an AI prompt.
+    The partner used for stat_arb when the council runs it: the ticker's
+    most cointegrated partner in the pair index (core.pairs), else the
+    default benchmark.
+    """
+    try:
+        partner = pairs.best_partner(ticker)
+    except Exception as e:
+        print(f"Pair index unavailable: {e}")
+        partner = None
+    return partner or default_pair_ticker(ticker)
+
+
+def council_tickers(ticker):
+    """
+    Every ticker whose prices a council run on 'ticker' reads: the ticker,
+    its stat_arb partner and the mean_variance_opt base portfolio.
+    """
+    ticker = ticker.upper()
+    return list(dict.fromkeys([ticker, pair_ticker_for(ticker)] + BASE_PORTFOLIO))
+
+
+def prefetch_council_data(tickers, executor):
+    """
+    Loads every price series and Ticker.info snapshot the council will
+    read for 'tickers' in one batch, so the strategies that follow are
+    served from core.utils / core.info_cache instead of each making its
+    own round-trips. The shared benchmarks (stat_arb partners and the
+    mean_variance_opt base portfolio) are loaded once for the whole batch.
+    Gives up waiting after PREFETCH_TIMEOUT seconds; failures are left for
+    the strategies to report.
+    """
+    symbols = {t.upper() for t in tickers}
+    symbols.update(pair_ticker_for(t) for t in tickers)
+    symbols.update(BASE_PORTFOLIO)
+
+    def fetch_prices():
+        try:
+            fetch_stock_data_many(sorted(symbols), period=COUNCIL_DATA_PERIOD)
+        except Exception as e:
+            print(f"Error prefetching council data: {e}")
+
+    jobs = [executor.submit(fetch_prices)] + [executor.submit(get_ticker_info, t) for t in tickers]
+    _, not_done = wait(jobs, timeout=PREFETCH_TIMEOUT)
+    if not_done:
+        print(f"Council prefetch still running after {PREFETCH_TIMEOUT}s; continuing without it")
+
+
+def run_batch_strategies(tickers, executor, timings):
+    """
+    Runs every BATCH_STRATEGIES entry for 'tickers' concurrently on
+    'executor', each under its STRATEGY_TIMEOUTS limit, and returns
+    {name: {ticker: result}} for those that finished in time. The rest
+    (failed or timed out) are left out, so their strategies run per
+    ticker instead. Seconds per batch run go to timings[t]['batch_<name>'].
+    """
+    started = time.perf_counter()
+    futures = {executor.submit(func, tickers): name for name, func in BATCH_STRATEGIES.items()}
+    deadlines = {name: started + STRATEGY_TIMEOUTS.get(name, DEFAULT_STRATEGY_TIMEOUT)
+                 for name in BATCH_STRATEGIES}
+    results = {}
+
+    def record(name):
+        for t in tickers:
+            timings[t][f'batch_{name}'] = time.perf_counter() - started
+
+    pending = set(futures)
+    while pending:
+        now = time.perf_counter()
+        for future in [f for f in pending if deadlines[futures[f]] <= now and not f.done()]:
+            pending.discard(future)
+            name = futures[future]
+            record(name)
+            print(f"Batch run of {name} timed out, falling back to per-ticker runs")
+        if not pending:
+            break
+
+        wait_for = min(deadlines[futures[f]] for f in pending) - now
+        done, pending = wait(pending, timeout=max(wait_for, 0), return_when=FIRST_COMPLETED)
+        for future in done:
+            name = futures[future]
+            record(name)
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                print(f"Batch run of {name} failed, falling back to per-ticker runs: {e}")
+    return results
+
+
+def _call_strategy(name, func, ticker, started_at):
+    started = started_at[(ticker, name)] = time.perf_counter()
+    try:
+        if name == 'stat_arb':
+            # Handle pair-based strategies with the ticker's best partner
+            result = func(ticker, pair_ticker_for(ticker))
+        else:
+            result = func(ticker)
+        return result, None, time.perf_counter() - started
+    except Exception as e:
+        return None, (e, traceback.format_exc()), time.perf_counter() - started
+
+
+def iter_strategy_results(tickers, executor, strategies=None):
+    """
+    Runs every council strategy for each of 'tickers' on 'executor' and
+    yields (ticker, name, result, error, seconds) as each one finishes.
+    A strategy that runs past its timeout (counted from when it actually
+    started, not from when it was queued) is yielded with a TimeoutError
+    and abandoned. 'strategies' defaults to STRATEGIES_TO_RUN.
+    """
+    strategies = strategies or STRATEGIES_TO_RUN
+    started_at = {}
+    futures = {}
+    for ticker in tickers:
+        for name, func in strategies.items():
+            future = executor.submit(_call_strategy, name, func, ticker, started_at)
+            futures[future] = (ticker, name)
+
+    timeouts = {name: STRATEGY_TIMEOUTS.get(name, DEFAULT_STRATEGY_TIMEOUT) for name in strategies}
+    pending = set(futures)
+
+    while pending:
+        now = time.perf_counter()
+        deadlines = {}
+        for future in pending:
+            ticker, name = futures[future]
+            if (ticker, name) in started_at:
+                deadlines[future] = started_at[(ticker, name)] + timeouts[name]
+
+        for future in [f for f, deadline in deadlines.items() if deadline <= now]:
+            if future.done():
+                continue
+            pending.discard(future)
+            ticker, name = futures[future]
+            error = TimeoutError(f"{name} did not finish within {timeouts[name]}s")
+            yield ticker, name, None, (error, ''), now - started_at[(ticker, name)]
+
+        if not pending:
+            break
+
+        # A task that has not started yet cannot expire sooner than the
+        # shortest timeout from now, so that bounds how long we may wait
+        wait_for = min(timeouts.values())
+        if deadlines:
+            wait_for = min(wait_for, min(deadlines.values()) - now)
+        done, pending = wait(pending, timeout=max(wait_for, 0), return_when=FIRST_COMPLETED)
+        for future in done:
+            result, error, seconds = future.result()
+            ticker, name = futures[future]
+            yield ticker, name, result, error, seconds
+
+
+def build_council_result(ticker, outcomes, timings):
+    """
+    Tallies one ticker's strategy outcomes ({name: (result, error)}) into
+    the council's final decision and AI prompt.
     """
     votes = {'Buy': [], 'Sell': [], 'Hold': []}
     recommendations = {}
     ai_prompt_data = []
 
-    for name, func in STRATEGIES_TO_RUN.items():
-        try:
-            # Handle pair-based strategies with a default pair (SPY)
-            if name == 'stat_arb':
-                # Avoid running on itself
-                pair_ticker = 'SPY' if ticker.upper() != 'SPY' else 'QQQ'
-                result = func(ticker, pair_ticker)
-            # Handle other single-ticker strategies
-            else:
-                result = func(ticker)
+    # Walk the strategies in their canonical order, whatever order they
+    # happened to finish in
+    for name in STRATEGIES_TO_RUN:
+        if name not in outcomes:
+            continue
+        result, error = outcomes[name]
 
+        if error is None:
             rec = result.get('recommendation', 'Hold')
             summary = result.get('summary', 'No summary available.')
-            
+
             recommendations[name] = rec
             votes[rec].append(name)
-            
+
             ai_prompt_data.append(f"--- Algorithm: {name.title()} ---\n"
                                   f"Vote: {rec}\n"
                                   f"Rationale: {summary}\n")
-
-        except Exception as e:
+        else:
+            e, tb = error
             print(f"Error running {name}: {e}")
-            tb = traceback.format_exc()
             recommendations[name] = 'Error'
             ai_prompt_data.append(f"--- Algorithm: {name.title()} ---\n"
                                   f"Vote: Error\n"
                                   f"Rationale: {str(e)}\n{tb}\n")
 
+    ai_prompt_text = '\n'.join(ai_prompt_data)
+
     # --- Tally Votes ---
     buy_count = len(votes['Buy'])
     sell_count = len(votes['Sell'])
@@ -82,7 +275,7 @@ def run_council_decision(ticker):
         f"* **Sell ({sell_count}):** {', '.join(votes['Sell'])}\n"
         f"* **Hold ({hold_count}):** {', '.join(votes['Hold'])}\n\n"
         f"**Individual Algorithm Analysis:**\n\n"
-        f"{'\n'.join(ai_prompt_data)}\n"
+        f"{ai_prompt_text}\n"
         f"**Task:**\n"
         f"Synthesize all the above data. Act as a senior portfolio manager. "
         f"Write a detailed, nuanced investment decision. Consider the consensus "
@@ -95,5 +288,111 @@ def run_council_decision(ticker):
         'council_vote': council_vote,
         'votes': votes,
         'recommendations': recommendations,
-        'ai_prompt': full_ai_prompt
+        'ai_prompt': full_ai_prompt,
+        'timings': timings
     }
+
+
+def run_council_batch(tickers, max_workers=None):
+    """
+    Runs the full council over many tickers and yields each ticker's
+    result (as returned by run_council_decision, plus 'ticker') as soon as
+    all of its strategies have finished.
+    Data for the whole batch, including the shared benchmark series, is
+    prefetched once, and every (ticker, strategy) pair is fanned out over
+    one shared thread pool.
+    """
+    tickers = list(dict.fromkeys(t.upper() for t in tickers))
+    if max_workers is None:
+        max_workers = min(COUNCIL_BATCH_WORKERS, len(tickers) * len(STRATEGIES_TO_RUN))
+
+    executor = ThreadPoolExecutor(max_workers=max(max_workers, 1))
+    try:
+        prefetch_started = time.perf_counter()
+        prefetch_council_data(tickers, executor)
+        prefetch_seconds = time.perf_counter() - prefetch_started
+
+        outcomes = {t: {} for t in tickers}
+        timings = {t: {'prefetch': prefetch_seconds} for t in tickers}
+
+        strategies = dict(STRATEGIES_TO_RUN)
+        if len(tickers) > 1:
+            # Strategies with a whole-universe implementation run once for
+            # the batch (one vectorized GARCH fit, one pooled ML predict,
+            # one RL forward pass) instead of once per ticker
+            for name, batch_results in run_batch_strategies(tickers, executor, timings).items():
+                strategies[name] = batch_results.__getitem__
+
+        for ticker, name, result, error, seconds in iter_strategy_results(tickers, executor, strategies):
+            outcomes[ticker][name] = (result, error)
+            timings[ticker][name] = seconds
+
+            if len(outcomes[ticker]) == len(STRATEGIES_TO_RUN):
+                council_result = build_council_result(ticker, outcomes.pop(ticker), timings.pop(ticker))
+                council_result['ticker'] = ticker
+                yield council_result
+    finally:
+        # Don't block on a strategy that has timed out; its thread is abandoned
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def stream_council_decision(ticker):
+    """
+    Runs the council for one ticker like run_council_decision, but yields
+    progress as it goes: ('vote', {...}) for each strategy as soon as it
+    finishes, carrying the running tally, then ('decision', result) last
+    with the same result run_council_decision returns.
+    """
+    started = time.perf_counter()
+    executor = ThreadPoolExecutor(max_workers=len(STRATEGIES_TO_RUN))
+    try:
+        prefetch_council_data([ticker], executor)
+        outcomes = {}
+        timings = {'prefetch': time.perf_counter() - started}
+        tally = {'Buy': 0, 'Sell': 0, 'Hold': 0, 'Error': 0}
+
+        for _, name, result, error, seconds in iter_strategy_results([ticker], executor):
+            outcomes[name] = (result, error)
+            timings[name] = seconds
+
+            if error is None:
+                rec = result.get('recommendation', 'Hold')
+                summary = result.get('summary', 'No summary available.')
+            else:
+                rec = 'Error'
+                summary = str(error[0])
+            tally[rec] += 1
+
+            yield 'vote', {
+                'strategy': name,
+                'recommendation': rec,
+                'summary': summary,
+                'seconds': seconds,
+                'tally': dict(tally),
+                'completed': len(outcomes),
+                'total': len(STRATEGIES_TO_RUN)
+            }
+
+        council_result = build_council_result(ticker, outcomes, timings)
+        council_result['elapsed'] = time.perf_counter() - started
+        yield 'decision', council_result
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def run_council_decision(ticker):
+    """
+    Runs all 10 algorithms for a given ticker and aggregates their votes.
+    Data is prefetched in one batch, then the strategies run concurrently
+    on a thread pool with per-strategy timeouts (STRATEGY_TIMEOUTS).
+    Generates a final decision, an AI prompt and per-strategy timings.
+    """
+    started = time.perf_counter()
+    batch = run_council_batch([ticker], max_workers=len(STRATEGIES_TO_RUN))
+    try:
+        council_result = next(batch)
+    finally:
+        batch.close()
+    council_result.pop('ticker')
+    council_result['elapsed'] = time.perf_counter() - started
+    return council_result
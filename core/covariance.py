@@ -0,0 +1,157 @@
+import numpy as np
+import pandas as pd
+
+# Covariance estimates built from Gram matrices of centred daily returns.
+# Keeping X'X and (X*X)'(X*X) around means a new asset can be added by
+# computing only its border (one column against the k existing ones, O(n k))
+# instead of rebuilding the whole k x k estimate, and both the sample and
+# the Ledoit-Wolf shrunk covariance follow from the same two matrices.
+
+TRADING_DAYS = 252
+
+# Principal components kept by the statistical factor covariance
+FACTOR_COUNT = 5
+
+COVARIANCE_METHODS = ['sample', 'ledoit_wolf', 'factor']
+
+
+def daily_returns(prices):
+    """Simple daily returns of a (dates x tickers) price frame, rows with any gap dropped."""
+    return prices.pct_change().iloc[1:].dropna()
+
+
+def mean_historical_return(prices):
+    """Annualized compounded mean return per column (as pypfopt's mean_historical_return)."""
+    returns = prices.pct_change().dropna(how='all')
+    return (1 + returns).prod() ** (TRADING_DAYS / returns.count()) - 1
+
+
+class GramCovariance:
+    """
+    Centred returns X (n dates x k assets) together with X'X and
+    (X*X)'(X*X). Use bordered() to add an asset on the same dates.
+    """
+
+    def __init__(self, returns):
+        values = returns.to_numpy(dtype=float)
+        X = values - values.mean(axis=0)
+        self._set(returns.index, list(returns.columns), X, X.T @ X, (X ** 2).T @ (X ** 2))
+
+    def _set(self, index, columns, X, gram, gram_sq):
+        self.index = index
+        self.columns = columns
+        self.X = X
+        self.gram = gram
+        self.gram_sq = gram_sq
+
+    @property
+    def n(self):
+        return len(self.X)
+
+    def bordered(self, column):
+        """
+        A new GramCovariance with 'column' (a Series of daily returns on
+        exactly these dates) appended as the last asset. Only the new row
+        and column of each Gram matrix are computed.
+        """
+        x = column.reindex(self.index).to_numpy(dtype=float)
+        if not np.isfinite(x).all():
+            raise ValueError(f"{column.name} does not cover the cached dates")
+        x = x - x.mean()
+        x_sq = x ** 2
+
+        gram = np.empty((len(self.columns) + 1,) * 2)
+        gram[:-1, :-1] = self.gram
+        gram[-1, :-1] = gram[:-1, -1] = self.X.T @ x
+        gram[-1, -1] = x @ x
+
+        gram_sq = np.empty_like(gram)
+        gram_sq[:-1, :-1] = self.gram_sq
+        gram_sq[-1, :-1] = gram_sq[:-1, -1] = (self.X ** 2).T @ x_sq
+        gram_sq[-1, -1] = x_sq @ x_sq
+
+        bordered = GramCovariance.__new__(GramCovariance)
+        bordered._set(self.index, self.columns + [column.name], np.column_stack([self.X, x]), gram, gram_sq)
+        return bordered
+
+    def _frame(self, matrix):
+        return pd.DataFrame(matrix * TRADING_DAYS, index=self.columns, columns=self.columns)
+
+    def sample(self):
+        """Annualized sample covariance (ddof=1, as pypfopt's sample_cov)."""
+        return self._frame(self.gram / (self.n - 1))
+
+    def ledoit_wolf_shrinkage(self):
+        """
+        Ledoit-Wolf shrinkage intensity towards a scaled identity, the same
+        estimate sklearn.covariance.ledoit_wolf computes from X.
+        """
+        n, p = self.n, len(self.columns)
+        emp_cov = self.gram / n
+        mu = np.trace(emp_cov) / p
+
+        delta_ = (self.gram ** 2).sum() / n ** 2
+        beta_ = self.gram_sq.sum()
+        delta = (delta_ - 2 * mu * np.trace(emp_cov) + p * mu ** 2) / p
+        beta = min((beta_ / n - delta_) / (p * n), delta)
+        return 0.0 if beta == 0 else beta / delta
+
+    def ledoit_wolf(self):
+        """Annualized Ledoit-Wolf shrunk covariance (as pypfopt's CovarianceShrinkage.ledoit_wolf)."""
+        emp_cov = self.gram / self.n
+        shrinkage = self.ledoit_wolf_shrinkage()
+        target = np.trace(emp_cov) / len(self.columns) * np.eye(len(self.columns))
+        return self._frame((1 - shrinkage) * emp_cov + shrinkage * target)
+
+    def _principal_loadings(self, n_factors):
+        """Daily loadings on the top 'n_factors' principal components, and the residual variances."""
+        sample = self.gram / (self.n - 1)
+        n_factors = min(n_factors, len(self.columns))
+        eigenvalues, eigenvectors = np.linalg.eigh(sample)
+        loadings = eigenvectors[:, -n_factors:] * np.sqrt(np.clip(eigenvalues[-n_factors:], 0.0, None))
+        residual = np.clip(np.diag(sample) - (loadings ** 2).sum(axis=1), 0.0, None)
+        return loadings, residual
+
+    def factor(self, n_factors=FACTOR_COUNT):
+        """
+        Annualized statistical factor covariance: the top 'n_factors'
+        principal components of the sample covariance plus a diagonal of
+        each asset's residual (idiosyncratic) variance.
+        """
+        loadings, residual = self._principal_loadings(n_factors)
+        return self._frame(loadings @ loadings.T + np.diag(residual))
+
+    def factor_form(self, method='sample'):
+        """
+        The 'method' estimate as annualized (exposures B, idiosyncratic d)
+        with covariance = B B' + diag(d), so an optimizer can write the
+        variance of w as |B'w|^2 + sum(d w^2) without forming the k x k
+        matrix. B's columns are the principal components for 'factor'; for
+        'sample' and 'ledoit_wolf' they span the centred daily returns.
+        """
+        k = len(self.columns)
+        if method in ('sample', 'ledoit_wolf'):
+            # With more dates than assets, the triangular R of X = QR has
+            # the same Gram matrix (R'R = X'X) in fewer entries
+            root = np.linalg.qr(self.X, mode='r').T if self.n > k else self.X.T
+        if method == 'sample':
+            return root * np.sqrt(TRADING_DAYS / (self.n - 1)), np.zeros(k)
+        if method == 'ledoit_wolf':
+            shrinkage = self.ledoit_wolf_shrinkage()
+            target = np.trace(self.gram / self.n) / k
+            return (root * np.sqrt((1 - shrinkage) * TRADING_DAYS / self.n),
+                    np.full(k, shrinkage * target * TRADING_DAYS))
+        if method == 'factor':
+            loadings, residual = self._principal_loadings(FACTOR_COUNT)
+            return loadings * np.sqrt(TRADING_DAYS), residual * TRADING_DAYS
+        raise ValueError(f"Unknown covariance method: {method}")
+
+    def covariance(self, method='sample'):
+        """The 'sample', 'ledoit_wolf' or 'factor' estimate."""
+        if method == 'sample':
+            return self.sample()
+        if method == 'ledoit_wolf':
+            return self.ledoit_wolf()
+        if method == 'factor':
+            return self.factor()
+        raise ValueError(f"Unknown covariance method: {method}")
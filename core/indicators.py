@@ -0,0 +1,125 @@
+import numpy as np
+
+# Vectorized indicator engine.
+# Every function takes a price array shaped (dates x tickers) - or a 1-D
+# array for a single ticker - and computes the indicator for all columns at
+# once. Rolling windows use cumulative sums, so each one costs O(n) no
+# matter the window length. A window containing any NaN (e.g. before a
+# ticker's listing date) yields NaN, matching pandas' rolling(window).
+
+
+def _as_2d(values):
+    array = np.asarray(values, dtype=float)
+    if array.ndim == 1:
+        return array[:, None], True
+    return array, False
+
+
+def _restore(array, was_1d):
+    return array[:, 0] if was_1d else array
+
+
+def _window_sums(array, window):
+    """Rolling sums and valid-value counts over 'window' rows."""
+    valid = np.isfinite(array)
+    filled = np.where(valid, array, 0.0)
+
+    # Prepend a zero row so that sum[i] = csum[i + 1] - csum[i + 1 - window]
+    csum = np.vstack([np.zeros((1, array.shape[1])), np.cumsum(filled, axis=0)])
+    ccount = np.vstack([np.zeros((1, array.shape[1]), dtype=int), np.cumsum(valid, axis=0)])
+
+    sums = np.full(array.shape, np.nan)
+    counts = np.zeros(array.shape, dtype=int)
+    sums[window - 1:] = csum[window:] - csum[:-window]
+    counts[window - 1:] = ccount[window:] - ccount[:-window]
+    return sums, counts
+
+
+def rolling_mean(values, window):
+    """Simple moving average over 'window' rows, per column."""
+    array, was_1d = _as_2d(values)
+    if window > len(array):
+        return _restore(np.full(array.shape, np.nan), was_1d)
+
+    sums, counts = _window_sums(array, window)
+    mean = np.where(counts == window, sums / window, np.nan)
+    return _restore(mean, was_1d)
+
+
+def rolling_std(values, window, ddof=1):
+    """Rolling standard deviation over 'window' rows, per column (ddof=1 like pandas)."""
+    array, was_1d = _as_2d(values)
+    if window > len(array) or window <= ddof:
+        return _restore(np.full(array.shape, np.nan), was_1d)
+
+    # Centre each column first: sum(x^2) - sum(x)^2 / n loses precision
+    # badly when the values are large relative to their spread (prices).
+    with np.errstate(invalid='ignore'):
+        shift = np.nanmean(array, axis=0)
+    centred = array - np.nan_to_num(shift)
+
+    sums, counts = _window_sums(centred, window)
+    sq_sums, _ = _window_sums(centred ** 2, window)
+
+    var = (sq_sums - sums ** 2 / window) / (window - ddof)
+    std = np.sqrt(np.clip(var, 0.0, None))
+    return _restore(np.where(counts == window, std, np.nan), was_1d)
+
+
+def sma_crossover(prices, short_window=50, long_window=200):
+    """
+    SMA crossover state per column.
+    Returns a dict of 'sma_short', 'sma_long', 'signal' (1.0 while the short
+    SMA is above the long one, 0.0 below, NaN before both exist) and
+    'position' (+1 on the bar the short SMA crosses above, -1 on a cross
+    below, 0 otherwise).
+    """
+    sma_short = rolling_mean(prices, short_window)
+    sma_long = rolling_mean(prices, long_window)
+
+    defined = np.isfinite(sma_short) & np.isfinite(sma_long)
+    signal = np.where(defined, (sma_short > sma_long).astype(float), np.nan)
+
+    position = np.zeros_like(signal)
+    position[1:] = np.nan_to_num(np.diff(signal, axis=0))
+
+    return {
+        'sma_short': sma_short,
+        'sma_long': sma_long,
+        'signal': signal,
+        'position': position,
+    }
+
+
+def bollinger_bands(prices, window=20, num_std_dev=2):
+    """Bollinger Bands per column: 'sma', 'std', 'upper_band', 'lower_band'."""
+    sma = rolling_mean(prices, window)
+    std = rolling_std(prices, window)
+    return {
+        'sma': sma,
+        'std': std,
+        'upper_band': sma + std * num_std_dev,
+        'lower_band': sma - std * num_std_dev,
+    }
+
+
+def rolling_zscore(values, window=20):
+    """Z-score of each value against its own trailing 'window' mean and std."""
+    mean = rolling_mean(values, window)
+    std = rolling_std(values, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (np.asarray(values, dtype=float) - mean) / std
+
+
+def last_valid(values):
+    """
+    The last finite value in each column (NaN where a column has none).
+    Screens use it to read "today's" indicator for every ticker at once.
+    """
+    array, was_1d = _as_2d(values)
+    valid = np.isfinite(array)
+    # Row index of the last valid value per column (0 if none)
+    rows = np.where(valid.any(axis=0), len(array) - 1 - np.argmax(valid[::-1], axis=0), 0)
+    latest = array[rows, np.arange(array.shape[1])]
+    latest = np.where(valid.any(axis=0), latest, np.nan)
+    return latest[0] if was_1d else latest
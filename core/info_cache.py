@@ -0,0 +1,85 @@
+import time
+import threading
+import yfinance as yf
+from concurrent.futures import Future
+
+# How long (in seconds) each Ticker.info field may be served from cache.
+# Quotes move by the second, fundamentals daily, descriptions rarely.
+FIELD_TTLS = {
+    'bid': 5,
+    'ask': 5,
+    'bidSize': 5,
+    'askSize': 5,
+    'currentPrice': 5,
+    'regularMarketPrice': 5,
+    'trailingPE': 24 * 3600,
+    'forwardPE': 24 * 3600,
+    'returnOnEquity': 24 * 3600,
+    'longBusinessSummary': 7 * 24 * 3600,
+    'longName': 7 * 24 * 3600,
+    'shortName': 7 * 24 * 3600,
+}
+
+# TTL for any field not listed above, and for whole-snapshot reads
+DEFAULT_TTL = 3600
+
+# ticker -> (info dict, fetched_at)
+_SNAPSHOTS = {}
+# ticker -> Future for a fetch currently in progress
+_IN_FLIGHT = {}
+_LOCK = threading.Lock()
+
+
+def _is_fresh(fetched_at, fields):
+    age = time.time() - fetched_at
+    if not fields:
+        return age <= DEFAULT_TTL
+    return all(age <= FIELD_TTLS.get(field, DEFAULT_TTL) for field in fields)
+
+
+def get_ticker_info(ticker, fields=None):
+    """
+    Returns yf.Ticker(ticker).info through a shared, TTL-aware cache.
+    'fields' lists the keys the caller is about to read; the cached
+    snapshot is reused as long as every one of them is within its TTL
+    (see FIELD_TTLS). Concurrent callers asking for the same symbol wait
+    on a single in-flight request and all receive the same snapshot.
+    """
+    ticker = ticker.upper()
+
+    with _LOCK:
+        snapshot = _SNAPSHOTS.get(ticker)
+        if snapshot and _is_fresh(snapshot[1], fields):
+            return snapshot[0]
+
+        future = _IN_FLIGHT.get(ticker)
+        is_owner = future is None
+        if is_owner:
+            future = Future()
+            _IN_FLIGHT[ticker] = future
+
+    if not is_owner:
+        return future.result()
+
+    try:
+        info = yf.Ticker(ticker).info or {}
+    except Exception as e:
+        with _LOCK:
+            _IN_FLIGHT.pop(ticker, None)
+        future.set_exception(e)
+        raise
+
+    with _LOCK:
+        _SNAPSHOTS[ticker] = (info, time.time())
+        _IN_FLIGHT.pop(ticker, None)
+    future.set_result(info)
+    return info
+
+
+def clear_ticker_info(ticker=None):
+    """Drops the cached snapshot for one ticker, or for all of them."""
+    with _LOCK:
+        if ticker is None:
+            _SNAPSHOTS.clear()
+        else:
+            _SNAPSHOTS.pop(ticker.upper(), None)
@@ -0,0 +1,247 @@
+import os
+import json
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+# Background jobs for long-running requests (strategy runs, council runs).
+# A request submits a job and returns at once; the work runs on an
+# in-process thread pool and the client polls or streams the job's status.
+# Identical requests (same type and parameters) share one job while it is
+# queued or running, and its result is reused for JOB_RESULT_TTL seconds.
+#
+# Job records live in memory by default. Setting FIAI_REDIS_URL (and
+# installing the redis package) keeps them in Redis instead, so every web
+# worker sees the same jobs and deduplicates against each other.
+
+# Threads per job type; types not listed use DEFAULT_JOB_WORKERS
+DEFAULT_JOB_WORKERS = 4
+JOB_WORKERS = {
+    'algorithm': 8,
+    'council': 2,
+}
+
+# Seconds a finished job's result is handed to identical new requests
+JOB_RESULT_TTL = 300
+
+# Seconds a finished job stays pollable before it is forgotten
+JOB_RETENTION = 3600
+
+REDIS_URL = os.environ.get('FIAI_REDIS_URL')
+
+QUEUED, RUNNING, DONE, ERROR = 'queued', 'running', 'done', 'error'
+
+_HANDLERS = {}
+_EXECUTORS = {}
+_EXECUTORS_LOCK = threading.Lock()
+
+
+def _reusable(job, now=None):
+    """True if a new identical request should be given this job."""
+    if job is None:
+        return False
+    if job['status'] in (QUEUED, RUNNING):
+        return True
+    now = now or time.time()
+    return job['status'] == DONE and now - job['finished_at'] < JOB_RESULT_TTL
+
+
+class MemoryJobStore:
+    """Job records in a dict, shared by the threads of one process."""
+
+    def __init__(self):
+        self._jobs = {}
+        self._keys = {}
+        self._changed = threading.Condition()
+
+    def claim(self, key, job):
+        """
+        Stores 'job' under 'key' unless a reusable job already holds it.
+        Returns whichever job now holds the key.
+        """
+        with self._changed:
+            self._prune()
+            existing = self._jobs.get(self._keys.get(key))
+            if _reusable(existing):
+                return existing
+            self._keys[key] = job['id']
+            self._jobs[job['id']] = job
+            return job
+
+    def get(self, job_id):
+        with self._changed:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def update(self, job_id, **fields):
+        with self._changed:
+            self._jobs[job_id].update(fields)
+            self._changed.notify_all()
+
+    def wait(self, job_id, timeout):
+        """Blocks until any job changes, or 'timeout' seconds pass."""
+        with self._changed:
+            self._changed.wait(timeout)
+
+    def _prune(self):
+        cutoff = time.time() - JOB_RETENTION
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job['finished_at'] and job['finished_at'] < cutoff]
+        for job_id in expired:
+            job = self._jobs.pop(job_id)
+            if self._keys.get(job['key']) == job_id:
+                del self._keys[job['key']]
+
+
+class RedisJobStore:
+    """Job records in Redis (as JSON), shared by every worker process."""
+
+    def __init__(self, url):
+        self._redis = redis.Redis.from_url(url)
+
+    def _job_key(self, job_id):
+        return f"fiai:job:{job_id}"
+
+    def _dedup_key(self, key):
+        return f"fiai:jobkey:{key}"
+
+    def _put(self, job):
+        self._redis.set(self._job_key(job['id']), json.dumps(job, default=str), ex=JOB_RETENTION)
+
+    def claim(self, key, job):
+        self._put(job)
+        if self._redis.set(self._dedup_key(key), job['id'], nx=True, ex=JOB_RETENTION):
+            return job
+
+        held_id = self._redis.get(self._dedup_key(key))
+        existing = self.get(held_id.decode()) if held_id else None
+        if _reusable(existing):
+            self._redis.delete(self._job_key(job['id']))
+            return existing
+        self._redis.set(self._dedup_key(key), job['id'], ex=JOB_RETENTION)
+        return job
+
+    def get(self, job_id):
+        raw = self._redis.get(self._job_key(job_id))
+        return json.loads(raw) if raw else None
+
+    def update(self, job_id, **fields):
+        job = self.get(job_id)
+        if job is not None:
+            job.update(fields)
+            self._put(job)
+
+    def wait(self, job_id, timeout):
+        time.sleep(min(timeout, 0.5))
+
+
+_STORE = None
+_STORE_LOCK = threading.Lock()
+
+
+def job_store():
+    """The process-wide job store (Redis if FIAI_REDIS_URL is set and usable)."""
+    global _STORE
+    with _STORE_LOCK:
+        if _STORE is None:
+            if REDIS_URL and redis is not None:
+                _STORE = RedisJobStore(REDIS_URL)
+            else:
+                if REDIS_URL:
+                    print("FIAI_REDIS_URL is set but the redis package is not installed; keeping jobs in memory")
+                _STORE = MemoryJobStore()
+        return _STORE
+
+
+def register_job_type(kind, func):
+    """Makes 'kind' submittable; its jobs run func(**params)."""
+    _HANDLERS[kind] = func
+
+
+def _executor(kind):
+    with _EXECUTORS_LOCK:
+        if kind not in _EXECUTORS:
+            _EXECUTORS[kind] = ThreadPoolExecutor(
+                max_workers=JOB_WORKERS.get(kind, DEFAULT_JOB_WORKERS),
+                thread_name_prefix=f"job-{kind}")
+        return _EXECUTORS[kind]
+
+
+def job_key(kind, params):
+    """The deduplication key: job type plus its parameters."""
+    return f"{kind}:{json.dumps(params, sort_keys=True, default=str)}"
+
+
+def _run_job(job_id, kind, params):
+    store = job_store()
+    store.update(job_id, status=RUNNING, started_at=time.time())
+    try:
+        result = _HANDLERS[kind](**params)
+        # Strategies report their own failures as {"error": ...}; those
+        # results are not handed out again
+        if isinstance(result, dict) and 'error' in result:
+            store.update(job_id, status=ERROR, error=result['error'], result=result, finished_at=time.time())
+        else:
+            store.update(job_id, status=DONE, result=result, finished_at=time.time())
+    except Exception as e:
+        store.update(job_id, status=ERROR, error=str(e), finished_at=time.time())
+
+
+def submit_job(kind, params):
+    """
+    Queues a job of type 'kind' with 'params' (a JSON-able dict) and
+    returns its record. If an identical job is queued, running or finished
+    within JOB_RESULT_TTL, that job is returned instead.
+    """
+    if kind not in _HANDLERS:
+        raise ValueError(f"Unknown job type: {kind}")
+
+    job = {
+        'id': uuid.uuid4().hex,
+        'key': job_key(kind, params),
+        'type': kind,
+        'params': params,
+        'status': QUEUED,
+        'submitted_at': time.time(),
+        'started_at': None,
+        'finished_at': None,
+        'result': None,
+        'error': None,
+    }
+    held = job_store().claim(job['key'], job)
+    if held['id'] == job['id']:
+        _executor(kind).submit(_run_job, job['id'], kind, params)
+    return dict(held)
+
+
+def get_job(job_id):
+    """The job's current record, or None if it is unknown or expired."""
+    return job_store().get(job_id)
+
+
+def iter_job_updates(job_id, timeout=None):
+    """
+    Yields the job's record each time its status changes, ending with the
+    finished (done or error) record. Stops early after 'timeout' seconds.
+    """
+    store = job_store()
+    deadline = time.time() + timeout if timeout else None
+    last_status = None
+    while True:
+        job = store.get(job_id)
+        if job is None:
+            return
+        if job['status'] != last_status:
+            last_status = job['status']
+            yield job
+        if job['status'] in (DONE, ERROR):
+            return
+        if deadline and time.time() >= deadline:
+            return
+        store.wait(job_id, timeout=1.0)
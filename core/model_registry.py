@@ -0,0 +1,131 @@
+import os
+import json
+import time
+import hashlib
+import threading
+import joblib
+from collections import OrderedDict
+from core import price_store
+
+# Root directory for fitted models, laid out as
+#   <MODEL_DIR>/<model name>/<TICKER>/<feature set hash>/<train end>.joblib
+# with a .json sidecar holding the metadata recorded at training time.
+# Saving a model deletes the older training windows in its folder.
+MODEL_DIR = os.path.join(os.path.dirname(price_store.PRICE_STORE_DIR), 'models')
+
+# Most recently used loaded models kept in memory, keyed by file path, so
+# serving a prediction does not re-read the file from disk. An entry is
+# only reused while the files' modification times are unchanged: another
+# worker may have retrained the same window and rewritten them.
+MODEL_CACHE_SIZE = 32
+_LOADED = OrderedDict()
+_LOCK = threading.Lock()
+
+
+def feature_set_id(features):
+    """A short, stable id for an ordered list of feature names."""
+    return hashlib.sha1('|'.join(features).encode()).hexdigest()[:12]
+
+
+def _folder(name, ticker, features):
+    return os.path.join(MODEL_DIR, name, ticker.upper().replace('/', '_'), feature_set_id(features))
+
+
+def _stamp(stem):
+    """Modification times of a stored model and its sidecar (OSError if missing)."""
+    return os.stat(stem + '.joblib').st_mtime_ns, os.stat(stem + '.json').st_mtime_ns
+
+
+def _remember(stem, stamp, model, meta):
+    with _LOCK:
+        _LOADED[stem] = (stamp, model, meta)
+        _LOADED.move_to_end(stem)
+        while len(_LOADED) > MODEL_CACHE_SIZE:
+            _LOADED.popitem(last=False)
+
+
+def _stems(folder):
+    return sorted(f[:-len('.joblib')] for f in os.listdir(folder) if f.endswith('.joblib'))
+
+
+def _prune(folder, keep):
+    """Deletes the training windows in 'folder' older than 'keep'."""
+    for older in [stem for stem in _stems(folder) if stem < keep]:
+        path = os.path.join(folder, older)
+        with _LOCK:
+            _LOADED.pop(path, None)
+        for suffix in ('.joblib', '.json'):
+            try:
+                os.remove(path + suffix)
+            except OSError:
+                pass
+
+
+def save_model(name, ticker, features, train_end, model, metadata=None):
+    """
+    Stores a fitted model under (name, ticker, feature set, training-window
+    end date), replacing any older training windows. Returns the metadata
+    written alongside it.
+    """
+    folder = _folder(name, ticker, features)
+    os.makedirs(folder, exist_ok=True)
+
+    stem = os.path.join(folder, str(train_end.date()) if hasattr(train_end, 'date') else str(train_end))
+    meta = dict(metadata or {})
+    meta.update({
+        'name': name,
+        'ticker': ticker.upper(),
+        'features': list(features),
+        'train_end': str(train_end),
+        'trained_at': time.time(),
+    })
+
+    def write_meta(path):
+        with open(path, 'w') as f:
+            json.dump(meta, f)
+
+    price_store.atomic_write(stem + '.joblib', lambda path: joblib.dump(model, path))
+    price_store.atomic_write(stem + '.json', write_meta)
+
+    _remember(stem, _stamp(stem), model, meta)
+    _prune(folder, os.path.basename(stem))
+    return meta
+
+
+def load_latest_model(name, ticker, features):
+    """
+    Returns (model, metadata) for the most recent training window stored
+    for (name, ticker, feature set), or (None, None) if there is none.
+    """
+    folder = _folder(name, ticker, features)
+    # A second pass covers the latest window being pruned by a concurrent
+    # save between listing the folder and reading it
+    for _ in range(2):
+        try:
+            stems = _stems(folder)
+        except OSError:
+            return None, None
+        if not stems:
+            return None, None
+
+        stem = os.path.join(folder, stems[-1])
+        try:
+            stamp = _stamp(stem)
+        except OSError:
+            continue
+        with _LOCK:
+            entry = _LOADED.get(stem)
+            if entry is not None and entry[0] == stamp:
+                _LOADED.move_to_end(stem)
+                return entry[1], entry[2]
+
+        try:
+            model = joblib.load(stem + '.joblib')
+            with open(stem + '.json') as f:
+                meta = json.load(f)
+        except (OSError, ValueError, EOFError):
+            continue
+
+        _remember(stem, stamp, model, meta)
+        return model, meta
+    return None, None
@@ -0,0 +1,273 @@
+import os
+import json
+import time
+import threading
+import numpy as np
+import pandas as pd
+from core import price_store
+
+# Pair discovery for stat_arb.
+# 1. The correlation matrix of daily log returns of every ticker in the
+#    price store, as one matrix product of the standardized returns.
+# 2. Each ticker's CANDIDATES_PER_TICKER most correlated partners (above
+#    MIN_CORRELATION) are tested for cointegration with Engle-Granger
+#    (OLS hedge regression, then an ADF test on its residuals), all
+#    candidate pairs at once.
+# 3. The result is stored as a JSON index, rebuilt once it is older than
+#    PAIR_INDEX_TTL, and each ticker's best partner is a dict lookup.
+
+PAIR_INDEX_PATH = os.path.join(os.path.dirname(price_store.PRICE_STORE_DIR), 'pairs', 'index.json')
+PAIR_INDEX_TTL = 24 * 3600
+
+PAIR_PERIOD = '2y'
+# Tickers need returns on this share of the period's dates to be scanned
+MIN_COVERAGE = 0.9
+CANDIDATES_PER_TICKER = 5
+MIN_CORRELATION = 0.5
+
+# Lagged differences in the ADF regression (as statsmodels' coint with
+# maxlag=ADF_LAGS, autolag=None)
+ADF_LAGS = 1
+MAX_P_VALUE = 0.05
+
+_INDEX = None
+_INDEX_LOCK = threading.Lock()
+_BUILD_LOCK = threading.Lock()
+_REFRESHING = False
+
+
+def _store_matrix(tickers, period):
+    """Closes of 'tickers' as stored on disk, as a (dates x tickers) frame over 'period'."""
+    columns = {}
+    for ticker in tickers:
+        frame, _ = price_store.load(ticker)
+        if frame is None or frame.empty:
+            continue
+        start = price_store.period_start(period, tz=frame.index.tz)
+        columns[ticker] = price_store.slice_period(frame, start)['Close']
+    if not columns:
+        return pd.DataFrame()
+    # Tickers may carry different exchange timezones; align them on the date
+    return pd.DataFrame({ticker: close.groupby(close.index.date).last()
+                         for ticker, close in columns.items()}).sort_index()
+
+
+def correlation_matrix(log_prices):
+    """
+    Correlation of daily log returns between every column of a (T, N)
+    log-price array. Missing returns count as zero after standardizing.
+    """
+    returns = np.diff(log_prices, axis=0)
+    valid = np.isfinite(returns)
+    count = np.maximum(valid.sum(axis=0), 2)
+    mean = np.where(valid, returns, 0.0).sum(axis=0) / count
+    centred = np.where(valid, returns - mean, 0.0)
+    std = np.sqrt((centred ** 2).sum(axis=0) / (count - 1))
+    standardized = centred / np.where(std > 0, std, np.inf)
+    return standardized.T @ standardized / np.sqrt((count[:, None] - 1) * (count[None, :] - 1))
+
+
+def candidate_pairs(correlation, per_ticker=CANDIDATES_PER_TICKER, min_correlation=MIN_CORRELATION):
+    """
+    Each column's 'per_ticker' most correlated other columns above
+    'min_correlation', as unique (i, j) index pairs with i < j.
+    """
+    n = len(correlation)
+    if n < 2:
+        return np.empty(0, dtype=int), np.empty(0, dtype=int)
+    scores = correlation.copy()
+    np.fill_diagonal(scores, -np.inf)
+    k = min(per_ticker, n - 1)
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+
+    rows = np.repeat(np.arange(n), k)
+    cols = top.ravel()
+    keep = scores[rows, cols] >= min_correlation
+    pairs = np.unique(np.sort(np.column_stack([rows[keep], cols[keep]]), axis=1), axis=0)
+    return pairs[:, 0], pairs[:, 1]
+
+
+def engle_granger(y, x, lags=ADF_LAGS):
+    """
+    Engle-Granger cointegration tests of y on x for every column of two
+    (T, M) log-price arrays at once; rows where either side is missing are
+    left out of each pair's regressions.
+    Returns arrays (M,): hedge_ratio, intercept, adf_stat, p_value and the
+    spread's half_life in days.
+    """
+    w = np.isfinite(y) & np.isfinite(x)
+    y, x = np.where(w, y, 0.0), np.where(w, x, 0.0)
+
+    # 1. Hedge regression y = a + b x
+    n = np.maximum(w.sum(axis=0), 1)
+    mean_x, mean_y = x.sum(axis=0) / n, y.sum(axis=0) / n
+    dx, dy = np.where(w, x - mean_x, 0.0), np.where(w, y - mean_y, 0.0)
+    hedge_ratio = (dx * dy).sum(axis=0) / np.maximum((dx ** 2).sum(axis=0), 1e-300)
+    intercept = mean_y - hedge_ratio * mean_x
+    resid = np.where(w, y - intercept - hedge_ratio * x, 0.0)
+
+    # 2. ADF on the residuals, no constant:
+    #    d e_t = rho * e_{t-1} + sum_i g_i * d e_{t-i}
+    diff = np.diff(resid, axis=0)
+    valid_diff = w[1:] & w[:-1]
+    target = diff[lags:]
+    regressors = [resid[lags:-1]] + [diff[lags - i:len(diff) - i] for i in range(1, lags + 1)]
+    X = np.stack(regressors, axis=-1)
+    used = valid_diff[lags:].copy()
+    for i in range(1, lags + 1):
+        used &= valid_diff[lags - i:len(diff) - i]
+
+    Xw = X * used[..., None]
+    XtX = np.einsum('tmk,tml->mkl', Xw, X)
+    Xty = np.einsum('tmk,tm->mk', Xw, target)
+    nobs = used.sum(axis=0)
+    ok = nobs > lags + 2
+    XtX[~ok] = np.eye(lags + 1)
+    beta = np.linalg.solve(XtX, Xty[..., None])[..., 0]
+
+    fitted = np.einsum('tmk,mk->tm', X, beta)
+    sigma2 = ((target - fitted) ** 2 * used).sum(axis=0) / np.maximum(nobs - (lags + 1), 1)
+    se = np.sqrt(sigma2 * np.linalg.inv(XtX)[:, 0, 0])
+    rho = beta[:, 0]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        adf_stat = np.where(ok & (se > 0), rho / se, np.nan)
+        half_life = np.where((rho < 0) & (rho > -1), -np.log(2) / np.log1p(rho), np.inf)
+
+    # statsmodels takes over a second to import; only index builds need it
+    from statsmodels.tsa.adfvalues import mackinnonp
+    p_value = np.array([mackinnonp(stat, regression='c', N=2) if np.isfinite(stat) else 1.0
+                        for stat in adf_stat])
+    return {
+        'hedge_ratio': hedge_ratio,
+        'intercept': intercept,
+        'adf_stat': adf_stat,
+        'p_value': p_value,
+        'half_life': half_life,
+    }
+
+
+def build_pair_index(tickers=None, period=PAIR_PERIOD):
+    """
+    Scans 'tickers' (every ticker in the price store by default) for
+    cointegrated pairs and stores the index. Returns it: 'pairs' sorted by
+    p-value, and 'best_partner' mapping each ticker to its most
+    cointegrated partner (p-value up to MAX_P_VALUE).
+    """
+    started = time.perf_counter()
+    tickers = sorted({t.upper() for t in (tickers or price_store.stored_tickers())})
+    prices = _store_matrix(tickers, period)
+    if not prices.empty:
+        coverage = prices.notna().mean()
+        prices = prices.loc[:, coverage >= MIN_COVERAGE]
+
+    columns = list(prices.columns)
+    pairs, best_partner = [], {}
+    if len(columns) >= 2:
+        log_prices = np.log(prices.to_numpy(dtype=float))
+        correlation = correlation_matrix(log_prices)
+        first, second = candidate_pairs(correlation)
+        correlation = correlation[first, second]
+        tests = engle_granger(log_prices[:, first], log_prices[:, second])
+
+        for m in np.argsort(tests['p_value'], kind='stable'):
+            pairs.append({
+                'ticker1': columns[first[m]],
+                'ticker2': columns[second[m]],
+                'correlation': float(correlation[m]),
+                'hedge_ratio': float(tests['hedge_ratio'][m]),
+                'adf_stat': float(tests['adf_stat'][m]),
+                'p_value': float(tests['p_value'][m]),
+                'half_life': float(tests['half_life'][m]) if np.isfinite(tests['half_life'][m]) else None,
+            })
+
+        # Pairs are sorted by p-value, so each ticker's first one is its best
+        for pair in pairs:
+            if pair['p_value'] > MAX_P_VALUE:
+                break
+            best_partner.setdefault(pair['ticker1'], pair['ticker2'])
+            best_partner.setdefault(pair['ticker2'], pair['ticker1'])
+
+    index = {
+        'built_at': time.time(),
+        'as_of': str(prices.index[-1]) if len(prices) else None,
+        'period': period,
+        'universe': len(columns),
+        'pairs': pairs,
+        'best_partner': best_partner,
+        'build_seconds': time.perf_counter() - started,
+    }
+
+    def write(path):
+        with open(path, 'w') as f:
+            json.dump(index, f)
+
+    os.makedirs(os.path.dirname(PAIR_INDEX_PATH), exist_ok=True)
+    price_store.atomic_write(PAIR_INDEX_PATH, write)
+    return index
+
+
+def _rebuild():
+    global _INDEX, _REFRESHING
+    try:
+        with _BUILD_LOCK:
+            index = build_pair_index()
+        with _INDEX_LOCK:
+            _INDEX = index
+    except Exception as e:
+        print(f"Error rebuilding the pair index: {e}")
+    finally:
+        _REFRESHING = False
+
+
+def _refresh_in_background():
+    global _REFRESHING
+    with _INDEX_LOCK:
+        start = not _REFRESHING
+        _REFRESHING = True
+    if start:
+        threading.Thread(target=_rebuild, name='pair-index', daemon=True).start()
+
+
+def pair_index(refresh=False, wait=True):
+    """
+    The pair index, from memory or disk. Without one (or when 'refresh' is
+    set) it is built on the spot, or in the background if 'wait' is False,
+    in which case None is returned. Once older than PAIR_INDEX_TTL the
+    current index keeps being served while a background thread rebuilds it.
+    """
+    global _INDEX
+    with _INDEX_LOCK:
+        index = _INDEX
+    if index is None and not refresh:
+        try:
+            with open(PAIR_INDEX_PATH) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = None
+        with _INDEX_LOCK:
+            _INDEX = index
+
+    if index is None or refresh:
+        if not wait:
+            _refresh_in_background()
+            return index
+        with _BUILD_LOCK:
+            index = build_pair_index()
+        with _INDEX_LOCK:
+            _INDEX = index
+        return index
+
+    if time.time() - index['built_at'] > PAIR_INDEX_TTL:
+        _refresh_in_background()
+    return index
+
+
+def best_partner(ticker):
+    """
+    The ticker's most cointegrated partner in the index, or None (also while
+    the first index is still being built).
+    """
+    index = pair_index(wait=False)
+    if index is None:
+        return None
+    return index['best_partner'].get(ticker.upper())
@@ -0,0 +1,190 @@
+import os
+import re
+import json
+import time
+import tempfile
+import pandas as pd
+
+# Root directory of the on-disk OHLCV store. One Parquet file per
+# ticker/interval, plus a small JSON sidecar describing what it covers.
+# Override with the FIAI_PRICE_STORE environment variable (e.g. to point
+# every gunicorn worker at a shared volume).
+PRICE_STORE_DIR = os.environ.get(
+    'FIAI_PRICE_STORE',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'prices')
+)
+
+# Matches yfinance-style periods such as '60d', '6mo', '1y', '2wk'
+_PERIOD_RE = re.compile(r'^(\d+)(d|wk|mo|y)$')
+
+_PERIOD_UNITS = {
+    'd': lambda n: pd.DateOffset(days=n),
+    'wk': lambda n: pd.DateOffset(weeks=n),
+    'mo': lambda n: pd.DateOffset(months=n),
+    'y': lambda n: pd.DateOffset(years=n),
+}
+
+
+def period_start(period, tz=None, now=None):
+    """
+    Translates a yfinance period string into the first timestamp it covers.
+    Returns None for 'max', meaning "all available history".
+    Timestamps are always tz-aware (UTC unless 'tz' is given) so they
+    compare cleanly against yfinance's exchange-local indexes.
+    """
+    now = now if now is not None else pd.Timestamp.now(tz=tz or 'UTC')
+
+    if period == 'max':
+        return None
+    if period == 'ytd':
+        return now.normalize().replace(month=1, day=1)
+
+    match = _PERIOD_RE.match(period)
+    if not match:
+        raise ValueError(f"Unsupported period '{period}'")
+
+    count, unit = int(match.group(1)), match.group(2)
+    return (now - _PERIOD_UNITS[unit](count)).normalize()
+
+
+def covers(meta, start):
+    """
+    True if a stored history (described by its sidecar 'meta') reaches
+    back at least as far as 'start'.
+    """
+    if not meta:
+        return False
+    covered_from = meta.get('covers_from')
+    if covered_from == 'max':
+        return True
+    if start is None:
+        return False
+    return pd.Timestamp(covered_from) <= start
+
+
+def coverage_start(meta):
+    """The earliest timestamp a sidecar 'meta' covers (None for 'max')."""
+    if meta.get('covers_from') == 'max':
+        return None
+    return pd.Timestamp(meta['covers_from'])
+
+
+def earliest(meta, start):
+    """Returns the wider of the stored coverage and a requested start."""
+    if start is None or (meta and meta.get('covers_from') == 'max'):
+        return None
+    if not meta:
+        return start
+    return min(pd.Timestamp(meta['covers_from']), start)
+
+
+def slice_period(frame, start):
+    """Returns the rows of 'frame' at or after 'start' (all rows if None)."""
+    if start is None:
+        return frame
+    return frame.loc[frame.index >= start]
+
+
+def merge(old, new):
+    """
+    Combines two histories, preferring 'new' where timestamps overlap.
+    The result keeps the timezone of 'old' (a bulk download may have been
+    stored in another ticker's exchange timezone).
+    """
+    if old is None or old.empty:
+        return new
+    if new.index.tz is not None and old.index.tz is not None:
+        new = new.tz_convert(old.index.tz)
+    combined = pd.concat([old, new])
+    combined = combined[~combined.index.duplicated(keep='last')]
+    return combined.sort_index()
+
+
+def _paths(ticker, interval):
+    folder = os.path.join(PRICE_STORE_DIR, interval)
+    name = ticker.upper().replace('/', '_')
+    return (os.path.join(folder, f"{name}.parquet"),
+            os.path.join(folder, f"{name}.json"))
+
+
+def stored_tickers(interval="1d"):
+    """Symbols with a stored history at 'interval', as their file names spell them."""
+    try:
+        names = os.listdir(os.path.join(PRICE_STORE_DIR, interval))
+    except OSError:
+        return []
+    return sorted(name[:-len('.parquet')] for name in names if name.endswith('.parquet'))
+
+
+def load(ticker, interval="1d"):
+    """
+    Reads a ticker's stored history.
+    Returns (frame, meta), or (None, None) if nothing usable is on disk.
+    """
+    data_path, meta_path = _paths(ticker, interval)
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+        frame = pd.read_parquet(data_path)
+    except (OSError, ValueError, ImportError):
+        return None, None
+    return frame, meta
+
+
+def load_meta(ticker, interval="1d"):
+    """
+    Reads only a ticker's sidecar, so a worker can cheaply check whether
+    another one has rewritten the store. Returns None if there is none.
+    """
+    _, meta_path = _paths(ticker, interval)
+    try:
+        with open(meta_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def atomic_write(path, write):
+    """
+    Calls write(tmp_path) on a temp file in the same folder and renames it
+    over 'path', so a concurrent reader in another worker never sees a
+    partial file.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def describe(start, fetched_at=None):
+    """The sidecar for a history covering from 'start' (None for 'max')."""
+    return {
+        'covers_from': 'max' if start is None else pd.Timestamp(start).isoformat(),
+        'fetched_at': time.time() if fetched_at is None else fetched_at,
+    }
+
+
+def save(ticker, interval, frame, start, fetched_at=None):
+    """
+    Persists a ticker's full history.
+    'start' is the earliest timestamp the download was asked for (None for
+    'max'); it is what later requests are checked against, since a young
+    listing may have no bars that far back. 'fetched_at' is when the newest
+    bars were last pulled (defaults to now).
+    """
+    data_path, meta_path = _paths(ticker, interval)
+    os.makedirs(os.path.dirname(data_path), exist_ok=True)
+    meta = describe(start, fetched_at)
+
+    def write_meta(path):
+        with open(path, 'w') as f:
+            json.dump(meta, f)
+
+    atomic_write(data_path, frame.to_parquet)
+    atomic_write(meta_path, write_meta)
+    return meta
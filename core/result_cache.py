@@ -0,0 +1,154 @@
+import os
+import time
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from core.utils import last_stored_bar
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+# Cache of finished API responses (strategy and council results).
+# Entries are keyed by the strategy, its parameters, the ticker(s) and each
+# ticker's last bar timestamp, so a new bar moves every affected request to
+# a new key. The timestamps are read from the price store without
+# refreshing it, so a lookup never downloads anything; while a ticker's
+# stored bars are stale there is no key, and the request is computed
+# (which refreshes them). Entries also expire after RESULT_CACHE_TTL,
+# because some inputs (news, fundamentals) change between bars.
+# Bodies are stored serialized together with their ETag. The local cache
+# is an LRU bounded in bytes; with FIAI_REDIS_URL set (and the redis
+# package installed) entries are shared by every worker through Redis.
+
+RESULT_CACHE_MAX_BYTES = int(os.environ.get('FIAI_RESULT_CACHE_BYTES', 64 * 1024 * 1024))
+RESULT_CACHE_TTL = 900
+
+REDIS_URL = os.environ.get('FIAI_REDIS_URL')
+
+
+def last_bar_timestamp(ticker, interval="1d"):
+    """Timestamp of the ticker's latest stored bar, or None if it is missing or stale."""
+    try:
+        stamp = last_stored_bar(ticker, interval=interval)
+    except Exception:
+        return None
+    return str(stamp) if stamp is not None else None
+
+
+def result_key(strategy, tickers, params=None):
+    """
+    The cache key for 'strategy' run on 'tickers' with 'params', or None if
+    a ticker's last bar is not stored or is stale (see last_bar_timestamp).
+    'tickers' must name every series the result reads.
+    """
+    tickers = [t.upper() for t in tickers]
+    stamps = [last_bar_timestamp(t) for t in tickers]
+    if None in stamps:
+        return None
+    payload = json.dumps([strategy, tickers, stamps, params or {}], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def make_etag(body):
+    return hashlib.sha1(body).hexdigest()
+
+
+class LRUByteCache:
+    """In-process LRU of (body, etag) entries, bounded by total body bytes."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            body, etag, stored_at = entry
+            if time.time() - stored_at > RESULT_CACHE_TTL:
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return body, etag
+
+    def put(self, key, body, etag):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (body, etag, time.time())
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+
+    def _drop(self, key):
+        body, _, _ = self._entries.pop(key)
+        self.size -= len(body)
+
+
+class RedisByteCache:
+    """(body, etag) entries in Redis, expiring after RESULT_CACHE_TTL."""
+
+    def __init__(self, url):
+        self._redis = redis.Redis.from_url(url)
+
+    def get(self, key):
+        values = self._redis.hmget(f"fiai:result:{key}", 'body', 'etag')
+        if values[0] is None:
+            return None
+        return values[0], values[1].decode()
+
+    def put(self, key, body, etag):
+        name = f"fiai:result:{key}"
+        with self._redis.pipeline() as pipe:
+            pipe.hset(name, mapping={'body': body, 'etag': etag})
+            pipe.expire(name, RESULT_CACHE_TTL)
+            pipe.execute()
+
+
+_CACHE = None
+_CACHE_LOCK = threading.Lock()
+
+
+def result_cache():
+    """The process-wide result cache (Redis if FIAI_REDIS_URL is set and usable)."""
+    global _CACHE
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            if REDIS_URL and redis is not None:
+                _CACHE = RedisByteCache(REDIS_URL)
+            else:
+                _CACHE = LRUByteCache(RESULT_CACHE_MAX_BYTES)
+        return _CACHE
+
+
+def get_or_compute(make_key, compute, serialize):
+    """
+    Returns (body, etag, hit) for the key make_key() returns, calling
+    compute() and serialize(result) -> bytes on a miss. The result is
+    stored under make_key() as it stands after compute(), which may have
+    refreshed the prices the key is built from. Results carrying an
+    'error' are returned but not stored; a None key skips the cache.
+    """
+    cache = result_cache()
+    key = make_key()
+    if key is not None:
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[0], entry[1], True
+
+    result = compute()
+    body = serialize(result)
+    etag = make_etag(body)
+    if not (isinstance(result, dict) and 'error' in result):
+        key = make_key()
+        if key is not None:
+            cache.put(key, body, etag)
+    return body, etag, False
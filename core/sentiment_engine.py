@@ -0,0 +1,243 @@
+import os
+import glob
+import hashlib
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import pandas as pd
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+from core import price_store
+
+# VADER sentiment scoring shared by the whole process.
+# - One SentimentIntensityAnalyzer per process (the lexicon is read once).
+# - Scores are cached by a hash of the text, so a business summary or a
+#   headline seen before is never scored again.
+# - score_texts() scores a batch at once; large batches are split across a
+#   process pool.
+# - A local corpus of headline files is ingested into a scored frame, from
+#   which sentiment_series() builds a rolling daily series per ticker.
+
+# Directory of headline files (a news feed dumped to disk). Each file is
+# CSV (*.csv) or JSON lines (*.jsonl) with 'published' and 'headline'
+# fields, plus 'ticker' (without it, the file name is the ticker).
+# Override with the FIAI_HEADLINES environment variable.
+HEADLINE_DIR = os.environ.get(
+    'FIAI_HEADLINES',
+    os.path.join(os.path.dirname(price_store.PRICE_STORE_DIR), 'headlines')
+)
+HEADLINE_PATTERNS = ('*.csv', '*.jsonl')
+
+# Scores kept in the content-hash cache
+SCORE_CACHE_SIZE = 200_000
+
+# Batches with at least this many unscored texts go to the process pool;
+# below it, starting and feeding the workers costs more than it saves
+PROCESS_BATCH_MIN = 20_000
+PROCESS_CHUNK_SIZE = 5_000
+SENTIMENT_WORKERS = max(1, min(os.cpu_count() or 1, 8))
+
+# Days averaged by the rolling per-ticker series
+SENTIMENT_WINDOW = 5
+
+_ANALYZER = None
+_ANALYZER_LOCK = threading.Lock()
+
+_SCORES = OrderedDict()
+_SCORES_LOCK = threading.Lock()
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+# path -> (mtime, size, scored frame) for every ingested headline file
+_CORPUS = {}
+_CORPUS_FRAME = None
+_CORPUS_LOCK = threading.Lock()
+
+
+def analyzer():
+    """The process-wide VADER analyzer."""
+    global _ANALYZER
+    with _ANALYZER_LOCK:
+        if _ANALYZER is None:
+            _ANALYZER = SentimentIntensityAnalyzer()
+        return _ANALYZER
+
+
+def text_key(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def _score_chunk(texts):
+    """Scores 'texts' with this process's analyzer (also run in pool workers)."""
+    sia = analyzer()
+    return [sia.polarity_scores(text) for text in texts]
+
+
+def _pool():
+    # Workers are spawned rather than forked: the web process runs
+    # threads, and a fork could copy a lock some other thread holds
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = ProcessPoolExecutor(max_workers=SENTIMENT_WORKERS,
+                                        mp_context=multiprocessing.get_context('spawn'))
+        return _POOL
+
+
+def _reset_pool():
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is not None:
+            _POOL.shutdown(wait=False, cancel_futures=True)
+        _POOL = None
+
+
+def score_texts(texts):
+    """
+    VADER scores ({'neg', 'neu', 'pos', 'compound'}) for each text, in
+    order. Texts already scored come from the cache; repeated texts in the
+    batch are scored once.
+    """
+    keys = [text_key(text) for text in texts]
+
+    scores = {}
+    with _SCORES_LOCK:
+        for key in keys:
+            if key in _SCORES:
+                scores[key] = _SCORES[key]
+                _SCORES.move_to_end(key)
+
+    missing = {}
+    for key, text in zip(keys, texts):
+        if key not in scores:
+            missing.setdefault(key, text)
+
+    if missing:
+        pending = list(missing.values())
+        computed = None
+        if len(pending) >= PROCESS_BATCH_MIN and SENTIMENT_WORKERS > 1:
+            chunks = [pending[i:i + PROCESS_CHUNK_SIZE] for i in range(0, len(pending), PROCESS_CHUNK_SIZE)]
+            try:
+                computed = [score for chunk in _pool().map(_score_chunk, chunks) for score in chunk]
+            except BrokenProcessPool as e:
+                print(f"Sentiment process pool failed ({e}); scoring in-process")
+                _reset_pool()
+        if computed is None:
+            computed = _score_chunk(pending)
+
+        with _SCORES_LOCK:
+            for key, score in zip(missing, computed):
+                scores[key] = _SCORES[key] = score
+            while len(_SCORES) > SCORE_CACHE_SIZE:
+                _SCORES.popitem(last=False)
+
+    return [scores[key] for key in keys]
+
+
+def score_text(text):
+    """VADER scores for one text (cached)."""
+    return score_texts([text])[0]
+
+
+# --- Headline corpus ---
+
+def _read_headline_file(path):
+    """A headline file as a frame of (published, ticker, headline)."""
+    if path.endswith('.jsonl'):
+        frame = pd.read_json(path, lines=True, dtype=False)
+    else:
+        frame = pd.read_csv(path, dtype=str)
+
+    if 'ticker' not in frame:
+        frame['ticker'] = os.path.splitext(os.path.basename(path))[0]
+    frame = frame[['published', 'ticker', 'headline']].dropna()
+    frame['published'] = pd.to_datetime(frame['published'], utc=True, errors='coerce')
+    frame['ticker'] = frame['ticker'].astype(str).str.upper()
+    frame['headline'] = frame['headline'].astype(str)
+    return frame.dropna(subset=['published'])
+
+
+def ingest_headlines(directory=None):
+    """
+    Brings the scored headline corpus up to date with the files in
+    'directory' (HEADLINE_DIR by default) and returns it as one frame of
+    (published, ticker, headline, compound). Only new or changed files
+    are read, and their headlines are scored as a single batch.
+    """
+    global _CORPUS_FRAME
+    directory = directory or HEADLINE_DIR
+    paths = sorted(path for pattern in HEADLINE_PATTERNS
+                   for path in glob.glob(os.path.join(directory, '**', pattern), recursive=True))
+
+    with _CORPUS_LOCK:
+        stats = {}
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            stats[path] = (stat.st_mtime, stat.st_size)
+
+        changed = [path for path, stat in stats.items()
+                   if path not in _CORPUS or _CORPUS[path][:2] != stat]
+        removed = [path for path in _CORPUS if path not in stats]
+        if not changed and not removed and _CORPUS_FRAME is not None:
+            return _CORPUS_FRAME
+
+        for path in removed:
+            del _CORPUS[path]
+
+        frames = {}
+        for path in changed:
+            try:
+                frames[path] = _read_headline_file(path)
+            except (OSError, ValueError, KeyError) as e:
+                # Kept as empty, so the file is only retried once it changes
+                print(f"Skipping headline file {path}: {e}")
+                frames[path] = pd.DataFrame(columns=['published', 'ticker', 'headline'])
+
+        batch = [headline for frame in frames.values() for headline in frame['headline']]
+        compounds = iter(score['compound'] for score in score_texts(batch))
+        for path, frame in frames.items():
+            frame['compound'] = [next(compounds) for _ in range(len(frame))]
+            _CORPUS[path] = stats[path] + (frame,)
+
+        frames = [entry[2] for entry in _CORPUS.values() if len(entry[2])]
+        if frames:
+            _CORPUS_FRAME = pd.concat(frames, ignore_index=True)
+        else:
+            _CORPUS_FRAME = pd.DataFrame({
+                'published': pd.Series(dtype='datetime64[ns, UTC]'),
+                'ticker': pd.Series(dtype=str),
+                'headline': pd.Series(dtype=str),
+                'compound': pd.Series(dtype=float),
+            })
+        return _CORPUS_FRAME
+
+
+def sentiment_series(ticker, window=SENTIMENT_WINDOW, directory=None):
+    """
+    Daily sentiment for 'ticker' from the headline corpus, one row per
+    calendar day from its first headline to its last:
+      headlines - number of headlines that day
+      daily     - mean compound score that day (NaN without headlines)
+      rolling   - mean compound score over the last 'window' days' headlines
+    Returns an empty frame if the ticker has no headlines.
+    """
+    corpus = ingest_headlines(directory)
+    rows = corpus[corpus['ticker'] == ticker.upper()]
+    if rows.empty:
+        return pd.DataFrame(columns=['headlines', 'daily', 'rolling'])
+
+    days = rows['published'].dt.tz_convert(None).dt.normalize()
+    grouped = rows['compound'].groupby(days).agg(['sum', 'count']).asfreq('D', fill_value=0)
+
+    rolling_sum = grouped['sum'].rolling(window, min_periods=1).sum()
+    rolling_count = grouped['count'].rolling(window, min_periods=1).sum()
+    return pd.DataFrame({
+        'headlines': grouped['count'],
+        'daily': grouped['sum'] / grouped['count'].where(grouped['count'] > 0),
+        'rolling': rolling_sum / rolling_count.where(rolling_count > 0),
+    })
@@ -0,0 +1,93 @@
+import os
+import time
+import importlib
+import threading
+
+# Strategies are referenced by import path and imported on first use.
+# The algorithm modules pull in sklearn, arch, PyPortfolioOpt (and cvxpy),
+# statsmodels and vaderSentiment, so importing them eagerly made every
+# cold start and worker slow and memory-heavy.
+#   lazy_function('algorithms.momentum:run_momentum') - imported on first call
+#   lazy_module('algorithms.market_making')           - imported on first attribute access
+#
+# Preloading: with FIAI_PRELOAD_STRATEGIES=1 the app imports every registered
+# module at startup instead. Under `gunicorn --preload app:app` that happens
+# once in the master before it forks, and the workers share those pages
+# copy-on-write rather than each importing them again.
+PRELOAD_STRATEGIES = os.environ.get('FIAI_PRELOAD_STRATEGIES', '').lower() in ('1', 'true', 'yes')
+
+_MODULES = set()
+_MODULES_LOCK = threading.Lock()
+
+
+def _register(module_path):
+    with _MODULES_LOCK:
+        _MODULES.add(module_path)
+
+
+class LazyFunction:
+    """A module-level function given as 'package.module:function', imported on first call."""
+
+    def __init__(self, path):
+        self.path = path
+        self.module_path, _, self.name = path.partition(':')
+        self._func = None
+        _register(self.module_path)
+
+    def resolve(self):
+        # importlib serializes concurrent imports of a module, so racing
+        # threads at worst both look up the same function
+        if self._func is None:
+            self._func = getattr(importlib.import_module(self.module_path), self.name)
+        return self._func
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+    def __repr__(self):
+        return f"<lazy function {self.path}>"
+
+
+class LazyModule:
+    """A module imported on first attribute access."""
+
+    def __init__(self, module_path):
+        self._module_path = module_path
+        _register(module_path)
+
+    def __getattr__(self, name):
+        return getattr(importlib.import_module(self._module_path), name)
+
+    def __repr__(self):
+        return f"<lazy module {self._module_path}>"
+
+
+def lazy_function(path):
+    return LazyFunction(path)
+
+
+def lazy_module(module_path):
+    return LazyModule(module_path)
+
+
+def registered_modules():
+    with _MODULES_LOCK:
+        return sorted(_MODULES)
+
+
+def preload(modules=None):
+    """
+    Imports 'modules' (default: every registered one) now. Returns
+    {module: seconds}; a module that fails to import is reported and
+    left to fail again on first use.
+    """
+    timings = {}
+    for module_path in modules or registered_modules():
+        started = time.perf_counter()
+        try:
+            importlib.import_module(module_path)
+        except Exception as e:
+            print(f"Error preloading {module_path}: {e}")
+            continue
+        timings[module_path] = time.perf_counter() - started
+    return timings
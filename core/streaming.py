@@ -0,0 +1,295 @@
+import os
+import math
+import pickle
+import threading
+from collections import deque, defaultdict
+from core import price_store
+
+# Incremental (streaming) indicators.
+# Each object consumes one bar at a time in O(1), so a live dashboard can
+# update a signal per tick instead of recomputing the full history with
+# core.indicators. State is kept per ticker in memory and on disk.
+
+# Where per-ticker indicator state is persisted between restarts
+INDICATOR_STATE_DIR = os.path.join(os.path.dirname(price_store.PRICE_STORE_DIR), 'indicators')
+
+# Running sums are recomputed from the window this often, so rounding
+# error cannot accumulate over a long-lived stream
+_RESYNC_EVERY = 10000
+
+
+class StreamingIndicator:
+    """
+    Base class: remembers the last bar consumed, so a price series can be
+    replayed incrementally with sync().
+    Subclasses implement _push(value) (append a new bar) and
+    _revise(value) (replace the most recent bar, e.g. a partial daily bar
+    whose close has since moved).
+    """
+
+    def __init__(self):
+        self.last_timestamp = None
+        self.last_value = None
+        self.previous_timestamp = None
+        self.previous_value = None
+
+    def update(self, value, timestamp=None):
+        """Consumes one new bar."""
+        self._push(float(value))
+        self.previous_timestamp, self.previous_value = self.last_timestamp, self.last_value
+        self.last_timestamp = timestamp
+        self.last_value = float(value)
+
+    def revise(self, value):
+        """Replaces the value of the most recently consumed bar."""
+        self._revise(float(value))
+        self.last_value = float(value)
+
+    def sync(self, series):
+        """
+        Brings the state up to date with a pandas Series of bars.
+        Only bars after the last one consumed are fed in, and that last bar
+        is revised if its value changed. Returns False if the series no
+        longer contains the last consumed bar, or if the bar before it has
+        changed, meaning the history was re-adjusted (the caller should
+        rebuild).
+        """
+        start = 0
+        if self.last_timestamp is not None:
+            if self.last_timestamp not in series.index:
+                return False
+            # States saved before previous_* existed lack the attribute
+            previous = getattr(self, 'previous_timestamp', None)
+            if previous is not None and previous in series.index \
+                    and series.loc[previous] != self.previous_value:
+                return False
+            position = series.index.get_loc(self.last_timestamp)
+            if series.iloc[position] != self.last_value:
+                self.revise(series.iloc[position])
+            start = position + 1
+
+        for timestamp, value in series.iloc[start:].items():
+            if math.isfinite(value):
+                self.update(value, timestamp)
+        return True
+
+
+class RunningSMA(StreamingIndicator):
+    """Simple moving average over the last 'window' bars."""
+
+    def __init__(self, window):
+        super().__init__()
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.total = 0.0
+        self._updates = 0
+
+    @property
+    def ready(self):
+        return len(self.values) == self.window
+
+    @property
+    def mean(self):
+        return self.total / len(self.values) if self.values else math.nan
+
+    def _push(self, value):
+        if self.ready:
+            self.total -= self.values[0]
+        self.values.append(value)
+        self.total += value
+
+        self._updates += 1
+        if self._updates % _RESYNC_EVERY == 0:
+            self.total = math.fsum(self.values)
+
+    def _revise(self, value):
+        self.total += value - self.values[-1]
+        self.values[-1] = value
+
+
+class RunningVariance(StreamingIndicator):
+    """
+    Mean and sample standard deviation over the last 'window' bars, using
+    Welford's algorithm with removal for the bar leaving the window.
+    """
+
+    def __init__(self, window):
+        super().__init__()
+        self.window = window
+        self.values = deque()
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._updates = 0
+
+    @property
+    def ready(self):
+        return len(self.values) == self.window
+
+    @property
+    def mean(self):
+        return self._mean if self.values else math.nan
+
+    @property
+    def std(self):
+        n = len(self.values)
+        return math.sqrt(max(self._m2, 0.0) / (n - 1)) if n > 1 else math.nan
+
+    def _add(self, value):
+        self.values.append(value)
+        delta = value - self._mean
+        self._mean += delta / len(self.values)
+        self._m2 += delta * (value - self._mean)
+
+    def _remove(self, value):
+        n = len(self.values)
+        if n == 0:
+            self._mean, self._m2 = 0.0, 0.0
+            return
+        delta = value - self._mean
+        self._mean -= delta / n
+        self._m2 -= delta * (value - self._mean)
+
+    def _push(self, value):
+        self._add(value)
+        if len(self.values) > self.window:
+            self._remove(self.values.popleft())
+
+        self._updates += 1
+        if self._updates % _RESYNC_EVERY == 0:
+            self._resync()
+
+    def _revise(self, value):
+        self._remove(self.values.pop())
+        self._add(value)
+
+    def _resync(self):
+        values = list(self.values)
+        self.values.clear()
+        self._mean, self._m2 = 0.0, 0.0
+        for value in values:
+            self._add(value)
+
+
+class CrossoverState(StreamingIndicator):
+    """
+    SMA crossover state (e.g. 50/200).
+    'signal' is 1 while the short SMA is above the long one, 0 below (None
+    until both exist); 'position' is +1/-1 on the bar a cross happened.
+    """
+
+    def __init__(self, short_window=50, long_window=200):
+        super().__init__()
+        self.short = RunningSMA(short_window)
+        self.long = RunningSMA(long_window)
+        self.signal = None
+        self.previous_signal = None
+        self.position = 0
+
+    @property
+    def ready(self):
+        return self.long.ready
+
+    def _refresh(self):
+        self.signal = int(self.short.mean > self.long.mean) if self.ready else None
+        if self.signal is None or self.previous_signal is None:
+            self.position = 0
+        else:
+            self.position = self.signal - self.previous_signal
+
+    def _push(self, value):
+        self.previous_signal = self.signal
+        self.short._push(value)
+        self.long._push(value)
+        self._refresh()
+
+    def _revise(self, value):
+        self.short._revise(value)
+        self.long._revise(value)
+        self._refresh()
+
+
+class BollingerState(RunningVariance):
+    """Bollinger Bands (SMA +/- num_std_dev standard deviations) over 'window' bars."""
+
+    def __init__(self, window=20, num_std_dev=2):
+        super().__init__(window)
+        self.num_std_dev = num_std_dev
+
+    @property
+    def upper_band(self):
+        return self.mean + self.std * self.num_std_dev
+
+    @property
+    def lower_band(self):
+        return self.mean - self.std * self.num_std_dev
+
+
+class ZScoreState(RunningVariance):
+    """Z-score of the latest value against its trailing 'window' mean and std."""
+
+    @property
+    def z_score(self):
+        std = self.std
+        if not self.ready or not std:
+            return math.nan
+        return (self.last_value - self.mean) / std
+
+
+# --- Per-ticker state persistence ---
+
+_STATES = {}
+_STATE_LOCKS = defaultdict(threading.Lock)
+
+
+def _state_path(key):
+    name = '_'.join(str(part) for part in key).replace('/', '_')
+    return os.path.join(INDICATOR_STATE_DIR, f"{name}.pkl")
+
+
+def _load_state(key):
+    if key in _STATES:
+        return _STATES[key]
+    try:
+        with open(_state_path(key), 'rb') as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        return None
+
+
+def _save_state(key, state):
+    _STATES[key] = state
+    path = _state_path(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def write(tmp_path):
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(state, f)
+
+    try:
+        price_store.atomic_write(path, write)
+    except OSError:
+        # Persistence is best-effort; the in-memory state is still current
+        pass
+
+
+def sync_state(key, series, factory):
+    """
+    Returns the streaming indicator stored under 'key' (e.g.
+    ('momentum', 'AAPL', 50, 200)), brought up to date with 'series'.
+    Only bars newer than the last one it saw are consumed; if there is no
+    usable saved state, a new one is built with factory() and fed the
+    whole series.
+    """
+    with _STATE_LOCKS[key]:
+        state = _load_state(key)
+        seen = (state.last_timestamp, state.last_value) if state is not None else None
+
+        if state is None or not state.sync(series):
+            state = factory()
+            state.sync(series)
+
+        if (state.last_timestamp, state.last_value) != seen:
+            _save_state(key, state)
+        else:
+            _STATES[key] = state
+        return state
@@ -1,6 +1,14 @@
+import os
+import time
+import threading
 import yfinance as yf
+import numpy as np
 import pandas as pd
-from functools import lru_cache
+from collections import defaultdict
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from core import price_store
+from core.info_cache import get_ticker_info
 
 # A list of diverse, high-volume stocks for the homepage
 DEFAULT_STOCKS = [
@@ -8,41 +16,360 @@ DEFAULT_STOCKS = [
     'V', 'JNJ', 'WMT', 'UNH', 'XOM', 'GS', 'BA'
 ]
 
-# Use a simple lru_cache for in-memory caching of API calls
-# This speeds up repeated requests for the same ticker
-@lru_cache(maxsize=128)
-def fetch_stock_data(ticker, period="1y", interval="1d"):
+# The diversified "60/40-like" universe mean_variance_opt tests a ticker
+# against (kept here so the council can name it without importing cvxpy)
+BASE_PORTFOLIO = ['SPY', 'QQQ', 'TLT', 'GLD']
+
+# In-process layer over the on-disk price store.
+# Maps (ticker, interval) -> (full stored history, sidecar meta), so a
+# request for '1y' after '3y' is a slice rather than a second download.
+_HISTORY = {}
+_HISTORY_LOCKS = defaultdict(threading.Lock)
+
+# How long (in seconds) stored bars are served before a delta refresh.
+# Override with the FIAI_PRICE_MAX_AGE environment variable.
+PRICE_MAX_AGE = int(os.environ.get('FIAI_PRICE_MAX_AGE', 15 * 60))
+
+
+class _LazyInfo(Mapping):
     """
-    Fetches stock data from yfinance and returns a pandas DataFrame.
-    Includes stock info (like longName) in the DataFrame's .info attribute.
+    Stands in for yf.Ticker(ticker).info on returned DataFrames.
+    The metadata is only looked up (via core.info_cache) if a caller
+    actually reads it, so strategies that just need prices can be served
+    entirely from disk.
+    """
+
+    def __init__(self, ticker):
+        self._ticker = ticker
+        self._info = None
+
+    def _load(self):
+        if self._info is None:
+            self._info = get_ticker_info(self._ticker)
+        return self._info
+
+    def __getitem__(self, key):
+        return self._load()[key]
+
+    def __iter__(self):
+        return iter(self._load())
+
+    def __len__(self):
+        return len(self._load())
+
+
+def _combine(ours, theirs):
+    """
+    Merges two (history, meta) copies of the same ticker. The copy fetched
+    more recently wins overlapping bars; the result covers the wider range.
+    """
+    (older, older_meta), (newer, newer_meta) = sorted(
+        [ours, theirs], key=lambda copy: copy[1].get('fetched_at', 0))
+    if price_store.covers(newer_meta, price_store.coverage_start(older_meta)):
+        return newer, newer_meta
+    if _has_new_actions(older, newer):
+        # The newer copy was re-based by a split or dividend; the older bars
+        # are on the previous adjustment basis and cannot be kept
+        return newer, newer_meta
+    meta = {'covers_from': older_meta['covers_from'], 'fetched_at': newer_meta['fetched_at']}
+    return price_store.merge(older, newer), meta
+
+
+def _reconcile(ticker, interval, history, meta, seen):
+    """
+    Folds the store's copy of a history into this worker's when the
+    sidecar no longer matches 'seen' (the meta this worker last read or
+    wrote): other gunicorn workers share the store, and one may have
+    refreshed or backfilled it since.
+    """
+    stored_meta = price_store.load_meta(ticker, interval)
+    if stored_meta is None or stored_meta == seen:
+        return history, meta
+    stored, stored_meta = price_store.load(ticker, interval)
+    if stored is None:
+        return history, meta
+    if history is None:
+        return stored, stored_meta
+    return _combine((history, meta), (stored, stored_meta))
+
+
+def _load_history(ticker, interval):
+    # Memory first, brought up to date with whatever disk holds
+    key = (ticker, interval)
+    history, meta = _HISTORY.get(key, (None, None))
+    history, meta = _reconcile(ticker, interval, history, meta, meta)
+    if history is not None:
+        _HISTORY[key] = (history, meta)
+    return history, meta
+
+
+def _store(ticker, interval, history, meta, seen):
+    """
+    Saves a history described by 'meta' (see price_store.describe), after
+    merging in anything another worker wrote since this one read 'seen',
+    so a narrower copy never overwrites a wider one.
     """
+    history, meta = _reconcile(ticker, interval, history, meta, seen)
+    meta = price_store.save(ticker, interval, history, price_store.coverage_start(meta),
+                            fetched_at=meta['fetched_at'])
+    _HISTORY[(ticker, interval)] = (history, meta)
+    return history
+
+
+def _is_stale(meta, max_age):
+    return time.time() - meta.get('fetched_at', 0) > max_age
+
+
+def _download(ticker, interval, period=None, start=None, end=None):
     stock = yf.Ticker(ticker)
-    data = stock.history(period=period, interval=interval)
-    
+    if start is not None:
+        return stock.history(start=start, end=end, interval=interval)
+    return stock.history(period=period, interval=interval)
+
+
+def _has_new_actions(history, newer):
+    """
+    True if 'newer' carries a split or dividend the stored 'history' has
+    not seen yet (one on a bar that is stored without it, or on a new bar).
+    """
+    columns = [c for c in ('Stock Splits', 'Dividends') if c in newer.columns]
+    if not columns or newer.empty:
+        return False
+    actions = newer[columns].fillna(0)
+    if set(columns) <= set(history.columns):
+        known = history[columns].reindex(actions.index).fillna(0)
+    else:
+        known = 0
+    return bool(((actions != 0) & (actions != known)).to_numpy().any())
+
+
+def _get_history(ticker, interval, period, max_age):
+    """
+    Returns the full stored history for a ticker, downloading only what
+    the store is missing: older bars the first time a longer period is
+    requested, and bars after the last stored timestamp once it is stale.
+    If those new bars bring a split or dividend, the whole stored range is
+    downloaded again on the new adjustment basis.
+    """
+    key = (ticker, interval)
+    with _HISTORY_LOCKS[key]:
+        history, meta = _load_history(ticker, interval)
+
+        tz = history.index.tz if history is not None else None
+        start = price_store.period_start(period, tz=tz)
+
+        if history is None:
+            # Cold start: a plain download of the requested period
+            history = _download(ticker, interval, period=period)
+            if history.empty:
+                raise Exception(f"No data found for ticker {ticker} with period {period}")
+            start = price_store.period_start(period, tz=history.index.tz)
+            history = _store(ticker, interval, history, price_store.describe(start), None)
+            return history, start
+
+        covered = price_store.covers(meta, start)
+        stale = _is_stale(meta, max_age)
+        if covered and not stale:
+            _HISTORY[key] = (history, meta)
+            return history, start
+
+        seen = meta
+        fetch_from = price_store.earliest(meta, start)
+        fetched_at = meta.get('fetched_at')
+
+        # 1. Backfill: only the bars older than what is already stored
+        if not covered:
+            if fetch_from is None:
+                older = _download(ticker, interval, period='max')
+            else:
+                older = _download(ticker, interval, start=fetch_from, end=history.index[0])
+            history = price_store.merge(history, older)
+
+        # 2. Delta: re-fetch from the last stored bar (it may have been a
+        # partial bar at the time) and append anything newer
+        if stale:
+            newer = _download(ticker, interval, start=history.index[-1])
+            if _has_new_actions(history, newer):
+                # Bars are auto-adjusted: a split or dividend re-bases all
+                # earlier prices, so the stored ones cannot be kept
+                if fetch_from is None:
+                    history = _download(ticker, interval, period='max')
+                else:
+                    history = _download(ticker, interval, start=fetch_from)
+            else:
+                history = price_store.merge(history, newer)
+            fetched_at = None
+
+        history = _store(ticker, interval, history, price_store.describe(fetch_from, fetched_at), seen)
+        return history, start
+
+
+def fetch_stock_data(ticker, period="1y", interval="1d", max_age=None):
+    """
+    Fetches stock data and returns a pandas DataFrame.
+    Prices come from the local price store (core.price_store), which keeps
+    the longest history fetched so far; yfinance is only called on a miss
+    or, once the stored bars are older than 'max_age' seconds (default
+    PRICE_MAX_AGE), to append the bars since the last stored timestamp.
+    Includes stock info (like longName) in the DataFrame's .info attribute.
+    """
+    ticker = ticker.upper()
+    if max_age is None:
+        max_age = PRICE_MAX_AGE
+    history, start = _get_history(ticker, interval, period, max_age)
+    data = price_store.slice_period(history, start)
+
     if data.empty:
         raise Exception(f"No data found for ticker {ticker} with period {period}")
-    
+
     # Attach the info dict to the dataframe for easy access in routes
-    data.info = stock.info
+    data.info = _LazyInfo(ticker)
     return data
 
-def simple_find_peaks(data, prominence=1):
-    """
-    A simple implementation to find peak indices in a list of data.
-    'prominence' is a basic filter to avoid tiny, insignificant peaks.
-    """
-    peaks = []
-    if len(data) < 3:
-        return []
-        
-    for i in range(1, len(data) - 1):
-        # Check if it's a local maximum
-        if data[i] > data[i-1] and data[i] > data[i+1]:
-            # Basic prominence check: is it significantly higher than its neighbors?
-            left_dip = data[i] - data[i-1]
-            right_dip = data[i] - data[i+1]
-            
-            if min(left_dip, right_dip) >= prominence:
-                peaks.append(i)
-                
-    return peaks
+def last_stored_bar(ticker, interval="1d", max_age=None):
+    """
+    Timestamp of the ticker's latest stored bar, read from memory or the
+    price store without downloading anything. None if nothing is stored or
+    the stored bars are older than 'max_age' seconds (default
+    PRICE_MAX_AGE), i.e. the next fetch_stock_data would refresh them.
+    """
+    ticker = ticker.upper()
+    if max_age is None:
+        max_age = PRICE_MAX_AGE
+    with _HISTORY_LOCKS[(ticker, interval)]:
+        history, meta = _load_history(ticker, interval)
+    if history is None or history.empty or _is_stale(meta, max_age):
+        return None
+    return history.index[-1]
+
+# Threads used to refresh already-stored tickers in fetch_stock_data_many
+BULK_REFRESH_WORKERS = 8
+
+
+def _bulk_download(tickers, interval, period):
+    """
+    One yf.download round-trip for several tickers, split back per ticker.
+    Only tz-aware frames are returned: the store compares against tz-aware
+    period starts, so a ticker that comes back tz-naive is left to the
+    single-ticker download instead.
+    """
+    # yf.download drops the timezone of daily bars unless told otherwise
+    raw = yf.download(tickers, period=period, interval=interval, group_by='ticker',
+                      auto_adjust=True, actions=True, threads=True, progress=False,
+                      ignore_tz=False)
+    frames = {}
+    if raw.empty:
+        return frames
+
+    available = set(raw.columns.get_level_values(0))
+    for ticker in tickers:
+        if ticker not in available:
+            continue
+        frame = raw[ticker].dropna(how='all')
+        if not frame.empty and frame.index.tz is not None:
+            frame.columns.name = None
+            frames[ticker] = frame
+    return frames
+
+
+def fetch_stock_data_many(tickers, period="1y", interval="1d", max_age=None):
+    """
+    Fetches several tickers at once and returns {ticker: DataFrame}.
+    Tickers with nothing in the price store yet are pulled in a single
+    yf.download call; the rest go through the same store/delta-refresh
+    path as fetch_stock_data. Tickers without data are left out.
+    """
+    tickers = list(dict.fromkeys(t.upper() for t in tickers))
+
+    cold = []
+    for ticker in tickers:
+        with _HISTORY_LOCKS[(ticker, interval)]:
+            if _load_history(ticker, interval)[0] is None:
+                cold.append(ticker)
+
+    if cold:
+        for ticker, frame in _bulk_download(cold, interval, period).items():
+            with _HISTORY_LOCKS[(ticker, interval)]:
+                start = price_store.period_start(period, tz=frame.index.tz)
+                _store(ticker, interval, frame, price_store.describe(start), None)
+
+    def fetch(ticker):
+        try:
+            return ticker, fetch_stock_data(ticker, period=period, interval=interval, max_age=max_age)
+        except Exception:
+            return ticker, None
+
+    with ThreadPoolExecutor(max_workers=BULK_REFRESH_WORKERS) as executor:
+        results = executor.map(fetch, tickers)
+        return {ticker: data for ticker, data in results if data is not None}
+
+
+def fetch_price_matrix(tickers, period="1y", interval="1d", field='Close'):
+    """
+    Returns one column of price data for many tickers as a single
+    (dates x tickers) DataFrame, built from fetch_stock_data_many.
+    Dates missing for a ticker are left as NaN.
+    """
+    frames = fetch_stock_data_many(tickers, period=period, interval=interval)
+    matrix = pd.DataFrame({ticker: frame[field] for ticker, frame in frames.items()})
+    return matrix.sort_index()
+
+
+# --- Peak detection ---
+# Thin wrappers over scipy.signal.find_peaks. Prominence follows the
+# topographic definition: a peak's bases are the lowest points between it
+# and the nearest strictly higher point on each side (or the series edge).
+# scipy's searches stop at NaNs, so gaps act as walls; find_peaks_many
+# relies on that to run many series in one call.
+
+
+def find_peaks(data, height=None, prominence=None, width=None, distance=None, rel_height=0.5):
+    """
+    Finds peaks in a 1-D series with scipy.signal.find_peaks.
+    'height', 'prominence' and 'width' are a minimum or a (min, max) pair;
+    'distance' is the minimum number of bars between peaks (the higher
+    peak wins); widths are measured at 'rel_height' of the prominence.
+    NaNs act as walls: a peak's bases never extend across them.
+    Returns (peak indices, properties) with 'peak_heights', 'prominences',
+    'left_bases', 'right_bases' and, when 'width' is given, 'widths'.
+    """
+    # scipy.signal takes over a second to import; only charts need it
+    from scipy.signal import find_peaks as scipy_find_peaks
+
+    # Unbounded filters still make scipy report the heights and prominences
+    peaks, properties = scipy_find_peaks(
+        np.asarray(data, dtype=float),
+        height=(None, None) if height is None else height,
+        prominence=(None, None) if prominence is None else prominence,
+        width=width,
+        distance=distance,
+        rel_height=rel_height,
+    )
+    keys = ['peak_heights', 'prominences', 'left_bases', 'right_bases'] + (['widths'] if width is not None else [])
+    return peaks, {key: properties[key] for key in keys}
+
+
+def find_peaks_many(prices, **filters):
+    """
+    Runs find_peaks over every column of a (dates x tickers) DataFrame in
+    one call: the columns are laid end to end with NaN walls between them.
+    Returns {ticker: (peak indices, properties)}, indices per column.
+    """
+    values = prices.to_numpy(dtype=float)
+    length, count = values.shape
+    gap = max(int(filters.get('distance') or 1), 1)
+
+    padded = np.full((length + gap, count), np.nan)
+    padded[:length] = values
+    peaks, properties = find_peaks(padded.T.ravel(), **filters)
+
+    column = peaks // (length + gap)
+    rows = peaks % (length + gap)
+    found = {}
+    for i, ticker in enumerate(prices.columns):
+        mask = column == i
+        column_properties = {key: found_values[mask] for key, found_values in properties.items()}
+        for key in ('left_bases', 'right_bases'):
+            column_properties[key] = column_properties[key] - i * (length + gap)
+        found[ticker] = (rows[mask], column_properties)
+    return found
@@ -158,7 +158,7 @@ window.renderAlgorithmChart = function(canvas, apiData) {
     }
     
     const chartType = apiData.chart_type || 'line'; // Default to line
-    const chartData = apiData.chart_data;
+    const chartData = decodeChartData(apiData.chart_data);
     
     let chartConfig;
     
@@ -186,6 +186,14 @@ window.renderAlgorithmChart = function(canvas, apiData) {
             chartConfig = getVolatilityChartConfig(chartData);
             break;
             
+        case (chartData.inventory ? apiData.recommendation : null): // Market Making
+            chartConfig = getMarketMakingChartConfig(chartData);
+            break;
+
+        case (chartData.sentiment ? apiData.recommendation : null): // Headline Sentiment
+            chartConfig = getSentimentChartConfig(chartData);
+            break;
+
         case (chartData.importance ? apiData.recommendation : null): // ML
             chartConfig = getMLChartConfig(chartData);
             break;
@@ -198,6 +206,56 @@ window.renderAlgorithmChart = function(canvas, apiData) {
     currentAlgorithmChart = new Chart(canvas, chartConfig);
 }
 
+// --- Compact Payload Decoding ---
+
+/**
+ * Expands chart_data sent in the compact columnar format (see
+ * core/chart_payload.py) back into plain arrays. Plain chart_data is
+ * returned as is.
+ */
+function decodeChartData(data) {
+    if (!data || data.format !== 'columnar-b64-v1') {
+        return data;
+    }
+
+    const decoded = Object.assign({}, data.other);
+
+    // Date axis: int32 offsets (in 'unit' seconds) from 'start'
+    const offsets = new Int32Array(base64ToBuffer(data.axis.offsets));
+    const labels = Array.from(offsets, offset => {
+        const iso = new Date((data.axis.start + offset * data.axis.unit) * 1000).toISOString();
+        return data.axis.unit === 86400 ? iso.slice(0, 10) : iso;
+    });
+    decoded.labels = labels;
+
+    // float32 series; NaN becomes null so Chart.js leaves a gap
+    Object.entries(data.series).forEach(([key, encoded]) => {
+        decoded[key] = Array.from(new Float32Array(base64ToBuffer(encoded)),
+            value => Number.isNaN(value) ? null : value);
+    });
+
+    Object.entries(data.constants).forEach(([key, value]) => {
+        decoded[key] = new Array(data.length).fill(value);
+    });
+
+    // Signal markers: int32 indices into the axis
+    Object.entries(data.markers).forEach(([key, encoded]) => {
+        decoded[key] = Array.from(new Int32Array(base64ToBuffer(encoded)), index => labels[index]);
+    });
+
+    return decoded;
+}
+
+function base64ToBuffer(encoded) {
+    const binary = atob(encoded);
+    const bytes = new Uint8Array(binary.length);
+    for (let i = 0; i < binary.length; i++) {
+        bytes[i] = binary.charCodeAt(i);
+    }
+    return bytes.buffer;
+}
+
+
 // --- Chart Config Helper Functions ---
 
 function getMomentumChartConfig(data) {
@@ -359,6 +417,81 @@ function getVolatilityChartConfig(data) {
     };
 }
 
+function getMarketMakingChartConfig(data) {
+    const options = commonLineChartOptions('y');
+    options.scales.x.time.unit = 'hour';
+    options.scales.x.time.tooltipFormat = 'MMM dd, HH:mm:ss';
+    options.scales.pnl = {
+        position: 'right',
+        ticks: { color: '#888' },
+        grid: { display: false }
+    };
+
+    return {
+        type: 'line',
+        data: {
+            labels: data.labels,
+            datasets: [
+                {
+                    label: 'Inventory (Avellaneda-Stoikov)',
+                    data: data.inventory,
+                    borderColor: '#FFD700',
+                    borderWidth: 2,
+                    pointRadius: 0,
+                    stepped: true,
+                    yAxisID: 'y'
+                },
+                {
+                    label: 'Inventory (Symmetric)',
+                    data: data.symmetric_inventory,
+                    borderColor: '#636e72',
+                    borderWidth: 1.5,
+                    borderDash: [5, 5],
+                    pointRadius: 0,
+                    stepped: true,
+                    yAxisID: 'y'
+                },
+                {
+                    label: 'P&L',
+                    data: data.pnl,
+                    borderColor: '#00b894',
+                    borderWidth: 1.5,
+                    pointRadius: 0,
+                    yAxisID: 'pnl'
+                }
+            ]
+        },
+        options: options
+    };
+}
+
+function getSentimentChartConfig(data) {
+    return {
+        type: 'line',
+        data: {
+            labels: data.labels,
+            datasets: [
+                {
+                    label: 'Rolling Sentiment',
+                    data: data.sentiment,
+                    borderColor: '#FFD700',
+                    borderWidth: 2,
+                    pointRadius: 0,
+                },
+                {
+                    label: 'Daily Sentiment',
+                    data: data.daily_sentiment,
+                    borderColor: 'rgba(224, 224, 224, 0.4)',
+                    borderWidth: 1,
+                    pointRadius: 2,
+                    showLine: false,
+                }
+            ]
+        },
+        options: commonLineChartOptions()
+    };
+}
+
 function getMLChartConfig(data) {
     return {
         type: 'bar',
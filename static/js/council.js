@@ -30,6 +30,12 @@ async function handleCouncilRun() {
     errorMessage.style.display = 'none';
     resultContent.style.display = 'none';
 
+    // --- Streamed votes, with a one-shot request as fallback ---
+    if (window.EventSource) {
+        streamCouncil(ticker);
+        return;
+    }
+
     // --- API Call ---
     try {
         const response = await fetch(`/api/run_council/${ticker}`);
@@ -47,12 +53,74 @@ async function handleCouncilRun() {
         resultContent.style.display = 'block';
 
     } catch (error) {
-        // --- Display Error ---
-        console.error('Error running council:', error);
+        showCouncilError(error);
+    }
+}
+
+function streamCouncil(ticker) {
+    const loadingSpinner = document.getElementById('councilLoadingSpinner');
+    const resultContent = document.getElementById('councilResultContent');
+    const source = new EventSource(`/api/run_council/${ticker}/stream`);
+    let finished = false;
+
+    resetCouncilResults();
+
+    // Each strategy's vote is shown as soon as it arrives
+    source.addEventListener('vote', (event) => {
+        const vote = JSON.parse(event.data);
+        loadingSpinner.style.display = 'none';
+        resultContent.style.display = 'block';
+        addCouncilVote(vote);
+    });
+
+    source.addEventListener('decision', (event) => {
+        finished = true;
+        source.close();
+        populateCouncilResults(JSON.parse(event.data));
         loadingSpinner.style.display = 'none';
-        errorMessage.textContent = `Error: ${error.message}`;
-        errorMessage.style.display = 'block';
+        resultContent.style.display = 'block';
+    });
+
+    source.addEventListener('error', (event) => {
+        if (finished) return;
+        finished = true;
+        source.close();
+        // Server-sent 'error' events carry a message; connection errors do not
+        const message = event.data ? JSON.parse(event.data).error : 'Lost connection to the council stream.';
+        showCouncilError(new Error(message));
+    });
+}
+
+function showCouncilError(error) {
+    // --- Display Error ---
+    console.error('Error running council:', error);
+    document.getElementById('councilLoadingSpinner').style.display = 'none';
+    const errorMessage = document.getElementById('councilErrorMessage');
+    errorMessage.textContent = `Error: ${error.message}`;
+    errorMessage.style.display = 'block';
+}
+
+function resetCouncilResults() {
+    const voteBox = document.getElementById('councilVoteBox');
+    voteBox.textContent = 'Deliberating...';
+    voteBox.className = 'recommendation-box';
+
+    ['buy', 'sell', 'hold'].forEach(side => {
+        document.getElementById(`${side}List`).innerHTML = '';
+        document.getElementById(`${side}Count`).textContent = 0;
+    });
+    document.getElementById('aiPromptTextarea').value = '';
+}
+
+function addCouncilVote(vote) {
+    // Errors are not listed, but still count towards progress
+    if (vote.recommendation !== 'Error') {
+        const side = vote.recommendation.toLowerCase();
+        document.getElementById(`${side}List`).innerHTML += `<li>${formatAlgoName(vote.strategy)}</li>`;
+        document.getElementById(`${side}Count`).textContent = vote.tally[vote.recommendation];
     }
+    document.getElementById('councilVoteBox').textContent =
+        `Deliberating... (${vote.completed}/${vote.total})`;
 }
 
 function populateCouncilResults(data) {
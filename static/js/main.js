@@ -41,7 +41,8 @@ async function handleAlgorithmRun() {
     
     // --- API Call ---
     try {
-        const payload = { ticker1 };
+        // Ask for the compact chart encoding; chart.js decodes it
+        const payload = { ticker1, chart_format: 'compact' };
         if (ticker2) {
             payload.ticker2 = ticker2;
         }
@@ -0,0 +1,16 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """An empty price store in a temp folder, with nothing held in memory."""
+    from core import price_store, utils
+
+    monkeypatch.setattr(price_store, 'PRICE_STORE_DIR', str(tmp_path))
+    monkeypatch.setattr(utils, '_HISTORY', {})
+    return tmp_path
@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import app as app_module
+from core import price_store, result_cache, utils
+
+
+def _store_bars(ticker, periods=300, end=None):
+    end = end if end is not None else pd.Timestamp.now(tz='America/New_York').normalize()
+    index = pd.bdate_range(end=end, periods=periods, tz='America/New_York')
+    close = np.linspace(100, 120, len(index))
+    frame = pd.DataFrame({'Open': close, 'High': close, 'Low': close, 'Close': close,
+                          'Volume': 1e6}, index=index)
+    price_store.save(ticker, '1d', frame, index[0])
+    return frame
+
+
+@pytest.fixture
+def client(store, monkeypatch):
+    monkeypatch.setattr(result_cache, '_CACHE', result_cache.LRUByteCache(1024 * 1024))
+
+    # A cache lookup must never reach yfinance
+    class NoDownloads:
+        def __init__(self, ticker):
+            raise AssertionError(f"unexpected download of {ticker}")
+
+    monkeypatch.setattr(utils.yf, 'Ticker', NoDownloads)
+    return app_module.app.test_client()
+
+
+@pytest.fixture
+def runs(monkeypatch):
+    calls = []
+
+    def fake_momentum(ticker):
+        calls.append(ticker)
+        return {'recommendation': 'Buy', 'summary': f"run {len(calls)}", 'chart_data': {}}
+
+    metadata = dict(app_module.STRATEGY_METADATA['momentum'], function=fake_momentum)
+    monkeypatch.setitem(app_module.STRATEGY_METADATA, 'momentum', metadata)
+    return calls
+
+
+def test_post_etag_round_trip(client, runs):
+    _store_bars('AAA')
+
+    first = client.post('/api/run_algorithm/momentum', json={'ticker1': 'AAA'})
+    assert first.status_code == 200
+    assert first.headers['X-Cache'] == 'MISS'
+    etag = first.headers['ETag']
+
+    again = client.post('/api/run_algorithm/momentum', json={'ticker1': 'AAA'},
+                        headers={'If-None-Match': etag})
+    assert again.status_code == 304
+    assert again.data == b''
+    assert again.headers['X-Cache'] == 'HIT'
+    assert runs == ['AAA']
+
+    # A new bar moves the request to a new key
+    _store_bars('AAA', end=pd.Timestamp.now(tz='America/New_York').normalize() + pd.offsets.BDay())
+    fresh = client.post('/api/run_algorithm/momentum', json={'ticker1': 'AAA'},
+                        headers={'If-None-Match': etag})
+    assert fresh.status_code == 200
+    assert fresh.headers['X-Cache'] == 'MISS'
+    assert fresh.headers['ETag'] != etag
+    assert runs == ['AAA', 'AAA']
+
+
+def test_stale_prices_skip_the_cache_lookup(client, runs, monkeypatch):
+    _store_bars('AAA')
+    monkeypatch.setattr(utils, 'PRICE_MAX_AGE', -1)
+    assert result_cache.result_key('momentum', ['AAA']) is None
+
+
+def test_council_key_follows_the_pair_partner(client, monkeypatch):
+    for ticker in ['AAA', 'BBB'] + utils.BASE_PORTFOLIO:
+        _store_bars(ticker)
+    monkeypatch.setattr(app_module, 'council_tickers',
+                        lambda ticker: [ticker, 'BBB'] + utils.BASE_PORTFOLIO)
+    monkeypatch.setattr(app_module, 'run_council_decision',
+                        lambda ticker: {'final_recommendation': 'Hold', 'votes': []})
+
+    first = client.get('/api/run_council/AAA')
+    assert client.get('/api/run_council/AAA').headers['X-Cache'] == 'HIT'
+
+    _store_bars('BBB', end=pd.Timestamp.now(tz='America/New_York').normalize() + pd.offsets.BDay())
+    refreshed = client.get('/api/run_council/AAA', headers={'If-None-Match': first.headers['ETag']})
+    assert refreshed.headers['X-Cache'] == 'MISS'
+
+
+def test_council_tickers_include_partner_and_benchmarks(monkeypatch):
+    from core import council, pairs
+
+    monkeypatch.setattr(pairs, 'best_partner', lambda ticker: 'BBB')
+    assert council.council_tickers('aaa') == ['AAA', 'BBB'] + utils.BASE_PORTFOLIO
@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import backtest
+
+
+def _prices():
+    rng = np.random.default_rng(0)
+    index = pd.bdate_range('2021-01-04', periods=600)
+    columns = ['AAA', 'BBB', 'SPY']
+    return pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 0.01, (len(index), 3)), axis=0)),
+                        index=index, columns=columns)
+
+
+def test_pooled_ml_replay_is_labelled_as_such():
+    result = backtest.run_backtest(['AAA', 'BBB'], prices=_prices())
+
+    assert set(result['strategies']) == set(backtest.BACKTEST_STRATEGIES)
+    assert 'ml_pooled' in result['strategies'] and 'ml_predictive' not in result['strategies']
+    assert result['timings']['ml_fits'] > 0
+    assert len(result['equity_curves']['council']) == len(result['dates'])
+
+
+def test_per_ticker_ml_is_not_offered():
+    with pytest.raises(ValueError):
+        backtest.run_backtest(['AAA'], strategies=['ml_predictive'], prices=_prices())
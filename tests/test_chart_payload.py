@@ -0,0 +1,136 @@
+import base64
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import app as app_module
+from core import result_cache
+from core.chart_payload import COMPACT_FORMAT, compact_chart_data, downsample_chart_data, lttb_indices
+
+
+def _decode(data):
+    """Python port of decodeChartData in static/js/chart.js."""
+    if not data or data.get('format') != COMPACT_FORMAT:
+        return data
+
+    decoded = dict(data['other'])
+    axis = data['axis']
+    offsets = np.frombuffer(base64.b64decode(axis['offsets']), dtype='<i4')
+    stamps = pd.to_datetime(axis['start'] + offsets.astype(np.int64) * axis['unit'], unit='s')
+    decoded['labels'] = [s.strftime('%Y-%m-%d') if axis['unit'] == 86400 else s.isoformat() for s in stamps]
+    for key, encoded in data['series'].items():
+        values = np.frombuffer(base64.b64decode(encoded), dtype='<f4')
+        decoded[key] = [None if np.isnan(v) else float(v) for v in values]
+    for key, value in data['constants'].items():
+        decoded[key] = [value] * data['length']
+    for key, encoded in data['markers'].items():
+        decoded[key] = [decoded['labels'][i] for i in np.frombuffer(base64.b64decode(encoded), dtype='<i4')]
+    return decoded
+
+
+def _chart(n=1000):
+    rng = np.random.default_rng(0)
+    labels = pd.bdate_range('2020-01-01', periods=n).strftime('%Y-%m-%d').tolist()
+    prices = (100 + np.cumsum(rng.normal(0, 1, n))).tolist()
+    sma = [float('nan')] * 19 + pd.Series(prices).rolling(20).mean().iloc[19:].tolist()
+    return {
+        'labels': labels,
+        'price': prices,
+        'sma': sma,
+        'upper_threshold': [2.0] * n,
+        'buy_signals': [labels[10], labels[500]],
+        'sell_signals': [labels[-3]],
+        'note': 'passed through',
+    }
+
+
+def _lttb_reference(y, max_points):
+    """Straightforward per-bucket LTTB, as in Steinarsson's thesis."""
+    n = len(y)
+    edges = np.linspace(1, n - 1, max_points - 1).astype(int)
+    selected, a = [0], 0
+    for i in range(max_points - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 1 < max_points - 2:
+            next_start, next_end = edges[i + 1], edges[i + 2]
+            avg_x, avg_y = np.arange(next_start, next_end).mean(), y[next_start:next_end].mean()
+        else:
+            avg_x, avg_y = n - 1, y[-1]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((a - avg_x) * (y[j] - y[a]) - (a - j) * (avg_y - y[a]))
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(best)
+        a = best
+    return np.array(selected + [n - 1])
+
+
+def test_compact_round_trip():
+    chart = _chart()
+    compact = compact_chart_data(chart)
+    assert compact['format'] == COMPACT_FORMAT
+    assert compact['constants'] == {'upper_threshold': 2.0}
+    assert compact['other'] == {'note': 'passed through'}
+
+    decoded = _decode(compact)
+    assert decoded['labels'] == chart['labels']
+    assert decoded['buy_signals'] == chart['buy_signals']
+    assert decoded['sell_signals'] == chart['sell_signals']
+    assert decoded['upper_threshold'] == chart['upper_threshold']
+    assert decoded['sma'][:19] == [None] * 19
+    # float32 keeps about 7 significant digits
+    assert np.allclose(decoded['price'], chart['price'], rtol=1e-6)
+    assert np.allclose(decoded['sma'][19:], chart['sma'][19:], rtol=1e-6)
+
+
+def test_compact_leaves_charts_without_a_date_axis():
+    chart = {'labels': ['Lag_1', 'Lag_5'], 'importance': [0.4, 0.6]}
+    assert compact_chart_data(chart) is chart
+
+
+@pytest.mark.parametrize('max_points', [3, 50, 333])
+def test_lttb_matches_reference(max_points):
+    y = np.cumsum(np.random.default_rng(max_points).normal(0, 1, 2000))
+    indices = lttb_indices(y, max_points)
+
+    assert len(indices) == max_points
+    assert indices[0] == 0 and indices[-1] == len(y) - 1
+    assert np.array_equal(indices, _lttb_reference(y, max_points))
+
+
+def test_downsample_keeps_markers_and_forced_points():
+    chart = _chart()
+    reduced, kept = downsample_chart_data(chart, 100, keep=[777])
+
+    assert len(reduced['labels']) == len(kept) <= 100
+    assert 777 in kept
+    for label in chart['buy_signals'] + chart['sell_signals']:
+        assert label in reduced['labels']
+    assert reduced['price'] == [chart['price'][i] for i in kept]
+    assert reduced['note'] == chart['note']
+
+
+def test_run_algorithm_downsamples_and_compacts(monkeypatch):
+    monkeypatch.setattr(result_cache, '_CACHE', result_cache.LRUByteCache(1024 * 1024))
+    monkeypatch.setattr(result_cache, 'last_bar_timestamp', lambda ticker, interval="1d": None)
+    metadata = dict(app_module.STRATEGY_METADATA['momentum'],
+                    function=lambda ticker: {'recommendation': 'Hold', 'summary': '', 'chart_data': _chart()})
+    monkeypatch.setitem(app_module.STRATEGY_METADATA, 'momentum', metadata)
+    client = app_module.app.test_client()
+
+    plain = client.post('/api/run_algorithm/momentum', json={'ticker1': 'AAA', 'max_points': 200}).get_json()
+    assert len(plain['chart_data']['labels']) == 200
+    assert plain['chart_data']['labels'][0] == _chart()['labels'][0]
+    assert plain['chart_data']['labels'][-1] == _chart()['labels'][-1]
+
+    compact = client.post('/api/run_algorithm/momentum',
+                          json={'ticker1': 'AAA', 'max_points': 200, 'chart_format': 'compact'}).get_json()
+    assert compact['chart_data']['length'] == 200
+    decoded = _decode(compact['chart_data'])
+    assert decoded['labels'] == plain['chart_data']['labels']
+    assert np.allclose(decoded['price'], plain['chart_data']['price'], rtol=1e-6)
+
+    bad = client.post('/api/run_algorithm/momentum', json={'ticker1': 'AAA', 'max_points': 2})
+    assert bad.status_code == 400
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.covariance import ledoit_wolf
+
+from core.covariance import GramCovariance, TRADING_DAYS
+
+
+def _returns(k=6, n=300):
+    rng = np.random.default_rng(0)
+    market = rng.normal(0, 0.01, (n, 1))
+    values = market * rng.uniform(0.5, 1.5, k) + rng.normal(0, 0.01, (n, k))
+    return pd.DataFrame(values, index=pd.bdate_range('2023-01-02', periods=n),
+                        columns=[f"T{i}" for i in range(k)])
+
+
+@pytest.mark.parametrize('method', ['sample', 'ledoit_wolf', 'factor'])
+def test_bordered_matches_full_recompute(method):
+    returns = _returns()
+    base = GramCovariance(returns.iloc[:, :-1])
+    bordered = base.bordered(returns.iloc[:, -1])
+    full = GramCovariance(returns)
+
+    assert bordered.columns == full.columns
+    assert np.allclose(bordered.gram, full.gram)
+    assert np.allclose(bordered.gram_sq, full.gram_sq)
+    pd.testing.assert_frame_equal(bordered.covariance(method), full.covariance(method))
+
+
+def test_bordered_rejects_a_column_missing_dates():
+    returns = _returns()
+    base = GramCovariance(returns.iloc[:, :-1])
+    with pytest.raises(ValueError):
+        base.bordered(returns.iloc[10:, -1])
+
+
+def test_estimates_match_reference_implementations():
+    returns = _returns()
+    gram = GramCovariance(returns)
+
+    assert np.allclose(gram.sample(), returns.cov() * TRADING_DAYS)
+    shrunk, shrinkage = ledoit_wolf(returns.to_numpy())
+    assert gram.ledoit_wolf_shrinkage() == pytest.approx(shrinkage)
+    assert np.allclose(gram.ledoit_wolf(), shrunk * TRADING_DAYS)
+
+
+@pytest.mark.parametrize('method', ['sample', 'ledoit_wolf', 'factor'])
+@pytest.mark.parametrize('n', [300, 4])
+def test_factor_form_reproduces_the_covariance(method, n):
+    gram = GramCovariance(_returns(n=n))
+    exposures, idiosyncratic = gram.factor_form(method)
+    assert np.allclose(exposures @ exposures.T + np.diag(idiosyncratic), gram.covariance(method))
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+from arch import arch_model
+
+from algorithms.garch_batch import fit_garch_batch
+
+
+def _simulate(n_series, T, seed):
+    """GARCH(1,1) series with random, stationary parameters (returns scaled by 100)."""
+    rng = np.random.default_rng(seed)
+    out = np.empty((T, n_series))
+    for j in range(n_series):
+        omega, alpha = rng.uniform(0.01, 0.1), rng.uniform(0.03, 0.15)
+        beta = rng.uniform(0.75, 0.97 - alpha)
+        s2, e = omega / (1 - alpha - beta), 0.0
+        for t in range(T):
+            s2 = omega + alpha * e ** 2 + beta * s2
+            e = np.sqrt(s2) * rng.standard_normal()
+            out[t, j] = 0.05 + e
+    return out
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_batch_fit_matches_arch(seed):
+    returns = _simulate(20, 504, seed)
+    fit = fit_garch_batch(returns)
+
+    loglik, forecast = [], []
+    for j in range(returns.shape[1]):
+        result = arch_model(returns[:, j], mean='Constant', vol='Garch', p=1, q=1,
+                            dist='normal').fit(disp='off')
+        loglik.append(result.loglikelihood)
+        forecast.append(result.forecast(horizon=1, reindex=False).variance.values[-1, 0])
+    loglik, forecast = np.array(loglik), np.array(forecast)
+
+    assert fit['converged'].all()
+    # At least as good an optimum as arch's, up to the persistence cap
+    # (arch may put alpha + beta on 1, the batch fitter stops at 0.9999)
+    assert (fit['loglik'] >= loglik - 0.05).all()
+
+    # Where both reach the same optimum, the forecasts agree closely; the
+    # rest sit on a flat likelihood ridge where the optimum is ill-defined
+    same = np.abs(fit['loglik'] - loglik) < 1e-3
+    assert same.mean() >= 0.9
+    error = np.abs(np.sqrt(fit['forecast_variance']) / np.sqrt(forecast) - 1)
+    assert error[same].max() < 1e-3
+
+
+def test_failed_line_search_is_not_converged(monkeypatch):
+    from algorithms import garch_batch
+
+    # With no line-search trials allowed, no step is ever accepted while the
+    # grid starts are still far from the optimum
+    monkeypatch.setattr(garch_batch, '_MAX_HALVINGS', 0)
+    fit = fit_garch_batch(_simulate(5, 504, 0))
+
+    assert fit['failed'].all()
+    assert not fit['converged'].any()
@@ -0,0 +1,55 @@
+import threading
+
+import pytest
+
+from core import jobs
+
+
+@pytest.fixture
+def queue(monkeypatch):
+    monkeypatch.setattr(jobs, '_STORE', jobs.MemoryJobStore())
+    monkeypatch.setattr(jobs, '_HANDLERS', {})
+    monkeypatch.setattr(jobs, '_EXECUTORS', {})
+    release = threading.Event()
+    calls = []
+
+    def slow_square(x):
+        calls.append(x)
+        release.wait(5)
+        return {'square': x * x}
+
+    jobs.register_job_type('square', slow_square)
+    jobs.register_job_type('fail', lambda: {'error': 'no data'})
+    yield release, calls
+    release.set()
+
+
+def _finish(job_id):
+    return list(jobs.iter_job_updates(job_id, timeout=5))[-1]
+
+
+def test_identical_jobs_share_one_run(queue):
+    release, calls = queue
+    first = jobs.submit_job('square', {'x': 3})
+    second = jobs.submit_job('square', {'x': 3})
+    other = jobs.submit_job('square', {'x': 4})
+    assert first['id'] == second['id'] != other['id']
+
+    release.set()
+    done = _finish(first['id'])
+    assert done['status'] == jobs.DONE and done['result'] == {'square': 9}
+    # The finished result is handed out again within JOB_RESULT_TTL
+    assert jobs.submit_job('square', {'x': 3})['id'] == first['id']
+    _finish(other['id'])
+    assert sorted(calls) == [3, 4]
+
+
+def test_error_results_are_not_reused(queue):
+    failed = jobs.submit_job('fail', {})
+    assert _finish(failed['id'])['status'] == jobs.ERROR
+    assert jobs.submit_job('fail', {})['id'] != failed['id']
+
+
+def test_unknown_job_type(queue):
+    with pytest.raises(ValueError):
+        jobs.submit_job('nope', {})
@@ -0,0 +1,44 @@
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from algorithms import market_making
+
+
+@pytest.fixture
+def market(tmp_path, monkeypatch):
+    monkeypatch.setattr(market_making, 'ORDER_FLOW_DIR', str(tmp_path))
+    monkeypatch.setattr(market_making, '_FLOWS', OrderedDict())
+    monkeypatch.setattr(market_making, 'SYNTHETIC_EVENTS', 2000)
+    monkeypatch.setattr(market_making, 'get_ticker_info', lambda ticker, fields=None: {'bid': 10.0, 'ask': 10.05})
+
+    rng = np.random.default_rng(0)
+    index = pd.bdate_range('2024-01-01', periods=252)
+    volatility = {'AAA': 0.01, 'BBB': 0.03}
+    frames = {ticker: pd.DataFrame({'Close': 100 * np.exp(np.cumsum(rng.normal(0, vol, len(index))))}, index=index)
+              for ticker, vol in volatility.items()}
+    monkeypatch.setattr(market_making, 'fetch_stock_data', lambda ticker, period="1y": frames[ticker])
+
+
+def test_tickers_share_one_synthetic_flow(market):
+    results = [market_making.run_market_making(ticker) for ticker in ('AAA', 'BBB', 'AAA')]
+
+    assert all(result['recommendation'] == 'Hold' for result in results)
+    assert len(market_making._FLOWS) == 1
+    # Same unit sessions, scaled to each ticker's own volatility
+    sigmas = [result['statistics']['sigma'] for result in results]
+    assert sigmas[0] == sigmas[2] and sigmas[1] > 2 * sigmas[0]
+
+
+def test_council_vote_does_not_simulate(market, monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("the council vote must not simulate")
+
+    monkeypatch.setattr(market_making, 'simulate', fail)
+    monkeypatch.setattr(market_making, '_unit_order_flow', fail)
+
+    vote = market_making.run_market_making_vote('AAA')
+    assert vote['recommendation'] == 'Hold'
+    assert '$0.05' in vote['summary']
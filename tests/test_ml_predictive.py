@@ -0,0 +1,46 @@
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from algorithms import ml_predictive
+from core import model_registry
+
+
+@pytest.fixture
+def prices(tmp_path, monkeypatch):
+    monkeypatch.setattr(model_registry, 'MODEL_DIR', str(tmp_path))
+    monkeypatch.setattr(model_registry, '_LOADED', OrderedDict())
+    requested = []
+
+    def fake_price_matrix(tickers, period="3y", **kwargs):
+        requested.append(list(tickers))
+        index = pd.bdate_range('2022-01-03', periods=400)
+        rng = np.random.default_rng(len(tickers))
+        walks = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (len(index), len(tickers))), axis=0))
+        return pd.DataFrame(walks, index=index, columns=[t.upper() for t in tickers])
+
+    monkeypatch.setattr(ml_predictive, 'fetch_price_matrix', fake_price_matrix)
+    return requested
+
+
+def test_pooled_model_is_shared_across_universes(prices, monkeypatch):
+    trained = []
+    train = ml_predictive.train_pooled_model
+
+    def counting_train(*args, **kwargs):
+        trained.append(args)
+        return train(*args, **kwargs)
+
+    monkeypatch.setattr(ml_predictive, 'train_pooled_model', counting_train)
+
+    first = ml_predictive.run_ml_predictive_pooled(['AAA', 'BBB'])
+    second = ml_predictive.run_ml_predictive_pooled(['CCC', 'DDD', 'EEE'])
+
+    # Trained once, on the canonical universe, and used to score both batches
+    assert len(trained) == 1
+    assert prices[0] == ml_predictive.POOLED_UNIVERSE
+    assert sorted(first) == ['AAA', 'BBB']
+    assert sorted(second) == ['CCC', 'DDD', 'EEE']
+    assert all(result['recommendation'] in ('Buy', 'Sell') for result in second.values())
@@ -0,0 +1,54 @@
+import json
+import os
+from collections import OrderedDict
+
+import joblib
+import pandas as pd
+import pytest
+
+from core import model_registry
+
+FEATURES = ['a', 'b']
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    monkeypatch.setattr(model_registry, 'MODEL_DIR', str(tmp_path))
+    monkeypatch.setattr(model_registry, '_LOADED', OrderedDict())
+    return tmp_path
+
+
+def test_save_prunes_older_training_windows(registry):
+    for day in ('2024-01-31', '2024-02-29', '2024-03-29'):
+        model_registry.save_model('m', 'AAA', FEATURES, pd.Timestamp(day), {'window': day})
+
+    folder = model_registry._folder('m', 'AAA', FEATURES)
+    assert sorted(os.listdir(folder)) == ['2024-03-29.joblib', '2024-03-29.json']
+    model, meta = model_registry.load_latest_model('m', 'AAA', FEATURES)
+    assert model == {'window': '2024-03-29'}
+    assert len(model_registry._LOADED) == 1
+
+
+def test_loaded_models_are_bounded(registry, monkeypatch):
+    monkeypatch.setattr(model_registry, 'MODEL_CACHE_SIZE', 2)
+    for ticker in ('AAA', 'BBB', 'CCC'):
+        model_registry.save_model('m', ticker, FEATURES, pd.Timestamp('2024-01-31'), ticker)
+    assert model_registry.load_latest_model('m', 'AAA', FEATURES)[0] == 'AAA'
+    assert len(model_registry._LOADED) == 2
+
+
+def test_reload_after_another_process_rewrites_the_window(registry):
+    model_registry.save_model('m', 'AAA', FEATURES, pd.Timestamp('2024-01-31'), 'old')
+    stem = os.path.join(model_registry._folder('m', 'AAA', FEATURES), '2024-01-31')
+
+    # Another worker retrains the same window and rewrites both files
+    joblib.dump('new', stem + '.joblib')
+    with open(stem + '.json', 'w') as f:
+        json.dump({'train_end': '2024-01-31', 'trained_at': 1.0}, f)
+    for suffix in ('.joblib', '.json'):
+        stat = os.stat(stem + suffix)
+        os.utime(stem + suffix, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    model, meta = model_registry.load_latest_model('m', 'AAA', FEATURES)
+    assert model == 'new'
+    assert meta['trained_at'] == 1.0
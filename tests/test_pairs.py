@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import pairs, price_store
+
+
+def _log_prices(n=500, seed=0):
+    rng = np.random.default_rng(seed)
+    base = np.cumsum(rng.normal(0, 0.01, n))
+    spread = np.zeros(n)
+    for t in range(1, n):
+        spread[t] = 0.8 * spread[t - 1] + rng.normal(0, 0.005)
+    independent = np.cumsum(rng.normal(0, 0.01, n))
+    return np.column_stack([base + 4.6, 1.5 * base + spread + 3.0, independent + 4.0])
+
+
+def test_engle_granger_matches_statsmodels():
+    from statsmodels.tsa.stattools import coint
+
+    log_prices = _log_prices()
+    tests = pairs.engle_granger(log_prices[:, [1, 2]], log_prices[:, [0, 0]])
+    for m, column in enumerate([1, 2]):
+        stat, p_value, _ = coint(log_prices[:, column], log_prices[:, 0], trend='c', maxlag=1, autolag=None)
+        assert tests['adf_stat'][m] == pytest.approx(stat, rel=1e-6)
+        assert tests['p_value'][m] == pytest.approx(p_value, rel=1e-6)
+    assert tests['hedge_ratio'][0] == pytest.approx(1.5, rel=0.05)
+    assert tests['p_value'][0] < pairs.MAX_P_VALUE < tests['p_value'][1]
+
+
+def test_pair_index_finds_the_cointegrated_partner(store, monkeypatch):
+    monkeypatch.setattr(pairs, 'PAIR_INDEX_PATH', str(store / 'pairs' / 'index.json'))
+    monkeypatch.setattr(pairs, '_INDEX', None)
+    index = pd.bdate_range(end=pd.Timestamp.now(tz='America/New_York').normalize(), periods=500,
+                           tz='America/New_York')
+    for ticker, column in zip(['AAA', 'BBB', 'CCC'], np.exp(_log_prices()).T):
+        frame = pd.DataFrame({'Close': column}, index=index)
+        price_store.save(ticker, '1d', frame, index[0])
+
+    built = pairs.pair_index(refresh=True)
+    assert built['best_partner']['AAA'] == 'BBB'
+    assert built['best_partner']['BBB'] == 'AAA'
+    assert 'CCC' not in built['best_partner']
+
+    # Served from disk in a fresh process
+    monkeypatch.setattr(pairs, '_INDEX', None)
+    assert pairs.best_partner('bbb') == 'AAA'
@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+
+from algorithms import reinforcement
+
+
+def _prices():
+    rng = np.random.default_rng(0)
+    index = pd.bdate_range('2024-01-01', periods=200)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (len(index), 3)), axis=0))
+    return pd.DataFrame(closes, index=index, columns=['AAA', 'GAP', 'LAG'])
+
+
+def test_latest_states_use_contiguous_windows():
+    prices = _prices()
+    # A missing bar inside the last WINDOW days: no contiguous window
+    prices.iloc[-10, 1] = np.nan
+    # No bar on the frame's last date: the window ends on the ticker's own last bar
+    prices.iloc[-1, 2] = np.nan
+
+    tickers, states = reinforcement.latest_states(prices)
+    assert tickers == ['AAA', 'LAG']
+
+    z, _ = reinforcement.normalized_returns(prices.to_numpy(dtype=float))
+    window = reinforcement.WINDOW
+    assert np.array_equal(states[0, :window], z[-window:, 0])
+    assert np.array_equal(states[1, :window], z[-window - 1:-1, 2])
+
+
+def test_latest_states_need_a_full_window():
+    prices = _prices().iloc[:reinforcement.VOL_WINDOW + reinforcement.WINDOW - 1]
+    tickers, states = reinforcement.latest_states(prices)
+    assert tickers == [] and states.shape == (0, len(reinforcement.STATE_FEATURES))
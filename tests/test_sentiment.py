@@ -0,0 +1,22 @@
+import numpy as np
+import pandas as pd
+
+from algorithms.sentiment import headline_signal
+
+
+def _series(end, periods=20):
+    index = pd.date_range(end=end, periods=periods, freq='D')
+    rolling = pd.Series(np.linspace(-0.5, 0.5, periods), index=index)
+    return pd.DataFrame({'headlines': 3, 'daily': rolling, 'rolling': rolling})
+
+
+def test_recent_headlines_follow_the_change():
+    series = _series('2026-03-10')
+    assert headline_signal(series, now=pd.Timestamp('2026-03-11', tz='UTC'))['recommendation'] == 'Buy'
+
+
+def test_stale_headlines_vote_hold():
+    series = _series('2026-03-10')
+    result = headline_signal(series, now=pd.Timestamp('2026-04-10', tz='UTC'))
+    assert result['recommendation'] == 'Hold'
+    assert 'No recent headlines' in result['summary']
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import indicators, streaming
+
+
+def _series(n=400):
+    rng = np.random.default_rng(0)
+    return pd.Series(100 + np.cumsum(rng.normal(0, 1, n)), index=pd.bdate_range('2022-01-03', periods=n))
+
+
+def _sync_in_chunks(state, series, chunk=37):
+    for end in range(chunk, len(series) + chunk, chunk):
+        assert state.sync(series.iloc[:end])
+    return state
+
+
+def test_streaming_indicators_match_full_recompute():
+    series = _series()
+    close = series.to_numpy()
+
+    bands = indicators.bollinger_bands(close)
+    bollinger = _sync_in_chunks(streaming.BollingerState(20, 2), series)
+    assert bollinger.upper_band == pytest.approx(bands['upper_band'][-1])
+    assert bollinger.lower_band == pytest.approx(bands['lower_band'][-1])
+
+    zscore = _sync_in_chunks(streaming.ZScoreState(20), series)
+    assert zscore.z_score == pytest.approx(indicators.rolling_zscore(close)[-1])
+
+    crossover = indicators.sma_crossover(close, 20, 50)
+    state = _sync_in_chunks(streaming.CrossoverState(20, 50), series)
+    assert state.short.mean == pytest.approx(crossover['sma_short'][-1])
+    assert state.long.mean == pytest.approx(crossover['sma_long'][-1])
+    assert state.signal == crossover['signal'][-1]
+
+
+def test_revised_last_bar_matches_full_recompute():
+    series = _series()
+    state = streaming.BollingerState(20, 2)
+    state.sync(series)
+
+    # The last (partial) bar's close moves, and one new bar arrives
+    revised = series.copy()
+    revised.iloc[-1] += 5
+    revised.loc[revised.index[-1] + pd.offsets.BDay()] = revised.iloc[-1] - 1
+    assert state.sync(revised)
+
+    bands = indicators.bollinger_bands(revised.to_numpy())
+    assert state.upper_band == pytest.approx(bands['upper_band'][-1])
+    assert state.last_timestamp == revised.index[-1]
+
+
+def test_sync_state_persists_between_processes(tmp_path, monkeypatch):
+    monkeypatch.setattr(streaming, 'INDICATOR_STATE_DIR', str(tmp_path))
+    monkeypatch.setattr(streaming, '_STATES', {})
+    series = _series()
+    key = ('test', 'AAA', 20)
+
+    streaming.sync_state(key, series.iloc[:-1], lambda: streaming.RunningSMA(20))
+    # A new process starts from the saved state and only consumes the new bar
+    monkeypatch.setattr(streaming, '_STATES', {})
+    state = streaming.sync_state(key, series, lambda: pytest.fail("state was rebuilt"))
+    assert state.mean == pytest.approx(series.iloc[-20:].mean())
@@ -0,0 +1,173 @@
+import numpy as np
+import pandas as pd
+
+from core import price_store, utils
+
+
+def _bars(index):
+    close = np.linspace(100, 120, len(index))
+    return pd.DataFrame({'Open': close, 'High': close, 'Low': close, 'Close': close,
+                         'Volume': 1e6, 'Dividends': 0.0, 'Stock Splits': 0.0}, index=index)
+
+
+def _fake_download(tickers, period=None, interval='1d', ignore_tz=None, **kwargs):
+    # Like yf.download: daily bars lose their timezone unless ignore_tz=False
+    index = pd.bdate_range(end=pd.Timestamp.now(tz='America/New_York').normalize(),
+                           periods=800, tz='America/New_York')
+    if ignore_tz is None or ignore_tz:
+        index = index.tz_localize(None)
+    return pd.concat({ticker: _bars(index) for ticker in tickers}, axis=1)
+
+
+def test_bulk_fetch_then_single_ticker_read(store, monkeypatch):
+    monkeypatch.setattr(utils.yf, 'download', _fake_download)
+
+    frames = utils.fetch_stock_data_many(['AAA', 'BBB'], period='3y')
+    assert sorted(frames) == ['AAA', 'BBB']
+
+    # Served from the store written by the bulk download
+    data = utils.fetch_stock_data('AAA', period='1y')
+    assert data.index.tz is not None
+    assert len(data) < len(frames['AAA'])
+
+
+def test_bulk_fetch_skips_tz_naive_frames(store, monkeypatch):
+    def naive_download(tickers, **kwargs):
+        return _fake_download(tickers, ignore_tz=True)
+
+    class FakeTicker:
+        def __init__(self, ticker):
+            pass
+
+        def history(self, period=None, interval='1d', start=None, end=None):
+            return _fake_download(['X'], ignore_tz=False)['X']
+
+    monkeypatch.setattr(utils.yf, 'download', naive_download)
+    monkeypatch.setattr(utils.yf, 'Ticker', FakeTicker)
+
+    frames = utils.fetch_stock_data_many(['AAA'], period='3y')
+    assert frames['AAA'].index.tz is not None
+    assert utils.fetch_stock_data('AAA', period='1y').index.tz is not None
+
+
+def test_delta_with_split_redownloads_history(store, monkeypatch):
+    index = pd.bdate_range(end=pd.Timestamp.now(tz='America/New_York').normalize(),
+                           periods=300, tz='America/New_York')
+    before = _bars(index[:-1])
+    # A 10:1 split on the newest bar; auto-adjusted history is re-based
+    after = _bars(index)
+    after.loc[index[:-1], ['Open', 'High', 'Low', 'Close']] /= 10
+    after.loc[index[-1], 'Stock Splits'] = 10.0
+    calls = []
+
+    class FakeTicker:
+        def __init__(self, ticker):
+            pass
+
+        def history(self, period=None, interval='1d', start=None, end=None):
+            calls.append((period, start))
+            frame = before if len(calls) == 1 else after
+            return frame if start is None else frame[frame.index >= start]
+
+    monkeypatch.setattr(utils.yf, 'Ticker', FakeTicker)
+
+    utils.fetch_stock_data('AAA', period='1y')
+    data = utils.fetch_stock_data('AAA', period='1y', max_age=0)
+
+    # The delta showed the split, so the full range was fetched again
+    assert len(calls) == 3
+    assert np.allclose(data['Close'], after['Close'].loc[data.index])
+
+
+def test_streaming_state_rebuilds_after_readjustment():
+    from core.streaming import RunningSMA
+
+    index = pd.bdate_range('2024-01-01', periods=10)
+    series = pd.Series(np.arange(1.0, 11.0), index=index)
+    state = RunningSMA(3)
+    assert state.sync(series.iloc[:8])
+
+    readjusted = series / 2
+    assert not state.sync(readjusted)
+
+
+def test_find_peaks_many_matches_single_series():
+    rng = np.random.default_rng(0)
+    prices = pd.DataFrame(np.cumsum(rng.normal(0, 1, (300, 6)), axis=0), columns=list('ABCDEF'))
+    prices.iloc[:40, 2] = np.nan
+
+    found = utils.find_peaks_many(prices, prominence=2, distance=5, width=1)
+    for ticker in prices.columns:
+        peaks, properties = utils.find_peaks(prices[ticker].to_numpy(), prominence=2, distance=5, width=1)
+        assert np.array_equal(found[ticker][0], peaks)
+        for key, values in properties.items():
+            assert np.allclose(found[ticker][1][key], values)
+
+
+def test_workers_sharing_a_store_keep_the_wider_history(store, monkeypatch):
+    index = pd.bdate_range(end=pd.Timestamp.now(tz='America/New_York').normalize(),
+                           periods=1000, tz='America/New_York')
+    bars = _bars(index)
+    calls = []
+
+    class FakeTicker:
+        def __init__(self, ticker):
+            pass
+
+        def history(self, period=None, interval='1d', start=None, end=None):
+            calls.append((period, start, end))
+            if start is None:
+                start = price_store.period_start(period, tz=index.tz)
+            frame = bars[bars.index >= start]
+            return frame if end is None else frame[frame.index < end]
+
+    monkeypatch.setattr(utils.yf, 'Ticker', FakeTicker)
+    first, second = {}, {}
+
+    # Worker 1 holds 1y; worker 2 then backfills the shared store to 3y
+    monkeypatch.setattr(utils, '_HISTORY', first)
+    utils.fetch_stock_data('AAA', period='1y')
+    monkeypatch.setattr(utils, '_HISTORY', second)
+    assert len(utils.fetch_stock_data('AAA', period='3y')) > 600
+
+    # Worker 1's delta refresh must not shrink the store back to 1y
+    monkeypatch.setattr(utils, '_HISTORY', first)
+    utils.fetch_stock_data('AAA', period='1y', max_age=0)
+    stored, meta = price_store.load('AAA')
+    assert len(stored) > 600
+    assert price_store.covers(meta, price_store.period_start('3y', tz=index.tz))
+
+    # ...and both workers now serve 3y without another download
+    calls.clear()
+    for history in (first, second):
+        monkeypatch.setattr(utils, '_HISTORY', history)
+        assert len(utils.fetch_stock_data('AAA', period='3y')) > 600
+    assert calls == []
+
+
+def test_save_merges_a_store_rewritten_during_the_download(store, monkeypatch):
+    index = pd.bdate_range(end=pd.Timestamp.now(tz='America/New_York').normalize(),
+                           periods=1000, tz='America/New_York')
+    bars = _bars(index)
+
+    class FakeTicker:
+        def __init__(self, ticker):
+            pass
+
+        def history(self, period=None, interval='1d', start=None, end=None):
+            if start is not None:
+                # Another worker backfills to 3y while this delta is in flight
+                wide = bars[bars.index >= price_store.period_start('3y', tz=index.tz)]
+                price_store.save('AAA', interval, wide.iloc[:-1],
+                                 price_store.period_start('3y', tz=index.tz), fetched_at=1.0)
+                return bars[bars.index >= start]
+            return bars[bars.index >= price_store.period_start(period, tz=index.tz)]
+
+    monkeypatch.setattr(utils.yf, 'Ticker', FakeTicker)
+    utils.fetch_stock_data('AAA', period='1y')
+    utils.fetch_stock_data('AAA', period='1y', max_age=0)
+
+    stored, meta = price_store.load('AAA')
+    assert len(stored) > 600
+    assert stored.index[-1] == index[-1]
+    assert meta['fetched_at'] > 1.0
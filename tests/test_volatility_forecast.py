@@ -0,0 +1,58 @@
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from algorithms import volatility_forecast
+
+
+def _garch_closes(rng, n, omega=0.05, alpha=0.1, beta=0.85):
+    s2, e, returns = omega / (1 - alpha - beta), 0.0, np.empty(n)
+    for t in range(n):
+        s2 = omega + alpha * e ** 2 + beta * s2
+        e = np.sqrt(s2) * rng.standard_normal()
+        returns[t] = e / 100
+    return 100 * np.exp(np.cumsum(returns))
+
+
+def _forecast(result):
+    return result['summary'].split(' for the next trading day')[0]
+
+
+@pytest.fixture
+def closes(monkeypatch):
+    monkeypatch.setattr(volatility_forecast, '_FIT_CACHE', OrderedDict())
+    rng = np.random.default_rng(0)
+    index = pd.bdate_range('2023-01-02', periods=504)
+    frames = {ticker: pd.DataFrame({'Close': _garch_closes(rng, len(index))}, index=index)
+              for ticker in ('AAA', 'BBB', 'CCC')}
+    monkeypatch.setattr(volatility_forecast, 'fetch_stock_data',
+                        lambda ticker, period="2y": frames[ticker].copy())
+    return frames
+
+
+def test_revised_last_bar_is_not_served_from_cache(closes):
+    first = volatility_forecast.run_volatility_forecast('AAA')
+    again = volatility_forecast.run_volatility_forecast('AAA')
+    assert (first['fit_mode'], again['fit_mode']) == ('refit', 'cached')
+    assert again['chart_data'] == first['chart_data']
+    assert _forecast(again) == _forecast(first)
+
+    # The partial last bar is revised; the end date stays the same
+    closes['AAA'].iloc[-1, 0] *= 1.05
+    revised = volatility_forecast.run_volatility_forecast('AAA')
+    assert revised['fit_mode'] == 'forward_filtered'
+    assert revised['chart_data']['volatility'][-1] == pytest.approx(first['chart_data']['volatility'][-1])
+    assert _forecast(revised) != _forecast(first)
+
+
+def test_cache_keeps_only_parameters_and_is_bounded(closes, monkeypatch):
+    monkeypatch.setattr(volatility_forecast, 'GARCH_CACHE_SIZE', 2)
+    for ticker in ('AAA', 'BBB', 'CCC'):
+        volatility_forecast.run_volatility_forecast(ticker)
+
+    assert list(volatility_forecast._FIT_CACHE) == ['BBB', 'CCC']
+    entry = volatility_forecast._FIT_CACHE['CCC']
+    assert sorted(entry) == ['bars_since_fit', 'end', 'fitted_at', 'params', 'tail']
+    assert isinstance(entry['params'], np.ndarray)